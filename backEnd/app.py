@@ -1,16 +1,29 @@
-from flask import Flask, request, jsonify, abort
+from flask import Flask, Response, g, request, jsonify, abort, send_file
 from slack_service import post_message
+from response_cache import ResponseCache
 from flask_cors import CORS
 import firebase_admin
 from firebase_admin import credentials, firestore
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore_v1.base_query import FieldFilter
 from dotenv import load_dotenv
+import datetime
 import getpass
+import io
+import json
+import math
 import os
+import threading
+import time
 
 import sys, pathlib
+import tempfile
 backend_root = pathlib.Path(__file__).resolve().parent
 sys.path.append(str(backend_root / "hugo"))
-from hugo.hugo import Hugo
+# Light modules only: Hugo (pandas, networkx, langchain, openai) is imported by the warm-up thread
+from alerts import parse_thresholds
+from metrics import (REGISTRY, CallbackMetric, HTTP_REQUESTS, HTTP_LATENCY,
+                     firestore_op, record_documents, start_profiler)
 
 # ——— Load .env and grab your service account file path —————————————
 load_dotenv(override=True)
@@ -20,32 +33,359 @@ if not service_account_path:
         "Enter SERVICE_ACCOUNT_PATH for Firebase service account: "
     )
 VALID_COLLECTIONS = {"sales", "orders", "parts", "supply"}
+# Firestore caps a write batch at 500 operations; bigger requests are split
+BATCH_WRITE_LIMIT = 500
+BATCH_GET_LIMIT = 1000
+# Page size for JSON listings; NDJSON streams may ask for any size
+LIST_DEFAULT_LIMIT = 100
+LIST_MAX_LIMIT = 1000
+FILTER_OPS = ("==", "!=", "<=", ">=", "<", ">")
 
 # ——— Initialize Firebase —————————————————————————————————————————
 cred = credentials.Certificate(service_account_path)
 firebase_admin.initialize_app(cred)
 db = firestore.client()
 
-hugo = Hugo()
+# ——— Hugo: built in the background so the worker serves /ping immediately ——————
+hugo = None
+hugo_error = None
+# Seconds between reorder sweeps; unset leaves the scheduler off
+REORDER_INTERVAL = os.getenv("HUGO_REORDER_INTERVAL")
+# Only the process holding this lock runs the scheduler (one gunicorn worker, never the reloader parent)
+REORDER_LOCK_PATH = os.getenv("HUGO_REORDER_LOCK", os.path.join(tempfile.gettempdir(), "hugo-reorder.lock"))
+reorder_scheduler = None
+reorder_lock_file = None
+reorder_init_lock = threading.Lock()
+
+def claim_reorder_lock():
+    """True if this process should run the reorder scheduler; holds the lock file for its lifetime."""
+    global reorder_lock_file
+    if __name__ == "__main__" and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        # the debug reloader's watcher process; the child it spawns serves the requests
+        return False
+    try:
+        import fcntl
+    except ImportError:
+        return True  # no flock (Windows): a single dev server process
+    lock_file = open(REORDER_LOCK_PATH, "a")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    reorder_lock_file = lock_file
+    return True
+
+def get_reorder_scheduler():
+    """This process's ReorderScheduler: the running one, else one built once and reused by /api/reorder."""
+    global reorder_scheduler
+    assistant = get_hugo()
+    with reorder_init_lock:
+        if reorder_scheduler is None:
+            from scheduler import ReorderScheduler
+            reorder_scheduler = ReorderScheduler(assistant, db, notify=post_message)
+        return reorder_scheduler
+
+def warm_up():
+    global hugo, hugo_error, reorder_scheduler
+    try:
+        from hugo.hugo import Hugo
+        hugo = Hugo()
+        print("Hugo is ready")
+    except Exception as e:
+        hugo_error = e
+        print(f"Hugo failed to start: {e}")
+        return
+    if REORDER_INTERVAL and claim_reorder_lock():
+        from scheduler import ReorderScheduler
+        with reorder_init_lock:
+            # a /api/reorder call may already have built this process's instance
+            if reorder_scheduler is None:
+                reorder_scheduler = ReorderScheduler(hugo, db, notify=post_message)
+            reorder_scheduler.interval = float(REORDER_INTERVAL)
+            reorder_scheduler.start()
+        print(f"Reorder scheduler running every {REORDER_INTERVAL}s")
+
+threading.Thread(target=warm_up, name="hugo-warmup", daemon=True).start()
+
+# Read-through cache for single-document GETs; writes through this API invalidate it
+response_cache = ResponseCache(
+    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 32 * 1024 * 1024)),
+    ttl=float(os.getenv("RESPONSE_CACHE_TTL", 30)),
+)
+
+REGISTRY.register(CallbackMetric(
+    "cache_requests_total", "Cache lookups by cache and result.", "counter",
+    lambda: {
+        ("response", "hit"): response_cache.hits, ("response", "miss"): response_cache.misses,
+        **({("answer", "hit"): hugo.answers.hits, ("answer", "miss"): hugo.answers.misses} if hugo else {}),
+    },
+    labels=("cache", "result"),
+))
 
 # --- Flask App ---------------------------------------------------------------
 app = Flask(__name__)
 # Enable CORS for all /api/* routes, including OPTIONS preflight,
 # and allow your React dev server origin.
 
+# --- Instrumentation ---------------------------------------------------------
+@app.before_request
+def start_timer():
+    g.started = time.perf_counter()
+    # only honoured with HUGO_PROFILE=1; the report path comes back in X-Profile-Path
+    g.profile = start_profiler(request.headers.get("X-Profile") == "1")
+
+@app.after_request
+def record_request(response):
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    HTTP_LATENCY.observe(time.perf_counter() - g.started, method=request.method, route=route)
+    HTTP_REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+    if g.get("profile") is not None:
+        response.headers["X-Profile-Path"] = g.profile.stop(request.endpoint or "request")
+    return response
+
 # --- Helper ------------------------------------------------------------------
 def check_collection(coll_name):
     if coll_name not in VALID_COLLECTIONS:
         abort(400, description=f"Invalid collection '{coll_name}'")
 
+def get_hugo():
+    if hugo is None:
+        if hugo_error is not None:
+            abort(503, description=f"Hugo failed to start: {hugo_error}")
+        abort(503, description="Hugo is still warming up, retry shortly")
+    return hugo
+
+def get_batch_payload():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        abort(400, description="Request body must be a JSON object")
+    return payload
+
+def parse_filter(expr):
+    """
+    'status==ordered' -> ('status', '==', 'ordered'). Values are strings unless they are
+    true / false / null or quoted JSON ("123", [1, 2]); a bare number is a number for
+    <, <=, >, >= and, for == / !=, matches it stored as either a number or a string.
+    """
+    for op in FILTER_OPS:
+        field, sep, raw = expr.partition(op)
+        if sep and field:
+            if raw in ('true', 'false', 'null') or raw[:1] in ('"', '[', '{'):
+                try:
+                    return field, op, json.loads(raw)
+                except ValueError:
+                    abort(400, description=f"Invalid JSON value in filter '{expr}'")
+            number = parse_number(raw)
+            if number is None:
+                return field, op, raw
+            if op in ('==', '!='):
+                return field, 'in' if op == '==' else 'not-in', [number, raw]
+            return field, op, number
+    abort(400, description=f"Invalid filter '{expr}'")
+
+def parse_number(raw):
+    """'12' -> 12, '1.5' -> 1.5, anything else (including nan / inf) -> None."""
+    try:
+        number = int(raw)
+    except ValueError:
+        try:
+            number = float(raw)
+        except ValueError:
+            return None
+    return number if math.isfinite(number) else None
+
+def iso_dates(table, *columns):
+    """Date columns -> 'YYYY-MM-DD' strings, missing ones -> None (pandas would turn them back into NaN)."""
+    for column in columns:
+        isoformat = table[column].map(lambda day: day.isoformat() if day else None).astype(object)
+        table[column] = isoformat.where(isoformat.notna(), None)
+    return table
+
+def parse_limit(default, maximum):
+    raw = request.args.get('limit')
+    if raw is None:
+        return default
+    if not raw.isdigit() or int(raw) < 1 or (maximum and int(raw) > maximum):
+        abort(400, description=f"'limit' must be a positive integer (max {maximum})" if maximum
+              else "'limit' must be a positive integer")
+    return int(raw)
+
 # --- Routes ------------------------------------------------------------------
+@app.route('/api/<collection>', methods=['GET'])
+def list_documents(collection):
+    """
+    List a collection page by page.
+      ?where=status==ordered    (repeatable; ==, !=, <, <=, >, >=)
+                                values are strings; true/false/null and quoted JSON ("123") are
+                                parsed, and a bare number (quantity<10, part_id==123) is compared
+                                as a number, or for ==/!= as either the number or the string
+      ?order_by=-order_date     (comma separated, '-' for descending)
+      ?select=part_id,status    (only return these fields)
+      ?start_after=<doc_id>     (cursor: last id of the previous page)
+      ?limit=100
+      ?format=ndjson            (or Accept: application/x-ndjson) to stream one document per line
+    """
+    check_collection(collection)
+    ndjson = (request.args.get('format') == 'ndjson'
+              or request.accept_mimetypes.best == 'application/x-ndjson')
+    limit = parse_limit(None, None) if ndjson else parse_limit(LIST_DEFAULT_LIMIT, LIST_MAX_LIMIT)
+
+    coll_ref = db.collection(collection)
+    query = coll_ref
+    for expr in request.args.getlist('where'):
+        field, op, value = parse_filter(expr)
+        query = query.where(filter=FieldFilter(field, op, value))
+
+    order_fields = [f for f in request.args.get('order_by', '').split(',') if f]
+    for field in order_fields:
+        direction = firestore.Query.DESCENDING if field.startswith('-') else firestore.Query.ASCENDING
+        query = query.order_by(field.lstrip('-'), direction=direction)
+    # Document id as the final sort key keeps pages stable and makes the id a valid cursor
+    query = query.order_by('__name__')
+
+    select = [f for f in request.args.get('select', '').split(',') if f]
+    if select:
+        query = query.select(select)
+
+    start_after = request.args.get('start_after')
+    if start_after:
+        if order_fields:
+            # cursor values for the other sort keys come from the document itself
+            with firestore_op('get', collection):
+                cursor = coll_ref.document(start_after).get()
+            if not cursor.exists:
+                abort(400, description=f"Cursor document '{start_after}' not found")
+        else:
+            cursor = {'__name__': start_after}
+        query = query.start_after(cursor)
+
+    if limit:
+        query = query.limit(limit)
+
+    if ndjson:
+        def generate():
+            count = nbytes = 0
+            with firestore_op('list', collection):
+                for doc in query.stream():
+                    line = json.dumps({'id': doc.id, 'data': doc.to_dict()}, default=str) + '\n'
+                    count += 1
+                    nbytes += len(line)
+                    yield line
+            record_documents('list', collection, count, nbytes)
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    with firestore_op('list', collection):
+        documents = [{'id': doc.id, 'data': doc.to_dict()} for doc in query.stream()]
+    next_cursor = documents[-1]['id'] if len(documents) == limit else None
+    response = jsonify({'documents': documents, 'start_after': next_cursor})
+    record_documents('list', collection, len(documents), len(response.get_data()))
+    return response
+
+@app.route('/api/<collection>/batch-get', methods=['POST'])
+def batch_get(collection):
+    """Fetch many documents in one round trip: {"ids": [...], "fields": [...]?}"""
+    check_collection(collection)
+    payload = get_batch_payload()
+    ids = payload.get('ids')
+    if not isinstance(ids, list) or not all(isinstance(i, str) and i for i in ids):
+        abort(400, description="'ids' must be a list of document ids")
+    if len(ids) > BATCH_GET_LIMIT:
+        abort(400, description=f"At most {BATCH_GET_LIMIT} ids per request")
+
+    coll_ref = db.collection(collection)
+    refs = [coll_ref.document(doc_id) for doc_id in dict.fromkeys(ids)]
+    documents = {}
+    missing = []
+    with firestore_op('batch_get', collection):
+        for doc in db.get_all(refs, field_paths=payload.get('fields')):
+            if doc.exists:
+                documents[doc.id] = doc.to_dict()
+            else:
+                missing.append(doc.id)
+    response = jsonify({'documents': documents, 'missing': missing})
+    record_documents('batch_get', collection, len(documents), len(response.get_data()))
+    return response
+
+@app.route('/api/<collection>/batch-write', methods=['POST'])
+def batch_write(collection):
+    """
+    Apply many writes in one request:
+    {"set": {id: data}, "update": {id: data}, "delete": [id, ...]}
+    Writes are committed in atomic batches of BATCH_WRITE_LIMIT operations.
+    """
+    check_collection(collection)
+    payload = get_batch_payload()
+    sets = payload.get('set') or {}
+    updates = payload.get('update') or {}
+    deletes = payload.get('delete') or []
+    if not isinstance(sets, dict) or not isinstance(updates, dict) or not isinstance(deletes, list):
+        abort(400, description="'set' and 'update' must be objects, 'delete' a list of ids")
+    if not all(isinstance(data, dict) for data in list(sets.values()) + list(updates.values())):
+        abort(400, description="Every 'set' and 'update' value must be an object")
+    # an empty id would make coll_ref.document() pick an auto-generated one
+    if not all(isinstance(i, str) and i for i in list(sets) + list(updates) + deletes):
+        abort(400, description="Document ids in 'set', 'update' and 'delete' must be non-empty strings")
+
+    coll_ref = db.collection(collection)
+    operations = (
+        [('set', doc_id, data) for doc_id, data in sets.items()]
+        + [('update', doc_id, data) for doc_id, data in updates.items()]
+        + [('delete', doc_id, None) for doc_id in deletes]
+    )
+
+    committed = 0
+    for start in range(0, len(operations), BATCH_WRITE_LIMIT):
+        batch = db.batch()
+        chunk = operations[start:start + BATCH_WRITE_LIMIT]
+        for op, doc_id, data in chunk:
+            doc_ref = coll_ref.document(doc_id)
+            if op == 'set':
+                batch.set(doc_ref, data)
+            elif op == 'update':
+                batch.update(doc_ref, data)
+            else:
+                batch.delete(doc_ref)
+        try:
+            with firestore_op('batch_commit', collection):
+                batch.commit()
+        except NotFound as e:
+            response_cache.invalidate(*[(collection, doc_id) for _, doc_id, _ in chunk])
+            # the failing batch is rolled back as a whole; earlier batches stay committed
+            return jsonify({
+                'error': f"Update target not found: {e.message}",
+                'committed': committed
+            }), 404
+        response_cache.invalidate(*[(collection, doc_id) for _, doc_id, _ in chunk])
+        committed += len(chunk)
+
+    record_documents('batch_write', collection, committed, request.content_length or 0)
+    return jsonify({
+        'message': f"{committed} writes applied to '{collection}'",
+        'committed': committed
+    })
+
 @app.route('/api/<collection>/<doc_id>', methods=['GET'])
 def get_document(collection, doc_id):
     check_collection(collection)
-    doc = db.collection(collection).document(doc_id).get()
-    if not doc.exists:
-        abort(404, description='Document not found')
-    return jsonify(doc.to_dict())
+    key = (collection, doc_id)
+    cached = response_cache.get(key)
+    if cached is None:
+        generation = response_cache.generation()
+        with firestore_op('get', collection):
+            doc = db.collection(collection).document(doc_id).get()
+        if not doc.exists:
+            abort(404, description='Document not found')
+        body = app.json.dumps(doc.to_dict()).encode()
+        record_documents('get', collection, 1, len(body))
+        etag = response_cache.put(key, body, generation)
+    else:
+        body, etag = cached
+
+    if_none_match = request.headers.get('If-None-Match', '')
+    if etag in (tag.strip() for tag in if_none_match.split(',')):
+        return Response(status=304, headers={'ETag': etag})
+    return Response(body, mimetype='application/json', headers={'ETag': etag})
 
 @app.route('/api/<collection>/<doc_id>', methods=['PUT', 'POST'])
 def create_or_overwrite(collection, doc_id):
@@ -54,7 +394,10 @@ def create_or_overwrite(collection, doc_id):
     data = payload.get('data')
     if not isinstance(data, dict):
         abort(400, description="Request body must be JSON with a top-level 'data' object")
-    db.collection(collection).document(doc_id).set(data)
+    with firestore_op('set', collection):
+        db.collection(collection).document(doc_id).set(data)
+    record_documents('set', collection, 1, request.content_length or 0)
+    response_cache.invalidate((collection, doc_id))
     return jsonify({
         'message': f"Document '{collection}/{doc_id}' created or overwritten"
     })
@@ -66,10 +409,14 @@ def update_fields(collection, doc_id):
     data = payload.get('data')
     if not isinstance(data, dict):
         abort(400, description="Request body must be JSON with a top-level 'data' object")
-    doc_ref = db.collection(collection).document(doc_id)
-    if not doc_ref.get().exists:
+    # update() already fails on a missing document, so no existence pre-read is needed
+    try:
+        with firestore_op('update', collection):
+            db.collection(collection).document(doc_id).update(data)
+    except NotFound:
         abort(404, description='Document not found')
-    doc_ref.update(data)
+    record_documents('update', collection, 1, request.content_length or 0)
+    response_cache.invalidate((collection, doc_id))
     return jsonify({
         'message': f"Fields updated in '{collection}/{doc_id}'"
     })
@@ -77,25 +424,63 @@ def update_fields(collection, doc_id):
 @app.route('/api/<collection>/<doc_id>', methods=['DELETE'])
 def delete_document(collection, doc_id):
     check_collection(collection)
-    db.collection(collection).document(doc_id).delete()
+    with firestore_op('delete', collection):
+        db.collection(collection).document(doc_id).delete()
+    record_documents('delete', collection, 1)
+    response_cache.invalidate((collection, doc_id))
     return jsonify({
         'message': f"Document '{collection}/{doc_id}' deleted"
     })
 
+@app.route("/api/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(response_cache.stats())
+
 @app.route("/api/chat", methods=["POST"])
 def chat():
     payload = request.get_json(silent=True) or {}
     query   = payload.get("query", "").strip()
+    session_id = payload.get("session_id")
+    session_id = str(session_id) if session_id else None
     if not query:
         abort(400, description="`query` is required")
+    assistant = get_hugo()
 
     try:
         # Hugo.chat() is interactive; we want a single‐shot call
-        answer = hugo.chat(query)
+        answer = assistant.chat(query, session_id=session_id)
         return jsonify({ "response": answer })
     except Exception as e:
         abort(500, description=f"Hugo error: {e}")
 
+@app.route("/api/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    Same input as /api/chat, answered as Server-Sent Events:
+    `token` events while the model writes, `tool_start`/`tool_end` as tools run,
+    then one `done` event with the full response (or an `error` event).
+    """
+    payload = request.get_json(silent=True) or {}
+    query   = payload.get("query", "").strip()
+    session_id = payload.get("session_id")
+    session_id = str(session_id) if session_id else None
+    if not query:
+        abort(400, description="`query` is required")
+    assistant = get_hugo()
+
+    def generate():
+        try:
+            for event in assistant.stream(query, session_id=session_id):
+                yield f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+        except Exception as e:
+            app.logger.exception("Hugo stream failed")
+            yield f"event: error\ndata: {json.dumps({'error': f'Hugo error: {e}'})}\n\n"
+
+    return Response(generate(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
 @app.route("/api/notify-slack", methods=["POST"])
 def notify_slack():
     payload = request.get_json(silent=True) or {}
@@ -109,10 +494,185 @@ def notify_slack():
         app.logger.exception("Slack notify failed")
         abort(500, description=str(e))
 
+@app.route("/api/alerts", methods=["GET"])
+def inventory_alerts():
+    """Rule-based alerts; thresholds can be overridden by query args, ?phrase=1 adds an LLM summary."""
+    try:
+        thresholds = parse_thresholds(request.args)
+    except ValueError:
+        abort(400, description="Alert thresholds must be numbers")
+    assistant = get_hugo()
+    alerts = assistant.alerts(thresholds)
+    result = {"alerts": alerts}
+    if request.args.get("phrase") == "1":
+        result["summary"] = assistant.phrase_alerts(alerts)
+    return jsonify(result)
+
+@app.route("/api/capacity", methods=["GET", "POST"])
+def production_capacity():
+    """
+    Buildable units and bottleneck part per spec from current stock.
+      GET  ?spec=<name> (repeatable) to filter, ?mix=1 to add the joint mix over shared stock
+      POST {"weights": {spec: value}?, "max_units": {spec: n}?} -> the joint mix for those
+    """
+    assistant = get_hugo()
+    if request.method == "POST":
+        payload = get_batch_payload()
+        weights = payload.get("weights") or {}
+        max_units = payload.get("max_units") or {}
+        if not isinstance(weights, dict) or not isinstance(max_units, dict):
+            abort(400, description="'weights' and 'max_units' must be objects keyed by spec name")
+        try:
+            weights = {spec: float(value) for spec, value in weights.items()}
+            max_units = {spec: float(value) for spec, value in max_units.items()}
+        except (TypeError, ValueError):
+            abort(400, description="'weights' and 'max_units' values must be numbers")
+        return jsonify({"mix": assistant.production_mix(weights, max_units)})
+
+    table = assistant.capacity(request.args.getlist("spec"))
+    result = {"specs": table.to_dict("records")}
+    if request.args.get("mix") == "1":
+        result["mix"] = assistant.production_mix()
+    return jsonify(result)
+
+@app.route("/api/requirements", methods=["GET", "POST"])
+def material_requirements():
+    """
+    Parts needed to build a demand, with usable stock and shortage per part.
+      GET                                  -> demand from every open sales order
+      POST {"demand": {spec_name: units}}  -> that demand
+      ?shortage_only=1 to list only parts that fall short
+    """
+    assistant = get_hugo()
+    demand = None
+    if request.method == "POST":
+        demand = get_batch_payload().get("demand")
+        if not isinstance(demand, dict):
+            abort(400, description="'demand' must be an object of spec name -> units")
+        try:
+            demand = {spec: float(units) for spec, units in demand.items()}
+        except (TypeError, ValueError):
+            abort(400, description="'demand' values must be numbers")
+
+    table = assistant.requirements(demand)
+    if request.args.get("shortage_only") == "1":
+        table = table[table["shortage"] > 0]
+    return jsonify({"requirements": table.to_dict("records"), "parts_short": int((table["shortage"] > 0).sum())})
+
+@app.route("/api/mrp", methods=["GET"])
+def material_plan():
+    """
+    Time-phased plan: projected shortages from sales demand and open orders, with the
+    shortage date and the date to order by (shortest supplier lead time).
+      ?part=<id> (repeatable) to filter, ?all=1 to include parts that never run short,
+      ?bucket=day|week, ?as_of=YYYY-MM-DD to project from another date,
+      ?projection=<id> for one part's bucket-by-bucket stock
+    """
+    bucket = request.args.get("bucket", "day")
+    if bucket not in ("day", "week"):
+        abort(400, description="'bucket' must be 'day' or 'week'")
+    as_of = request.args.get("as_of")
+    if as_of:
+        try:
+            as_of = datetime.date.fromisoformat(as_of)
+        except ValueError:
+            abort(400, description="'as_of' must be a YYYY-MM-DD date")
+    assistant = get_hugo()
+
+    part_id = request.args.get("projection")
+    if part_id:
+        projection = assistant.stock_projection(part_id)
+        if not projection:
+            abort(404, description=f"No plan for part {part_id}")
+        return jsonify({"part_id": part_id, "projection": projection})
+
+    table = assistant.material_plan(request.args.getlist("part") or None,
+                                    shortages_only=request.args.get("all") != "1",
+                                    bucket=bucket, start=as_of or None)
+    iso_dates(table, "shortage_date", "order_by")
+    return jsonify({"plan": table.to_dict("records"), "parts_short": int(table["shortage_date"].notna().sum())})
+
+@app.route("/api/sourcing", methods=["GET", "POST"])
+def sourcing_plan():
+    """
+    Supplier, quantity and cost per short part (price, lead time, MOQ, reorder quantity, reliability).
+      GET                                                    -> the MRP shortages, ?part=<id> (repeatable) to filter
+      POST {"shortages": [{"part_id", "quantity", "need_by"?}]} -> those shortages
+      "reliability_weight" (query arg or body) changes how much reliability counts
+    """
+    payload = get_batch_payload() if request.method == "POST" else {}
+    try:
+        weight = float(payload.get("reliability_weight", request.args.get("reliability_weight", 1.0)))
+    except (TypeError, ValueError):
+        abort(400, description="'reliability_weight' must be a number")
+
+    shortages = None
+    if request.method == "POST":
+        rows = payload.get("shortages")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) and row.get("part_id") for row in rows):
+            abort(400, description="'shortages' must be a list of objects with a 'part_id'")
+        try:
+            shortages = [
+                {"part_id": row["part_id"], "shortage": float(row.get("quantity", 0)),
+                 "need_by": datetime.date.fromisoformat(row["need_by"]) if row.get("need_by") else None}
+                for row in rows
+            ]
+        except (TypeError, ValueError):
+            abort(400, description="'quantity' must be a number and 'need_by' a YYYY-MM-DD date")
+
+    assistant = get_hugo()
+    plan = assistant.sourcing_plan(shortages, weight)
+    parts = request.args.getlist("part")
+    if parts:
+        plan = plan[plan["part_id"].isin(parts)]
+    iso_dates(plan, "need_by", "arrives")
+    total = sum(cost for cost in plan["total_cost"] if cost is not None)
+    return jsonify({"purchases": plan.to_dict("records"), "total_cost": total,
+                    "late": sum(not met for met in plan["meets_deadline"])})
+
+@app.route("/api/reorder", methods=["GET", "POST"])
+def reorder():
+    """
+    Draft purchase orders for parts below their minimum stock.
+      GET  -> what the next sweep would write (nothing is written)
+      POST -> run a sweep now: write the drafts and send the Slack digest
+    """
+    scheduler = get_reorder_scheduler()
+    if request.method == "GET":
+        drafts, unsourced = scheduler.draft_orders()
+        return jsonify({"drafts": dict(drafts), "unsourced": unsourced})
+    drafts = scheduler.sweep()
+    response_cache.invalidate(*[("orders", order_id) for order_id, _ in drafts])
+    return jsonify({"written": dict(drafts), "committed": len(drafts)})
+
+@app.route("/api/graphs/<kind>", methods=["GET"])
+def graph_image(kind):
+    if kind not in ("specs", "critical"):
+        abort(404, description=f"Unknown graph '{kind}'")
+    png = get_hugo().render_graph(kind)
+    if png is None:
+        abort(404, description="No critical parts found for visualization")
+    return send_file(io.BytesIO(png), mimetype="image/png")
+
+@app.route("/metrics")
+def prometheus_metrics():
+    """Prometheus text exposition of request, Firestore, cache, LLM and tool metrics."""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
 @app.route("/ping")
 def ping():
+    """Liveness: the process is up, whether or not Hugo has finished loading."""
     return "pong", 200
 
+@app.route("/ready")
+def ready():
+    """Readiness: 200 once Hugo has loaded its data and built its agent, 503 until then."""
+    if hugo is not None:
+        return jsonify({"status": "ready", "startup": hugo.timings}), 200
+    if hugo_error is not None:
+        return jsonify({"status": "failed", "error": str(hugo_error)}), 503
+    return jsonify({"status": "warming up"}), 503
+
 # --- Entry Point -------------------------------------------------------------
 if __name__ == "__main__":
     app.run(debug=True, host="127.0.0.1", port=5050)
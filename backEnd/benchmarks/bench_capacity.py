@@ -0,0 +1,67 @@
+"""
+Benchmark the BOM matrix and the production-capacity engine on a synthetic catalogue.
+
+    python benchmarks/bench_capacity.py --parts 100000 --specs 10000
+
+Times building the sparse BOM matrix, one incremental spec update, turning a
+demand for every spec into part requirements, per-spec capacity (buildable
+units + bottleneck) and the joint mix over shared stock, with the scipy LP
+and with the greedy fallback.
+"""
+import argparse
+import pathlib
+import sys
+import time
+from unittest import mock
+
+backend_root = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_root / "hugo"))
+sys.path.append(str(backend_root / "benchmarks"))
+
+from bench_summary import best_of, synthetic_catalogue
+from bom import BomMatrix
+from capacity import production_mix, spec_capacity, usable_stock
+from graph import create_summary_table
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--parts", type=int, default=100_000)
+    parser.add_argument("--specs", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    parts, specs = synthetic_catalogue(args.parts, args.specs)
+    stock = usable_stock(create_summary_table(parts, specs))
+
+    build = best_of(lambda: BomMatrix.from_specs(specs), args.repeat)
+    bom = BomMatrix.from_specs(specs)
+    print(f"catalogue: {args.parts} parts, {args.specs} specs, {len(bom.data)} BOM entries")
+    print(f"build:      {build * 1000:8.1f} ms")
+
+    middle = specs[len(specs) // 2]
+    update = best_of(lambda: bom.set_spec(middle['spec_name'], middle), args.repeat)
+    print(f"update:     {update * 1000:8.1f} ms  (one spec row)")
+
+    demand = {spec['spec_name']: 1 for spec in specs}
+    requirements = best_of(lambda: bom.requirements(demand), args.repeat)
+    print(f"mat-vec:    {requirements * 1000:8.1f} ms  (demand for every spec -> part requirements)")
+
+    per_spec = best_of(lambda: spec_capacity(bom, stock), args.repeat)
+    print(f"per spec:   {per_spec * 1000:8.1f} ms")
+
+    start = time.perf_counter()
+    mix = production_mix(bom, stock)
+    print(f"mix ({mix['method']}):  {(time.perf_counter() - start) * 1000:8.1f} ms  "
+          f"{mix['total_units']} units")
+
+    # scipy hidden: the greedy allocator alone
+    with mock.patch.dict(sys.modules, {"scipy.optimize": None, "scipy.sparse": None}):
+        start = time.perf_counter()
+        mix = production_mix(bom, stock)
+        print(f"mix ({mix['method']}): {(time.perf_counter() - start) * 1000:8.1f} ms  "
+              f"{mix['total_units']} units")
+
+
+if __name__ == "__main__":
+    main()
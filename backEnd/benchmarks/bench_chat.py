@@ -0,0 +1,155 @@
+"""
+End-to-end chat latency benchmark, fully offline.
+
+    python benchmarks/bench_chat.py --scale small medium --llm-latency 0.2
+    python benchmarks/bench_chat.py --save-baseline benchmarks/chat_baseline.json
+    python benchmarks/bench_chat.py --baseline benchmarks/chat_baseline.json   # exit 1 on regression
+
+benchmarks/chat_baseline.json is committed; run the --baseline check before merging a
+change to the chat path, and refresh the file with --save-baseline (on the same machine,
+default flags) in the commit that makes a slowdown intentional or lands a speedup.
+
+Hugo runs against an in-memory Firestore and a scripted chat model (see fakes.py)
+on synthetic datasets. Reported per scale, in ms:
+  load     snapshot listeners + indexes       context  summary table + retriever
+  agent    prompt / tools / executor setup    llm      time inside the model
+  tool     time inside tools (summed)         overhead rest of a chat turn (agent loop, parsing, callbacks)
+  turn     wall time of one uncached turn (best of --repeat, per question)
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import pathlib
+import sys
+import threading
+import time
+
+backend_root = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_root / "hugo"))
+sys.path.append(str(backend_root / "benchmarks"))
+
+# Never prompt or reach out for credentials; nothing below talks to Firebase or OpenAI
+os.environ.setdefault("SERVICE_ACCOUNT_PATH", "offline-benchmark")
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from fakes import DEFAULT_SCRIPTS, SCALES, FakeFirestore, FakeToolChatModel, synthetic_dataset
+from hugo import Hugo
+
+STAGES = ("load", "context", "agent", "llm", "tool", "overhead", "turn")
+
+
+class StageTimer(BaseCallbackHandler):
+    """Sums time spent in chat-model and tool runs; tools may run on several threads at once."""
+
+    def __init__(self) -> None:
+        self.totals = {"llm": 0.0, "tool": 0.0}
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id) -> None:
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def _stop(self, stage, run_id) -> None:
+        with self._lock:
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                self.totals[stage] += time.perf_counter() - started
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._stop("llm", run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._stop("llm", run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._stop("tool", run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._stop("tool", run_id)
+
+
+def run_turn(hugo, question):
+    """One uncached agent turn; returns (wall, llm, tool) seconds."""
+    timer = StageTimer()
+    hugo.create_data_context()
+    start = time.perf_counter()
+    hugo.agent_executor.invoke({"input": question, "chat_history": []}, config={"callbacks": [timer]})
+    wall = time.perf_counter() - start
+    return wall, timer.totals["llm"], timer.totals["tool"]
+
+
+def bench_scale(scale, args) -> dict:
+    n_parts, n_specs = SCALES[scale]
+    db = FakeFirestore(synthetic_dataset(n_parts, n_specs), latency=args.db_latency)
+    llm = FakeToolChatModel(scripts=DEFAULT_SCRIPTS, latency=args.llm_latency)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        hugo = Hugo(db=db, llm=llm)
+        hugo.agent_executor.verbose = False
+
+        turns = []
+        for question in DEFAULT_SCRIPTS:
+            turns.append(min((run_turn(hugo, question) for _ in range(args.repeat)), key=lambda t: t[0]))
+        hugo.store.close()
+
+    wall, llm_time, tool_time = (sum(column) / len(turns) for column in zip(*turns))
+    seconds = {**hugo.timings, "llm": llm_time, "tool": tool_time,
+               "overhead": max(wall - llm_time - tool_time, 0.0), "turn": wall}
+    return {stage: round(seconds[stage] * 1000, 2) for stage in STAGES}
+
+
+def regressions(results, baseline, tolerance, slack_ms) -> list:
+    """Stages slower than baseline * (1 + tolerance) + slack_ms."""
+    found = []
+    for scale, stages in results.items():
+        for stage, ms in stages.items():
+            before = baseline.get(scale, {}).get(stage)
+            if before is not None and ms > before * (1 + tolerance) + slack_ms:
+                found.append(f"{scale}/{stage}: {ms:.1f} ms vs baseline {before:.1f} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", nargs="+", choices=list(SCALES), default=["small", "medium"])
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds per model call")
+    parser.add_argument("--db-latency", type=float, default=0.0, help="seconds per initial snapshot")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", help="JSON from --save-baseline to compare against")
+    parser.add_argument("--save-baseline", help="write this run's results here")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--slack-ms", type=float, default=5.0, help="allowed absolute slowdown")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'scale':8}" + "".join(f"{stage:>10}" for stage in STAGES))
+    for scale in args.scale:
+        results[scale] = bench_scale(scale, args)
+        print(f"{scale:8}" + "".join(f"{results[scale][stage]:10.1f}" for stage in STAGES))
+
+    if args.save_baseline:
+        pathlib.Path(args.save_baseline).write_text(json.dumps(results, indent=2))
+        print(f"baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(pathlib.Path(args.baseline).read_text())
+        found = regressions(results, baseline, args.tolerance, args.slack_ms)
+        if found:
+            print("REGRESSIONS:\n  " + "\n  ".join(found))
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measure cold import time of the API's startup path, each module in a fresh interpreter.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --app --budget-ms 1000 --top 5   # exit 1 over budget
+
+`app` needs SERVICE_ACCOUNT_PATH (and Flask) to import, so it is opt-in.
+`hugo.hugo` is imported by the warm-up thread after the worker is serving,
+so it is reported but not held to the budget.
+"""
+import argparse
+import os
+import pathlib
+import subprocess
+import sys
+
+backend_root = pathlib.Path(__file__).resolve().parent.parent
+
+STARTUP_MODULES = ["alerts", "metrics", "response_cache"]
+WARMUP_MODULES = ["hugo.hugo"]
+
+SNIPPET = """
+import sys, time
+sys.path[:0] = [{root!r}, {hugo!r}]
+started = time.perf_counter()
+import {module}
+print(time.perf_counter() - started)
+"""
+
+
+def import_time(module, importtime=False):
+    """Seconds to import `module` in a new interpreter, plus -X importtime output if asked."""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", SNIPPET.format(root=str(backend_root), hugo=str(backend_root / "hugo"), module=module)]
+    env = {**os.environ, "SERVICE_ACCOUNT_PATH": os.getenv("SERVICE_ACCOUNT_PATH", "offline-benchmark")}
+    result = subprocess.run(command, cwd=backend_root, env=env, capture_output=True, text=True,
+                            stdin=subprocess.DEVNULL)
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr.strip()[-2000:]}")
+    return float(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def slowest_imports(importtime_output, module, top):
+    """The `top` nested imports of `module` with the largest cumulative time (-X importtime output)."""
+    group = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # children are listed (indented) before their parent; a top-level line closes the group
+        depth = len(name) - len(name.lstrip())
+        if depth > 1:
+            group.append((int(cumulative), name.strip()))
+        elif name.strip() == module:
+            break
+        else:
+            group = []
+    return sorted(group, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", action="store_true", help="also import app.py (needs credentials)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, default=1000.0,
+                        help="fail if a startup-path module takes longer than this")
+    parser.add_argument("--top", type=int, default=0, help="show the N slowest nested imports")
+    args = parser.parse_args()
+
+    startup = STARTUP_MODULES + (["app"] if args.app else [])
+    over_budget = []
+    for module in startup + WARMUP_MODULES:
+        best = min(import_time(module)[0] for _ in range(args.repeat))
+        on_startup_path = module in startup
+        flag = ""
+        if on_startup_path and best * 1000 > args.budget_ms:
+            over_budget.append(module)
+            flag = "  OVER BUDGET"
+        kind = "startup" if on_startup_path else "warm-up"
+        print(f"{module:16} {best * 1000:8.1f} ms  ({kind}){flag}")
+
+        if args.top:
+            for cumulative, name in slowest_imports(import_time(module, importtime=True)[1], module, args.top):
+                print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+    if over_budget:
+        print(f"over the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
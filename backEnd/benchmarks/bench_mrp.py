@@ -0,0 +1,95 @@
+"""
+Benchmark the time-phased MRP projection, supplier selection and reorder sweep on a synthetic dataset, fully offline.
+
+    python benchmarks/bench_mrp.py --scale small medium large
+
+Hugo runs against an in-memory Firestore (see fakes.py). Reported per scale, in ms:
+  build     full rebuild of the demand / receipt matrices and the projection
+  order     one purchase order edited through the snapshot listener, then re-planned
+  sale      one sales order edited through the snapshot listener, then re-planned
+  plan      the shortage plan with nothing changed
+  weekly    a plan in week buckets, built from scratch
+  sourcing  supplier and quantity for a shortage on every part, in one pass
+  reorder   one reorder scheduler sweep deciding drafts for every part (nothing written)
+"""
+import argparse
+import contextlib
+import io
+import os
+import pathlib
+import sys
+from datetime import timedelta
+
+backend_root = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_root / "hugo"))
+sys.path.append(str(backend_root / "benchmarks"))
+
+# Never prompt or reach out for credentials; nothing below talks to Firebase or OpenAI
+os.environ.setdefault("SERVICE_ACCOUNT_PATH", "offline-benchmark")
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-benchmark")
+
+from bench_summary import best_of
+from fakes import DATASET_START, DEFAULT_SCRIPTS, SCALES, FakeFirestore, FakeToolChatModel, synthetic_dataset
+from hugo import Hugo
+from mrp import MrpProjection
+from scheduler import ReorderScheduler
+from sourcing import choose_suppliers, reorder_quantities
+
+# The synthetic deliveries and sales fall in the horizon from this day
+START = DATASET_START
+
+
+def bench_scale(name, repeat):
+    data = synthetic_dataset(*SCALES[name], start=START)
+    db = FakeFirestore(data)
+    with contextlib.redirect_stdout(io.StringIO()):
+        hugo = Hugo(db=db, llm=FakeToolChatModel(scripts=DEFAULT_SCRIPTS))
+    hugo.mrp = MrpProjection(hugo.bom_matrix, load=hugo._mrp_snapshot, start=START)
+    lead = hugo.lead_times()
+    short = len(hugo.mrp.plan(lead))
+    # an empty plan would time nothing but the bookkeeping
+    assert short, f"no shortages in the {name} dataset from {START}"
+
+    def rebuild():
+        hugo.mrp._stale = True
+        hugo.mrp.refresh()
+
+    order_id, order = next(iter(data['orders'].items()))
+    order = {**order, 'status': 'ordered'}
+    sale_id, sale = next(iter(data['sales'].items()))
+
+    def edit(collection, doc_id, doc, field):
+        def run():
+            doc[field] += 1
+            db.collection(collection).document(doc_id).set(doc)
+            hugo.mrp.plan(lead)
+        return run
+
+    results = {
+        'build': best_of(rebuild, repeat),
+        'order': best_of(edit('orders', order_id, order, 'quantity_ordered'), repeat),
+        'sale': best_of(edit('sales', sale_id, sale, 'quantity'), repeat),
+        'plan': best_of(lambda: hugo.mrp.plan(lead), repeat),
+        'weekly': best_of(lambda: hugo.material_plan(bucket='week', start=START), repeat),
+    }
+    hugo._refresh_supply()
+    shortages = [{'part_id': part_id, 'shortage': 50, 'need_by': START + timedelta(days=14)} for part_id in data['parts']]
+    reorder = reorder_quantities(hugo.parts)
+    results['sourcing'] = best_of(lambda: choose_suppliers(shortages, hugo._supply_table, reorder, today=START), repeat)
+    results['reorder'] = best_of(ReorderScheduler(hugo, db).draft_orders, repeat)
+    short = len(hugo.mrp.plan(lead))
+    print(f"{name:8} " + "  ".join(f"{stage} {seconds * 1000:8.1f}" for stage, seconds in results.items())
+          + f"  ({len(hugo.mrp.part_ids)} parts, {short} short)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", nargs="+", choices=list(SCALES), default=["small", "medium"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for name in args.scale:
+        bench_scale(name, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
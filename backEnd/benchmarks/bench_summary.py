@@ -0,0 +1,117 @@
+"""
+Benchmark the parts summary table on a synthetic catalogue.
+
+    python benchmarks/bench_summary.py --parts 100000 --specs 10000
+
+Compares the vectorised graph.create_summary_table against the previous
+row-wise implementation (DataFrame.apply + Python BOM loop + to_dict rebuild).
+"""
+import argparse
+import pathlib
+import random
+import sys
+import time
+from collections import defaultdict
+
+backend_root = pathlib.Path(__file__).resolve().parent.parent
+sys.path.append(str(backend_root / "hugo"))
+
+import pandas as pd
+from graph import create_summary_table
+
+
+def synthetic_catalogue(n_parts, n_specs, bom_lines=10, seed=0):
+    rng = random.Random(seed)
+    parts = [
+        {
+            'part_id': f"P{i}",
+            'part_name': f"Part {i}",
+            'quantity': rng.randint(0, 200),
+            'min_stock': rng.randint(0, 100),
+            'blocked': rng.random() < 0.02,
+            'comments': "",
+        }
+        for i in range(n_parts)
+    ]
+    specs = [
+        {
+            'spec_name': f"spec_{s}",
+            'bill of materials': [
+                {'Part_ID': f"P{rng.randrange(n_parts)}", 'Qty': rng.randint(1, 4)}
+                for _ in range(bom_lines)
+            ],
+        }
+        for s in range(n_specs)
+    ]
+    return parts, specs
+
+
+def legacy_summary_table(parts_data, specs_data):
+    """The pre-vectorisation implementation, kept here as the baseline."""
+    parts_df = pd.DataFrame(parts_data)
+    parts_df['stock_status'] = (parts_df['quantity'] / parts_df['min_stock']) * 100
+
+    def get_status_category(row):
+        if row['blocked']:
+            return 'Blocked'
+        elif row['stock_status'] < 50:
+            return 'Critical'
+        elif row['stock_status'] < 100:
+            return 'Low'
+        else:
+            return 'Good'
+
+    parts_df['status_category'] = parts_df.apply(get_status_category, axis=1)
+
+    part_usage = defaultdict(int)
+    for spec in specs_data:
+        for part_item in spec['bill of materials']:
+            part_usage[part_item['Part_ID']] += 1
+
+    parts_df['usage_count'] = parts_df['part_id'].map(part_usage)
+    summary_df = parts_df.sort_values(['status_category', 'usage_count'],
+                                      ascending=[True, False])[
+        ['part_id', 'part_name', 'quantity', 'min_stock', 'stock_status',
+         'status_category', 'usage_count', 'blocked', 'comments']]
+
+    data_dict = summary_df.to_dict()
+    return [
+        {column: data_dict[column][key] for column in data_dict}
+        for key in data_dict['part_id']
+    ]
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--parts", type=int, default=100_000)
+    parser.add_argument("--specs", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    parts, specs = synthetic_catalogue(args.parts, args.specs)
+    print(f"catalogue: {args.parts} parts, {args.specs} specs, "
+          f"{sum(len(s['bill of materials']) for s in specs)} BOM lines")
+
+    vectorised = best_of(lambda: create_summary_table(parts, specs), args.repeat)
+    print(f"vectorised: {vectorised * 1000:8.1f} ms  (columnar table)")
+    table = create_summary_table(parts, specs)
+    records = best_of(lambda: table.to_dict('records'), args.repeat)
+    print(f"records:    {records * 1000:8.1f} ms  (optional row view for the LLM context)")
+
+    if not args.skip_legacy:
+        legacy = best_of(lambda: legacy_summary_table(parts, specs), args.repeat)
+        print(f"legacy:     {legacy * 1000:8.1f} ms  ({legacy / vectorised:.1f}x slower)")
+
+
+if __name__ == "__main__":
+    main()
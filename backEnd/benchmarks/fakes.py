@@ -0,0 +1,359 @@
+"""
+Offline stand-ins for Firestore and the OpenAI chat model, plus synthetic
+datasets, so Hugo can be benchmarked without network access or credentials.
+
+    db = FakeFirestore(synthetic_dataset(1_000, 100))
+    llm = FakeToolChatModel(scripts=DEFAULT_SCRIPTS, latency=0.2)
+    hugo = Hugo(db=db, llm=llm)
+"""
+import random
+import threading
+import time
+from datetime import date, timedelta
+from enum import Enum
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+# === FIRESTORE ===
+class ChangeType(Enum):
+    ADDED = 1
+    MODIFIED = 2
+    REMOVED = 3
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data) -> None:
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return None if self._data is None else dict(self._data)
+
+
+class FakeChange:
+    def __init__(self, kind, doc_id, data) -> None:
+        self.type = kind
+        self.document = FakeSnapshot(doc_id, data)
+
+
+class FakeWatch:
+    def __init__(self, collection, callback) -> None:
+        self._collection = collection
+        self._callback = callback
+
+    def unsubscribe(self) -> None:
+        self._collection._watches.discard(self)
+
+
+class FakeDocument:
+    def __init__(self, collection, doc_id) -> None:
+        self._collection = collection
+        self.id = doc_id
+
+    def get(self) -> FakeSnapshot:
+        return FakeSnapshot(self.id, self._collection._docs.get(self.id))
+
+    def set(self, data, merge=False) -> None:
+        docs = self._collection._docs
+        old = docs.get(self.id)
+        docs[self.id] = {**(old or {}), **data} if merge else dict(data)
+        self._collection._notify(ChangeType.ADDED if old is None else ChangeType.MODIFIED, self.id)
+
+    def update(self, data) -> None:
+        if self.id not in self._collection._docs:
+            raise KeyError(f"No document to update: {self._collection.name}/{self.id}")
+        self.set(data, merge=True)
+
+    def delete(self) -> None:
+        if self._collection._docs.pop(self.id, None) is not None:
+            self._collection._notify(ChangeType.REMOVED, self.id)
+
+
+class FakeCollection:
+    def __init__(self, db, name, docs) -> None:
+        self._db = db
+        self.name = name
+        self._docs = docs
+        self._watches = set()
+
+    def document(self, doc_id) -> FakeDocument:
+        return FakeDocument(self, doc_id)
+
+    def stream(self):
+        time.sleep(self._db.latency)
+        for doc_id, data in list(self._docs.items()):
+            yield FakeSnapshot(doc_id, data)
+
+    def on_snapshot(self, callback) -> FakeWatch:
+        """Deliver the whole collection as ADDED changes, then every later write as it happens."""
+        time.sleep(self._db.latency)
+        watch = FakeWatch(self, callback)
+        self._watches.add(watch)
+        changes = [FakeChange(ChangeType.ADDED, doc_id, data) for doc_id, data in list(self._docs.items())]
+        callback([change.document for change in changes], changes, None)
+        return watch
+
+    def _notify(self, kind, doc_id) -> None:
+        change = FakeChange(kind, doc_id, self._docs.get(doc_id))
+        for watch in list(self._watches):
+            watch._callback([change.document], [change], None)
+
+
+class FakeBatch:
+    """Write batch: operations are queued and applied in order on commit()."""
+
+    def __init__(self) -> None:
+        self._operations = []
+
+    def set(self, document, data, merge=False) -> None:
+        self._operations.append(lambda: document.set(data, merge=merge))
+
+    def update(self, document, data) -> None:
+        self._operations.append(lambda: document.update(data))
+
+    def delete(self, document) -> None:
+        self._operations.append(document.delete)
+
+    def commit(self) -> None:
+        for operation in self._operations:
+            operation()
+        self._operations = []
+
+
+class FakeWriteOperation:
+    def __init__(self, document) -> None:
+        self.reference = document
+
+
+class FakeWriteFailure:
+    def __init__(self, document, attempts) -> None:
+        self.operation = FakeWriteOperation(document)
+        self.attempts = attempts
+
+
+class FakeBulkWriter:
+    """BulkWriter: sets are applied on flush(); ids in db.failing_writes fail every attempt."""
+
+    def __init__(self, db) -> None:
+        self._db = db
+        self._operations = []
+        self._on_error = lambda failure, writer: False
+
+    def on_write_error(self, callback) -> None:
+        self._on_error = callback
+
+    def set(self, document, data, merge=False) -> None:
+        self._operations.append((document, data, merge))
+
+    def flush(self) -> None:
+        for document, data, merge in self._operations:
+            attempts = 1
+            while document.id in self._db.failing_writes:
+                if not self._on_error(FakeWriteFailure(document, attempts), self):
+                    break
+                attempts += 1
+            else:
+                document.set(data, merge=merge)
+        self._operations = []
+
+    def close(self) -> None:
+        self.flush()
+
+
+class FakeFirestore:
+    """
+    In-memory Firestore with the calls Hugo and the API make: collection().stream(),
+    collection().on_snapshot(), document().get/set/update/delete, batch() and
+    bulk_writer(). `latency` seconds are spent on every stream / initial snapshot to
+    mimic a round trip; writes to ids in `failing_writes` fail in the bulk writer.
+    """
+
+    def __init__(self, collections=None, latency=0.0) -> None:
+        self.latency = latency
+        self.failing_writes = set()
+        self._collections = {}
+        self._lock = threading.Lock()
+        for name, docs in (collections or {}).items():
+            self._collections[name] = FakeCollection(self, name, dict(docs))
+
+    def collection(self, name) -> FakeCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = FakeCollection(self, name, {})
+            return self._collections[name]
+
+    def batch(self) -> FakeBatch:
+        return FakeBatch()
+
+    def bulk_writer(self, options=None) -> FakeBulkWriter:
+        return FakeBulkWriter(self)
+
+
+# === DATASETS ===
+SCALES = {
+    "small":  (1_000, 100),
+    "medium": (10_000, 1_000),
+    "large":  (100_000, 10_000),
+}
+
+
+# Dates in the synthetic data are spread around this day (see synthetic_dataset)
+DATASET_START = date(2025, 6, 1)
+
+
+def synthetic_dataset(n_parts, n_specs, bom_lines=10, suppliers_per_part=2, seed=0, start=DATASET_START) -> dict:
+    """
+    {collection: {doc_id: document}} shaped like the uploaded data
+    (id fields stripped, supply keyed "<supplier_id>_<part_id>").
+    Orders are placed up to 150 days before `start`; deliveries and sales requests
+    fall in the 110 days after it, inside the default MRP horizon from `start`.
+    """
+    rng = random.Random(seed)
+
+    def day(low, high) -> str:
+        return (start + timedelta(days=rng.randint(low, high))).isoformat()
+
+    part_ids = [f"P{i}" for i in range(n_parts)]
+    models = [(f"S{m}", f"V{v}") for m in range(1, 6) for v in range(1, 4)]
+
+    parts = {
+        part_id: {
+            'min_stock': rng.randint(1, 100),
+            'reorder_quantity': rng.randint(10, 200),
+            'reorder_interval_days': rng.randint(7, 30),
+            'part_name': f"Part {part_id}",
+            'part_type': rng.choice(['component', 'assembly', 'raw']),
+            'used_in_models': [f"{m}_{v}" for m, v in rng.sample(models, 2)],
+            'location': f"WH{rng.randint(1, 3)}",
+            'quantity': rng.randint(0, 200),
+            'blocked': rng.random() < 0.02,
+            'comments': "",
+            'successor_part': None,
+        }
+        for part_id in part_ids
+    }
+
+    supply = {}
+    for part_id in part_ids:
+        for supplier in rng.sample(["SupA", "SupB", "SupC", "SupD"], suppliers_per_part):
+            supply[f"{supplier}_{part_id}"] = {
+                'price_per_unit': round(rng.uniform(1, 200), 2),
+                'lead_time_days': rng.randint(2, 30),
+                'min_order_qty': rng.randint(1, 50),
+                'reliability_rating': round(rng.uniform(0.7, 1.0), 2),
+            }
+
+    statuses = ['ordered', 'delivered', 'delayed']
+    orders = {
+        f"O{i}": {
+            'part_id': rng.choice(part_ids),
+            'quantity_ordered': rng.randint(10, 100),
+            'order_date': day(-150, 0),
+            'expected_delivery_date': day(0, 110),
+            'supplier_id': rng.choice(["SupA", "SupB", "SupC", "SupD"]),
+            'status': rng.choice(statuses),
+            'actual_delivered_at': None,
+        }
+        for i in range(max(n_parts // 10, 1))
+    }
+
+    sales = {}
+    for i in range(max(n_parts // 20, 1)):
+        model, version = rng.choice(models)
+        sales[f"S{i}"] = {
+            'model': model,
+            'version': version,
+            'quantity': rng.randint(1, 20),
+            'order_type': rng.choice(['webshop', 'dealer']),
+            'requested_date': day(0, 110),
+            'created_at': day(-150, -1),
+            'accepted_request_date': day(-150, -1),
+        }
+
+    # the first specs are the ones sales orders are built from (see bom.spec_for_sale)
+    spec_names = [f"scanned_{m}_{v}_specs" for m, v in models][:n_specs]
+    spec_names += [f"spec_{s}" for s in range(len(spec_names), n_specs)]
+    specs = {
+        spec_name: {
+            'bill of materials': [
+                {'Part_ID': rng.choice(part_ids), 'Part_Name': "", 'Qty': rng.randint(1, 4), 'Notes': ""}
+                for _ in range(bom_lines)
+            ],
+        }
+        for spec_name in spec_names
+    }
+
+    return {'parts': parts, 'supply': supply, 'orders': orders, 'sales': sales, 'specs': specs}
+
+
+# === LLM ===
+# question -> one list of (tool, args) per model turn; the reply after the last turn ends the run.
+# Only tools that answer from local data are scripted, so nothing here calls OpenAI.
+DEFAULT_SCRIPTS = {
+    "Which parts are low on stock?": [
+        [("check_low_stocks", {"__arg1": ""})],
+    ],
+    "What orders are pending and are there any inventory alerts?": [
+        [("check_pending_orders", {"__arg1": ""}), ("inventory_alerts", {"__arg1": ""})],
+    ],
+    "Who supplies P1 and P2?": [
+        [("find_supplier_for_part", {"__arg1": "P1"}), ("find_supplier_for_part", {"__arg1": "P2"})],
+    ],
+    "Give me a full status report.": [
+        [("check_low_stocks", {"__arg1": ""}), ("check_pending_orders", {"__arg1": ""})],
+        [("inventory_alerts", {"__arg1": ""})],
+    ],
+}
+
+
+class FakeToolChatModel(BaseChatModel):
+    """
+    Chat model that replays scripted tool calls instead of calling OpenAI.
+
+    The script is picked by the latest user message; which turn of it to play is
+    the number of tool rounds already answered since that message. Every call
+    sleeps `latency` seconds (plus `latency_per_1k_chars` of prompt) so agent
+    overhead can be measured against a realistic model round trip.
+    """
+
+    scripts: dict = {}
+    latency: float = 0.0
+    latency_per_1k_chars: float = 0.0
+    answer: str = "Done."
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-tool-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _script_turn(self, messages):
+        question, rounds = None, 0
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                question = message.content
+                break
+            if isinstance(message, AIMessage) and message.tool_calls:
+                rounds += 1
+        script = self.scripts.get(question, [])
+        return rounds, (script[rounds] if rounds < len(script) else None)
+
+    def _generate(self, messages, stop: Optional[list] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        prompt_chars = sum(len(str(m.content)) for m in messages)
+        time.sleep(self.latency + self.latency_per_1k_chars * prompt_chars / 1000)
+
+        rounds, turn = self._script_turn(messages)
+        if turn is None:
+            tool_results = sum(isinstance(m, ToolMessage) for m in messages)
+            message = AIMessage(content=f"{self.answer} ({tool_results} tool results)")
+        else:
+            message = AIMessage(content="", tool_calls=[
+                {"name": name, "args": args, "id": f"call_{rounds}_{i}"} for i, (name, args) in enumerate(turn)
+            ])
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,52 @@
+import asyncio
+import queue
+import threading
+
+_lock = threading.Lock()
+_loop = None
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error) -> None:
+        self.error = error
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """One background event loop per process; all async LLM work is multiplexed on it."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="hugo-async", daemon=True).start()
+        return _loop
+
+
+def iterate_in_loop(make_agen):
+    """
+    Run the async generator returned by `make_agen()` on the shared loop and
+    yield its items to synchronous code (e.g. a Flask streaming response).
+    Closing the returned generator cancels the async work.
+    """
+    items = queue.Queue()
+
+    async def pump():
+        try:
+            async for item in make_agen():
+                items.put(item)
+        except Exception as e:
+            items.put(_Failure(e))
+        finally:
+            items.put(_DONE)
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_loop())
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        future.cancel()
@@ -0,0 +1,60 @@
+# stock_status is quantity as a % of min_stock (see graph.create_summary_table)
+DEFAULT_THRESHOLDS = {
+    "critical_stock_pct": 50,     # below this: critical
+    "low_stock_pct": 100,         # below this: low
+    "high_usage_count": 3,        # used in at least this many specs ...
+    "high_usage_buffer_pct": 150, # ... and stock below this % counts as a high-usage risk
+}
+
+NO_ALERTS = {"status": "No alerts found"}
+
+
+def compute_alerts(table, thresholds=None) -> dict:
+    """
+    Flag blocked, low-stock and high-usage parts from the parts summary table (a DataFrame).
+    Returns {part_id: reason} in table order (most severe first), or NO_ALERTS.
+    """
+    # numpy/pandas are imported here so the API can use parse_thresholds without loading them
+    import numpy as np
+    import pandas as pd
+
+    limits = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    if table is None or table.empty:
+        return dict(NO_ALERTS)
+
+    blocked = table['blocked'].fillna(False).astype(bool).to_numpy()
+    pct = table['stock_status'].astype(float).to_numpy()
+    usage = table['usage_count'].fillna(0).to_numpy()
+
+    critical = ~blocked & (pct < limits["critical_stock_pct"])
+    low = ~blocked & ~critical & (pct < limits["low_stock_pct"])
+    high_usage = (usage >= limits["high_usage_count"]) & (pct < limits["high_usage_buffer_pct"])
+
+    flagged = blocked | critical | low | high_usage
+    if not flagged.any():
+        return dict(NO_ALERTS)
+
+    rows = table[flagged]
+    blocked, critical, low, high_usage = blocked[flagged], critical[flagged], low[flagged], high_usage[flagged]
+
+    comments = rows['comments'].fillna('').astype(str)
+    stock = (rows['quantity'].astype(str) + " of min " + rows['min_stock'].astype(str)
+             + " (" + rows['stock_status'].round(0).astype(str).str.replace(r'\.0$', '', regex=True) + "%)")
+
+    reasons = [
+        np.where(blocked, np.where(comments != '', "Blocked: " + comments, "Blocked"), ''),
+        np.where(critical, "Critical stock: " + stock, ''),
+        np.where(low, "Low stock: " + stock, ''),
+        np.where(high_usage, "High usage: in " + rows['usage_count'].astype(str) + " specs", ''),
+    ]
+    text = pd.Series(reasons[0], index=rows.index)
+    for part in reasons[1:]:
+        text = text + "; " + part
+    text = text.str.replace(r'(; )+', '; ', regex=True).str.strip('; ')
+
+    return dict(zip(rows['part_id'], text))
+
+
+def parse_thresholds(values) -> dict:
+    """Pick numeric threshold overrides out of a mapping such as request.args."""
+    return {name: float(values[name]) for name in DEFAULT_THRESHOLDS if values.get(name) not in (None, '')}
@@ -0,0 +1,84 @@
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+MAX_ANSWERS = 512
+# Cosine similarity above which two questions count as the same (embedding mode only)
+SIMILARITY_THRESHOLD = 0.92
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """'  Which parts are LOW?? ' -> 'which parts are low'"""
+    return _SPACES.sub(" ", _PUNCTUATION.sub(" ", query.lower())).strip()
+
+
+class AnswerCache:
+    """
+    LRU cache of chat answers keyed on the normalised question.
+
+    Every answer is tied to the data version it was computed from; as soon as a
+    lookup or store arrives with a newer version the whole cache is dropped, so
+    an answer never outlives the data behind it. With an `embedder`
+    (texts -> unit vectors) near-identical wordings also hit.
+    """
+
+    def __init__(self, max_entries=MAX_ANSWERS, embedder=None, threshold=SIMILARITY_THRESHOLD) -> None:
+        self.max_entries = max_entries
+        self.embedder = embedder
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._version = None
+        self._answers = OrderedDict()  # normalised query -> (answer, vector)
+        self._lock = threading.Lock()
+
+    def _check_version(self, version) -> None:
+        if version != self._version:
+            self._answers.clear()
+            self._version = version
+
+    def _embed(self, key):
+        if self.embedder is None:
+            return None
+        return np.asarray(self.embedder([key]))[0]
+
+    def get(self, query: str, version):
+        key = normalize_query(query)
+        vector = self._embed(key) if self.embedder is not None else None
+        with self._lock:
+            self._check_version(version)
+            if key in self._answers:
+                self._answers.move_to_end(key)
+                self.hits += 1
+                return self._answers[key][0]
+
+            if vector is not None and self._answers:
+                keys = list(self._answers)
+                vectors = np.stack([self._answers[k][1] for k in keys])
+                scores = vectors @ vector
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self._answers.move_to_end(keys[best])
+                    self.hits += 1
+                    return self._answers[keys[best]][0]
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, version, answer: str) -> None:
+        key = normalize_query(query)
+        vector = self._embed(key)
+        with self._lock:
+            self._check_version(version)
+            self._answers[key] = (answer, vector)
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.max_entries:
+                self._answers.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._answers)}
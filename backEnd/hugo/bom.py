@@ -0,0 +1,171 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+def spec_for_sale(model, version) -> str:
+    """Spec document that a sales order for `model`/`version` is built from."""
+    return f"scanned_{model}_{version}_specs"
+
+
+def demand_from_sales(sales) -> dict:
+    """{spec_name: units ordered} summed over Sales objects."""
+    demand = {}
+    for sale in sales:
+        if sale.model is None or sale.version is None or not sale.quantity:
+            continue
+        spec = spec_for_sale(sale.model, sale.version)
+        demand[spec] = demand.get(spec, 0) + sale.quantity
+    return demand
+
+
+def _bom_items(spec):
+    """(Part_ID, Qty) pairs of a spec document with a positive quantity."""
+    for item in spec.get('bill of materials') or []:
+        try:
+            qty = float(item.get('Qty'))
+        except (TypeError, ValueError):
+            continue
+        if item.get('Part_ID') is not None and qty > 0:
+            yield item['Part_ID'], qty
+
+
+class BomMatrix:
+    """
+    Bill of materials as a sparse specs x parts quantity matrix in CSR form
+    (`indptr`, `indices`, `data`), with spec/part id <-> index maps.
+
+    Row r holds spec `spec_ids[r]`: its parts are `indices[indptr[r]:indptr[r + 1]]`
+    with the quantities in `data`. Specs and parts keep their index for the life of
+    the matrix: a removed spec becomes an empty row and new ids are appended, so
+    `on_change` can patch a single row without rebuilding the rest.
+    """
+
+    def __init__(self) -> None:
+        self.spec_ids = []
+        self.part_ids = []
+        self.spec_index = {}
+        self.part_index = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int64)
+        self.data = np.zeros(0, dtype=float)
+        self.version = 0
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_specs(cls, specs_data) -> "BomMatrix":
+        """Build the whole matrix at once from spec documents (dicts with 'spec_name')."""
+        bom = cls()
+        lines = [(spec['spec_name'], part_id, qty) for spec in specs_data for part_id, qty in _bom_items(spec)]
+        spec_names = [spec['spec_name'] for spec in specs_data]
+        bom.spec_ids = list(dict.fromkeys(spec_names))
+        bom.spec_index = {name: row for row, name in enumerate(bom.spec_ids)}
+        if not lines:
+            bom.indptr = np.zeros(len(bom.spec_ids) + 1, dtype=np.int64)
+            return bom
+
+        frame = pd.DataFrame(lines, columns=['spec_name', 'Part_ID', 'Qty'])
+        part_codes, part_ids = pd.factorize(frame['Part_ID'])
+        bom.part_ids = list(part_ids)
+        bom.part_index = {part_id: col for col, part_id in enumerate(bom.part_ids)}
+        frame['row'] = frame['spec_name'].map(bom.spec_index).to_numpy()
+        frame['col'] = part_codes
+        # a part listed twice in one spec is one entry with the summed quantity
+        entries = frame.groupby(['row', 'col'], sort=True)['Qty'].sum()
+
+        rows = entries.index.get_level_values('row').to_numpy()
+        bom.indices = entries.index.get_level_values('col').to_numpy().astype(np.int64)
+        bom.data = entries.to_numpy(dtype=float)
+        bom.indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(bom.spec_ids)))])
+        return bom
+
+    @property
+    def shape(self):
+        return len(self.spec_ids), len(self.part_ids)
+
+    def row_of_entries(self) -> np.ndarray:
+        """Row number of every stored entry (aligned with `indices` and `data`)."""
+        return np.repeat(np.arange(len(self.spec_ids)), np.diff(self.indptr))
+
+    def matrix(self):
+        """The same matrix as a scipy.sparse csr_matrix (needs scipy)."""
+        from scipy.sparse import csr_matrix
+        with self._lock:
+            return csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+    # === INCREMENTAL UPDATES ===
+    def _part_col(self, part_id) -> int:
+        col = self.part_index.get(part_id)
+        if col is None:
+            col = self.part_index[part_id] = len(self.part_ids)
+            self.part_ids.append(part_id)
+        return col
+
+    def set_spec(self, spec_name, spec) -> None:
+        """Replace one spec's row (adding the spec if new); `spec` None empties the row."""
+        with self._lock:
+            totals = {}
+            for part_id, qty in _bom_items(spec or {}):
+                col = self._part_col(part_id)
+                totals[col] = totals.get(col, 0) + qty
+            cols = np.array(sorted(totals), dtype=np.int64)
+            values = np.array([totals[c] for c in cols], dtype=float)
+
+            row = self.spec_index.get(spec_name)
+            if row is None:
+                if spec is None:
+                    return
+                row = self.spec_index[spec_name] = len(self.spec_ids)
+                self.spec_ids.append(spec_name)
+                self.indptr = np.append(self.indptr, self.indptr[-1])
+
+            start, end = self.indptr[row], self.indptr[row + 1]
+            self.indices = np.concatenate([self.indices[:start], cols, self.indices[end:]])
+            self.data = np.concatenate([self.data[:start], values, self.data[end:]])
+            self.indptr[row + 1:] += len(cols) - (end - start)
+            self.version += 1
+
+    def on_change(self, collection, doc_id, old, new) -> None:
+        """LiveStore listener: keep the matrix in step with the specs collection."""
+        if collection == 'specs':
+            self.set_spec(doc_id, new)
+
+    # === QUERIES ===
+    def demand_vector(self, demand: dict) -> np.ndarray:
+        """Units per row for {spec_name: units}; specs not in the matrix are ignored."""
+        vector = np.zeros(len(self.spec_ids))
+        for spec, units in demand.items():
+            row = self.spec_index.get(spec)
+            if row is not None:
+                vector[row] += units
+        return vector
+
+    def stock_vector(self, stock: pd.Series) -> np.ndarray:
+        """Stock per column from a part_id-indexed Series; unknown parts have none."""
+        return stock.reindex(self.part_ids).fillna(0).to_numpy(dtype=float)
+
+    def requirements(self, demand: dict) -> pd.Series:
+        """
+        Part quantities needed to build `demand` ({spec_name: units}), i.e. demand^T * BOM,
+        as one vectorised sparse product. Indexed by part_id, only parts actually needed.
+        """
+        with self._lock:
+            units = self.demand_vector(demand)
+            per_entry = self.data * np.repeat(units, np.diff(self.indptr))
+            needed = np.bincount(self.indices, weights=per_entry, minlength=len(self.part_ids))
+            part_ids = np.asarray(self.part_ids, dtype=object)
+        mask = needed > 0
+        return pd.Series(needed[mask], index=part_ids[mask], name='required')
+
+
+def requirements_table(bom: BomMatrix, demand: dict, stock: pd.Series) -> pd.DataFrame:
+    """Required quantity, usable stock and shortage per part for `demand`, largest shortage first."""
+    required = bom.requirements(demand)
+    table = pd.DataFrame({
+        'part_id': required.index,
+        'required': required.to_numpy(),
+        'stock': stock.reindex(required.index).fillna(0).to_numpy(dtype=float),
+    })
+    table['shortage'] = (table['required'] - table['stock']).clip(lower=0)
+    return table.sort_values(['shortage', 'required'], ascending=False, kind='stable').reset_index(drop=True)
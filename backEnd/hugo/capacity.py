@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+# Columns of the per-spec capacity table
+CAPACITY_COLUMNS = ['spec_name', 'units', 'bottleneck_part', 'bottleneck_qty', 'bottleneck_stock']
+
+
+def usable_stock(summary_table: pd.DataFrame) -> pd.Series:
+    """part_id -> quantity that can go into production (blocked parts count as 0)."""
+    quantity = pd.to_numeric(summary_table['quantity'], errors='coerce').fillna(0).clip(lower=0)
+    blocked = summary_table['blocked'].fillna(False).astype(bool)
+    return pd.Series(np.where(blocked, 0, quantity), index=summary_table['part_id'].to_numpy())
+
+
+def _entry_units(bom, available) -> np.ndarray:
+    """floor(stock / qty) for every BOM entry: how many units that one line alone allows."""
+    return np.floor(available[bom.indices] / bom.data)
+
+
+def spec_capacity(bom, stock: pd.Series) -> pd.DataFrame:
+    """
+    Units of each spec in `bom` (a BomMatrix) buildable from `stock` on its own (specs not
+    competing for parts), i.e. min over its row of floor(stock / qty), and the part that
+    sets that limit. Specs without BOM lines are left out. Sorted by units, fewest first.
+    """
+    with bom._lock:
+        if not len(bom.data):
+            return pd.DataFrame(columns=CAPACITY_COLUMNS)
+        available = bom.stock_vector(stock)
+        units = _entry_units(bom, available)
+        rows = bom.row_of_entries()
+        filled = np.flatnonzero(np.diff(bom.indptr))
+
+        # per-row minimum, then the first entry of each row that reaches it
+        row_min = np.minimum.reduceat(units, bom.indptr[filled])
+        at_min = np.flatnonzero(units == np.repeat(row_min, np.diff(bom.indptr)[filled]))
+        first = at_min[np.r_[True, rows[at_min][1:] != rows[at_min][:-1]]]
+
+        table = pd.DataFrame({
+            'spec_name': np.asarray(bom.spec_ids, dtype=object)[filled],
+            'units': row_min.astype(int),
+            'bottleneck_part': np.asarray(bom.part_ids, dtype=object)[bom.indices[first]],
+            'bottleneck_qty': bom.data[first],
+            'bottleneck_stock': available[bom.indices[first]],
+        })
+    return table.sort_values(['units', 'spec_name'], kind='stable').reset_index(drop=True)
+
+
+def _greedy_fill(x, caps, weights, qty, spec_of, part_of, starts, remaining) -> np.ndarray:
+    """Top up allocation `x` spec by spec, cheapest (per unit of scarce stock) and most valuable first."""
+    scarcity = qty / np.maximum(remaining[part_of], 1)
+    cost = np.bincount(spec_of, weights=scarcity, minlength=len(caps))
+    order = np.lexsort((cost, -weights))
+    for s in order:
+        lo, hi = starts[s], starts[s + 1]
+        if x[s] >= caps[s] or lo == hi:
+            continue
+        parts = part_of[lo:hi]
+        extra = min(caps[s] - x[s], np.floor(remaining[parts] / qty[lo:hi]).min())
+        if extra > 0:
+            x[s] += extra
+            remaining[parts] -= extra * qty[lo:hi]
+    return x
+
+
+def production_mix(bom, stock: pd.Series, weights=None, max_units=None) -> dict:
+    """
+    Jointly allocate shared stock across the specs of `bom` (a BomMatrix): maximise
+    sum(weight * units) subject to every part's usage staying within its stock.
+    `weights` and `max_units` are {spec: value} (default weight 1, no cap). Solved as an LP
+    with scipy when available and rounded down, then greedily topped up with what the
+    rounding left over; without scipy greedy only.
+    Returns {"method", "total_units", "mix": {spec: units > 0}}.
+    """
+    with bom._lock:
+        if not len(bom.data):
+            return {"method": "none", "total_units": 0, "mix": {}}
+        specs = pd.Series(bom.spec_ids, dtype=object)
+        qty, part_of, starts = bom.data.copy(), bom.indices.copy(), bom.indptr.copy()
+        spec_of = bom.row_of_entries()
+        available = bom.stock_vector(stock)
+        n_specs, n_parts = bom.shape
+
+    w = specs.map(weights or {}).fillna(1.0).to_numpy(dtype=float)
+    caps = np.full(n_specs, np.inf)
+    np.minimum.at(caps, spec_of, np.floor(available[part_of] / qty))
+    # specs without BOM lines are not produced
+    caps[np.diff(starts) == 0] = 0
+    if max_units:
+        caps = np.minimum(caps, specs.map(max_units).fillna(np.inf).to_numpy(dtype=float))
+
+    x = np.zeros(n_specs)
+    method = "greedy"
+    try:
+        from scipy.optimize import linprog
+        from scipy.sparse import csr_matrix
+    except ImportError:
+        linprog = None
+    if linprog is not None:
+        # parts x specs: the transpose of the BOM matrix
+        usage = csr_matrix((qty, part_of, starts), shape=(n_specs, n_parts)).T
+        result = linprog(-w, A_ub=usage, b_ub=available, bounds=np.column_stack([np.zeros(n_specs), caps]),
+                         method="highs")
+        if result.status == 0:
+            x = np.floor(result.x + 1e-9)
+            method = "lp"
+
+    remaining = available - np.bincount(part_of, weights=qty * x[spec_of], minlength=n_parts)
+    x = _greedy_fill(x, caps, w, qty, spec_of, part_of, starts, remaining)
+
+    mix = {spec: int(units) for spec, units in zip(specs, x) if units > 0}
+    return {"method": method, "total_units": int(x.sum()), "mix": mix}
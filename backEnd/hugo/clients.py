@@ -0,0 +1,77 @@
+import os
+import threading
+
+import httpx
+import openai
+
+# Connection pool and retry settings shared by every OpenAI call in the process
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 20))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", 10))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", 60))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", 60))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", 5))
+# openai retries 408/409/429/5xx and connection errors with exponential backoff
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 3))
+
+_lock = threading.Lock()
+_http_client = None
+_async_http_client = None
+_client = None
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+
+def get_http_client() -> httpx.Client:
+    """The one keep-alive HTTP pool used for OpenAI traffic."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(limits=_limits(), timeout=_timeout())
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Async counterpart of the pool, used by streaming chat on the shared event loop (see aio.py)."""
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+        return _async_http_client
+
+
+def get_openai_client() -> openai.OpenAI:
+    """Process-wide OpenAI client on the shared pool (reads OPENAI_API_KEY on first use)."""
+    global _client
+    http_client = get_http_client()
+    with _lock:
+        if _client is None:
+            _client = openai.OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=http_client,
+                timeout=_timeout(),
+                max_retries=OPENAI_MAX_RETRIES,
+            )
+        return _client
+
+
+def get_chat_llm(model: str, **kwargs):
+    """LangChain chat model that sends its requests through the same pool."""
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model=model,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        timeout=OPENAI_TIMEOUT,
+        max_retries=OPENAI_MAX_RETRIES,
+        **kwargs,
+    )
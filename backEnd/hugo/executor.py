@@ -0,0 +1,66 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction
+
+# Upper bound on tool calls running at once, shared by every chat in the process
+TOOL_WORKERS = int(os.getenv("HUGO_TOOL_WORKERS", 4))
+
+_pool = None
+_pool_lock = threading.Lock()
+_turns = threading.local()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="hugo-tool")
+        return _pool
+
+
+class _Turn:
+    def __init__(self) -> None:
+        self.actions = []
+        self.futures = None
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor that runs the independent tool calls of one model turn concurrently.
+
+    The base class yields every AgentAction of a turn before it performs the first
+    one, so when the first observation is requested the whole batch is known: all
+    of it is submitted to a bounded pool at once and the observations are handed
+    back in the order the model asked for them. The async path (astream_events)
+    already gathers a turn's tool calls, so only the sync path needs this.
+    """
+
+    def _iter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        previous = getattr(_turns, "current", None)
+        turn = _turns.current = _Turn()
+        try:
+            for item in super()._iter_next_step(
+                name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager
+            ):
+                if isinstance(item, AgentAction):
+                    turn.actions.append(item)
+                yield item
+        finally:
+            _turns.current = previous
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        perform = super()._perform_agent_action
+        turn = getattr(_turns, "current", None)
+        if turn is None or len(turn.actions) < 2:
+            return perform(name_to_tool_map, color_mapping, agent_action, run_manager)
+
+        if turn.futures is None:
+            pool = _get_pool()
+            turn.futures = {
+                id(action): pool.submit(perform, name_to_tool_map, color_mapping, action, run_manager)
+                for action in turn.actions
+            }
+        return turn.futures[id(agent_action)].result()
@@ -1,25 +1,29 @@
+import io
 import json
+import hashlib
+import threading
 import networkx as nx
 from networkx.readwrite import json_graph
-import matplotlib.pyplot as plt
 import pandas as pd
 import numpy as np
-from collections import defaultdict
-from upload_data import initialize_firebase, upload_specs
 
-def create_graph(db):
-  
+# Rendered PNGs keyed by (kind, dpi, data version or fingerprint); re-rendering only happens when the data changes
+_render_cache = {}
+_render_lock = threading.Lock()
+RENDER_CACHE_SIZE = 8
+
+def load_graph_data(db):
+  """Stream the parts and specs collections into plain dicts."""
   parts_ref = db.collection("parts").stream()
   specs_ref = db.collection("specs").stream()
-  
+
   data = []
   for doc in parts_ref:
     doc_dict = doc.to_dict()
     doc_dict['part_id'] = doc.id  # Add the document ID into the dictionary
     data.append(doc_dict)
   parts_data = data
-  # print(parts_json_data)
-  
+
   data = []
   for doc in specs_ref:
     doc_dict = doc.to_dict()
@@ -27,6 +31,18 @@ def create_graph(db):
     data.append(doc_dict)
   specs_data = data
 
+  return parts_data, specs_data
+
+def _stock_status(part_info):
+  current_stock = part_info.get('quantity', 0)
+  min_stock = part_info.get('min_stock', 0)
+  if min_stock > 0:
+    return (current_stock / min_stock) * 100
+  return 100
+
+# === ANALYTICS (no plotting) ===
+def build_spec_graph(parts_data, specs_data):
+  """Spec-part relationship graph with stock attributes on every edge."""
   # Convert parts data to a dictionary for easy lookup
   parts_dict = {part['part_id']: part for part in parts_data}
 
@@ -39,222 +55,254 @@ def create_graph(db):
 
   for spec in specs_data:
       spec_name = spec['spec_name']
-      
+
       for part_item in spec['bill of materials']:
           part_id = part_item['Part_ID']
-          qty_needed = part_item['Qty']
-          
+
           if part_id in parts_dict:
               part_info = parts_dict[part_id]
-              current_stock = part_info.get('quantity', 0)
-              min_stock = part_info.get('min_stock', 0)
-              blocked = part_info.get('blocked', False)
-              
-              if min_stock > 0:
-                  stock_status = (current_stock / min_stock) * 100
-              else:
-                  stock_status = 100 
-              
-              G.add_edge(part_id, spec_name, 
-                        qty_needed=qty_needed,
-                        current_stock=current_stock,
-                        min_stock=min_stock,
-                        stock_status=stock_status,
-                        blocked=blocked)
-
-  # Function to get edge color based on stock status
-  def get_edge_color(stock_status, blocked):
-      if blocked:
-          return 'red'
-      elif stock_status < 50:
-          return 'orange'
-      elif stock_status < 100:
-          return 'yellow'
-      else:
-          return 'green'
-
-  # Function to get edge width based on quantity needed
-  def get_edge_width(qty):
-      return 0.5 + (qty / 5) 
+              G.add_edge(part_id, spec_name,
+                        qty_needed=part_item['Qty'],
+                        current_stock=part_info.get('quantity', 0),
+                        min_stock=part_info.get('min_stock', 0),
+                        stock_status=_stock_status(part_info),
+                        blocked=part_info.get('blocked', False))
+  return G
+
+# Status categories in sort order; the first matching condition wins
+STATUS_CATEGORIES = ['Blocked', 'Critical', 'Good', 'Low']
+SUMMARY_COLUMNS = ['part_id', 'part_name', 'quantity', 'min_stock',
+                   'stock_status', 'status_category', 'usage_count',
+                   'blocked', 'comments']
+
+def bom_frame(specs_data):
+  """Exploded bill of materials: one row per (spec_name, Part_ID, Qty) line."""
+  specs_df = pd.DataFrame(specs_data, columns=['spec_name', 'bill of materials'])
+  lines = specs_df.explode('bill of materials').dropna(subset=['bill of materials'])
+  bom_df = pd.DataFrame(lines['bill of materials'].tolist(), columns=['Part_ID', 'Qty'])
+  bom_df.insert(0, 'spec_name', lines['spec_name'].to_numpy())
+  return bom_df
+
+def create_summary_table(parts_data, specs_data):
+  """Per-part stock status, status category and BOM usage count, as one columnar frame."""
+  parts_df = pd.DataFrame(parts_data)
+
+  # Calculate stock status percentage
+  parts_df['stock_status'] = (parts_df['quantity'] / parts_df['min_stock']) * 100
+
+  # Add a status category column
+  blocked = parts_df['blocked'].fillna(False).astype(bool).to_numpy()
+  stock_status = parts_df['stock_status'].to_numpy()
+  category = np.select([blocked, stock_status < 50, stock_status < 100],
+                       ['Blocked', 'Critical', 'Low'], default='Good')
+  parts_df['status_category'] = pd.Categorical(category, categories=STATUS_CATEGORIES, ordered=True)
+
+  part_usage = bom_frame(specs_data)['Part_ID'].value_counts()
+  parts_df['usage_count'] = parts_df['part_id'].map(part_usage).fillna(0).astype(int)
+
+  parts_df_sorted = parts_df.sort_values(['status_category', 'usage_count'],
+                                        ascending=[True, False])
+  return parts_df_sorted[SUMMARY_COLUMNS]
+
+def create_critical_parts_graph(parts_data, specs_data):
+  """Subgraph of blocked / below-minimum parts and the specs that use them, or None."""
+  parts_dict = {part['part_id']: part for part in parts_data}
+  critical_parts = {part['part_id'] for part in parts_data if part['blocked'] or (part['quantity'] < part['min_stock'])}
+
+  if not critical_parts:
+      return None
+
+  # Create a new graph for critical parts
+  H = nx.DiGraph()
+
+  # Find which specs use these critical parts
+  for spec in specs_data:
+      spec_name = spec['spec_name']
+
+      for part_item in spec['bill of materials']:
+          part_id = part_item['Part_ID']
+          if part_id in critical_parts:
+              # Add nodes if they don't exist yet
+              if spec_name not in H:
+                  H.add_node(spec_name, node_type='spec')
+              if part_id not in H:
+                  H.add_node(part_id, node_type='part')
+
+              # Add edge with attributes
+              part_info = parts_dict[part_id]
+              H.add_edge(spec_name, part_id,
+                        qty_needed=part_item['Qty'],
+                        current_stock=part_info.get('quantity', 0),
+                        min_stock=part_info.get('min_stock', 0),
+                        stock_status=_stock_status(part_info),
+                        blocked=part_info.get('blocked', False))
+
+  if len(H) == 0:  # If no nodes in subgraph
+      return None
+
+  return H
+
+def analyze(parts_data, specs_data):
+  """Headless analytics: summary table plus the critical-parts subgraph."""
+  return {
+    "summary_table": create_summary_table(parts_data, specs_data),
+    "critical_graph": create_critical_parts_graph(parts_data, specs_data),
+  }
+
+# === RENDERING (on demand) ===
+# Function to get edge color based on stock status
+def get_edge_color(stock_status, blocked):
+    if blocked:
+        return 'red'
+    elif stock_status < 50:
+        return 'orange'
+    elif stock_status < 100:
+        return 'yellow'
+    else:
+        return 'green'
+
+# Function to get edge width based on quantity needed
+def get_edge_width(qty):
+    return 0.5 + (qty / 5)
+
+def _legend_handles(entries):
+  from matplotlib.lines import Line2D
+  handles = []
+  for kind, color, label in entries:
+    if kind == 'node':
+      handles.append(Line2D([0], [0], marker='o', color='w', markerfacecolor=color, markersize=10, label=label))
+    else:
+      handles.append(Line2D([0], [0], color=color, lw=2, label=label))
+  return handles
+
+def _draw_spec_graph(G):
+  from matplotlib.figure import Figure
 
   # Extract node types for coloring
   node_types = nx.get_node_attributes(G, 'node_type')
   colors = ['skyblue' if node_types[node] == 'spec' else 'lightgreen' for node in G.nodes()]
   pos = nx.spring_layout(G, k=0.5, iterations=50)
 
+  fig = Figure(figsize=(14, 10))
+  ax = fig.add_subplot()
+  nx.draw_networkx_nodes(G, pos, node_size=590, node_color=colors, alpha=0.75, ax=ax)
 
-  plt.figure(figsize=(14, 10))
-  nx.draw_networkx_nodes(G, pos, node_size=590, node_color=colors, alpha=0.75)
-
-  # Draw edges with colors based on stock status and width based on quantity
-  for (u, v, data) in G.edges(data=True):
-      color = get_edge_color(data.get('stock_status', 100), data.get('blocked', False))
-      width = get_edge_width(data.get('qty_needed', 1))
-      nx.draw_networkx_edges(G, pos, edgelist=[(u, v)], width=width, 
-                            edge_color=color, alpha=0.7, arrows=True, arrowsize=15)
+  # One draw call for all edges, colored by stock status and sized by quantity needed
+  edges = list(G.edges(data=True))
+  nx.draw_networkx_edges(G, pos, edgelist=[(u, v) for u, v, _ in edges],
+                        width=[get_edge_width(d.get('qty_needed', 1)) for _, _, d in edges],
+                        edge_color=[get_edge_color(d.get('stock_status', 100), d.get('blocked', False)) for _, _, d in edges],
+                        alpha=0.7, arrows=True, arrowsize=15, ax=ax)
 
   # Draw labels
-  nx.draw_networkx_labels(G, pos, font_size=8)
-  
-  data_G = json_graph.node_link_data(G)
-  
-  # with open("basic.json", "w") as f:
-  #   json.dump(data_G, f, indent=2)
+  nx.draw_networkx_labels(G, pos, font_size=8, ax=ax)
 
   # Add legends
-  spec_patch = plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='skyblue', 
-                        markersize=10, label='Spec')
-  part_patch = plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='lightgreen', 
-                        markersize=10, label='Part')
-  red_line = plt.Line2D([0], [0], color='red', lw=2, label='Blocked')
-  orange_line = plt.Line2D([0], [0], color='orange', lw=2, label='Low Stock (<50%)')
-  yellow_line = plt.Line2D([0], [0], color='yellow', lw=2, label='Medium Stock (<100%)')
-  green_line = plt.Line2D([0], [0], color='green', lw=2, label='Good Stock')
-
-  plt.legend(handles=[spec_patch, part_patch, red_line, orange_line, yellow_line, green_line], 
+  ax.legend(handles=_legend_handles([('node', 'skyblue', 'Spec'), ('node', 'lightgreen', 'Part'),
+                                     ('line', 'red', 'Blocked'), ('line', 'orange', 'Low Stock (<50%)'),
+                                     ('line', 'yellow', 'Medium Stock (<100%)'), ('line', 'green', 'Good Stock')]),
             loc='upper left', bbox_to_anchor=(1, 1))
 
-  plt.title('Spec-Part Relationship Graph with Stock Status', fontsize=15)
-  plt.tight_layout()
-  plt.axis('off')
-  plt.savefig('specs_parts_graph.png', dpi=300, bbox_inches='tight')
-  # plt.show()
-
-  # Create a data summary table for analysis
-  def create_summary_table():
-      parts_df = pd.DataFrame(parts_data)
-      
-      # Calculate stock status percentage
-      parts_df['stock_status'] = (parts_df['quantity'] / parts_df['min_stock']) * 100
-      
-      # Add a status category column
-      def get_status_category(row):
-          if row['blocked']:
-              return 'Blocked'
-          elif row['stock_status'] < 50:
-              return 'Critical'
-          elif row['stock_status'] < 100:
-              return 'Low'
-          else:
-              return 'Good'
-      
-      parts_df['status_category'] = parts_df.apply(get_status_category, axis=1)
-      
-      part_usage = defaultdict(int)
-      for spec in specs_data:
-          for part_item in spec['bill of materials']:
-              part_usage[part_item['Part_ID']] += 1
-      
-      parts_df['usage_count'] = parts_df['part_id'].map(part_usage)
-      parts_df_sorted = parts_df.sort_values(['status_category', 'usage_count'], 
-                                            ascending=[True, False])
-      summary_df = parts_df_sorted[['part_id', 'part_name', 'quantity', 'min_stock', 
-                                  'stock_status', 'status_category', 'usage_count', 
-                                  'blocked', 'comments']]
-      
-      return summary_df
-
-  # Generate and print summary table
-  summary_table = create_summary_table()
-  summary_table.to_csv('parts_summary.csv', index=False)
+  ax.set_title('Spec-Part Relationship Graph with Stock Status', fontsize=15)
+  fig.tight_layout()
+  ax.set_axis_off()
+  return fig
+
+def _draw_critical_graph(critical_graph):
+  from matplotlib.figure import Figure
+
+  fig = Figure(figsize=(12, 8))
+  ax = fig.add_subplot()
+
+  node_types = nx.get_node_attributes(critical_graph, 'node_type')
+  colors = ['skyblue' if node_types[node] == 'spec' else 'red' for node in critical_graph.nodes()]
+
+  pos = nx.spring_layout(critical_graph, k=0.8, iterations=100, seed=42)
+  nx.draw_networkx_nodes(critical_graph, pos, node_size=800, node_color=colors, alpha=0.8, ax=ax)
+  edges = list(critical_graph.edges(data=True))
+  nx.draw_networkx_edges(critical_graph, pos, edgelist=[(u, v) for u, v, _ in edges],
+                        width=[get_edge_width(d.get('qty_needed', 1)) for _, _, d in edges],
+                        edge_color=['red' if d.get('blocked', False) else 'orange' for _, _, d in edges],
+                        alpha=0.7, arrows=True, ax=ax)
+
+  # Draw labels
+  nx.draw_networkx_labels(critical_graph, pos, font_size=10, ax=ax)
+  ax.set_title('Critical Parts and Affected Specs', fontsize=15)
 
-  def create_critical_parts_graph():
-      critical_parts = [part['part_id'] for part in parts_data if part['blocked'] or (part['quantity'] < part['min_stock'])]
-      
-      if not critical_parts:
-          return None
-      
-      # Create a new graph for critical parts
-      H = nx.DiGraph()
-      
-      # Find which specs use these critical parts
-      for spec in specs_data:
-          spec_name = spec['spec_name']
-          spec_uses_critical = False
-          
-          for part_item in spec['bill of materials']:
-              part_id = part_item['Part_ID']
-              if part_id in critical_parts:
-                  spec_uses_critical = True
-                  qty_needed = part_item['Qty']
-                  
-                  # Add nodes if they don't exist yet
-                  if spec_name not in H:
-                      H.add_node(spec_name, node_type='spec')
-                  if part_id not in H:
-                      H.add_node(part_id, node_type='part')
-                  
-                  # Get part information
-                  part_info = parts_dict[part_id]
-                  current_stock = part_info.get('quantity', 0)
-                  min_stock = part_info.get('min_stock', 0)
-                  blocked = part_info.get('blocked', False)
-                  
-                  # Calculate stock status
-                  if min_stock > 0:
-                      stock_status = (current_stock / min_stock) * 100
-                  else:
-                      stock_status = 100
-                  
-                  # Add edge with attributes
-                  H.add_edge(spec_name, part_id, 
-                            qty_needed=qty_needed,
-                            current_stock=current_stock,
-                            min_stock=min_stock,
-                            stock_status=stock_status,
-                            blocked=blocked)
-      
-      if len(H) == 0:  # If no nodes in subgraph
-          return None
-      
-      return H
-
-  # Draw the critical parts graph if there are any critical parts
-  critical_graph = create_critical_parts_graph()
-  data = json_graph.node_link_data(critical_graph)
-  # json_string = json.dumps(data)
-  # print(json_string)
-  # with open("critical.json", "w") as f:
-  #   json.dump(data, f, indent=2)
-  
-  if critical_graph:
-      plt.figure(figsize=(12, 8))
-      
-      node_types = nx.get_node_attributes(critical_graph, 'node_type')
-      colors = ['skyblue' if node_types[node] == 'spec' else 'red' for node in critical_graph.nodes()]
-      
-      pos = nx.spring_layout(critical_graph, k=0.8, iterations=100, seed=42)
-      nx.draw_networkx_nodes(critical_graph, pos, node_size=800, node_color=colors, alpha=0.8)
-      for (u, v, data) in critical_graph.edges(data=True):
-          color = 'red' if data.get('blocked', False) else 'orange'
-          width = get_edge_width(data.get('qty_needed', 1))
-          nx.draw_networkx_edges(critical_graph, pos, edgelist=[(u, v)], 
-                                width=width, alpha=0.7, edge_color=color, arrows=True)
-      
-      # Draw labels
-      nx.draw_networkx_labels(critical_graph, pos, font_size=10)
-      plt.title('Critical Parts and Affected Specs', fontsize=15)
-      
-      spec_patch = plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='skyblue', 
-                            markersize=10, label='Spec')
-      part_patch = plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='red', 
-                            markersize=10, label='Critical Part')
-      red_line = plt.Line2D([0], [0], color='red', lw=2, label='Blocked')
-      orange_line = plt.Line2D([0], [0], color='orange', lw=2, label='Low Stock')
-      
-      plt.legend(handles=[spec_patch, part_patch, red_line, orange_line], 
-                loc='upper left', bbox_to_anchor=(1, 1))
-      
-      plt.axis('off')
-      plt.tight_layout()
-      plt.savefig('critical_parts_graph.png', dpi=300, bbox_inches='tight')
-      # plt.show()
+  ax.legend(handles=_legend_handles([('node', 'skyblue', 'Spec'), ('node', 'red', 'Critical Part'),
+                                     ('line', 'red', 'Blocked'), ('line', 'orange', 'Low Stock')]),
+            loc='upper left', bbox_to_anchor=(1, 1))
+
+  ax.set_axis_off()
+  fig.tight_layout()
+  return fig
+
+def _fingerprint(parts_data, specs_data):
+  payload = json.dumps([parts_data, specs_data], sort_keys=True, default=str)
+  return hashlib.sha1(payload.encode()).hexdigest()
+
+def render_graph(kind, load, dpi=300, version=None):
+  """
+  Render the 'specs' or 'critical' graph to PNG bytes.
+  `load()` returns (parts_data, specs_data). With a `version` (e.g. the LiveStore collection
+  versions) the cache is keyed on it and `load` only runs on a miss; without one the data
+  is loaded and fingerprinted. Returns None when there is nothing to draw (no critical parts).
+  Draws on its own Figure with the Agg canvas (no pyplot state), so request threads can render at once.
+  """
+  if version is not None:
+    key = (kind, dpi, version)
+    with _render_lock:
+      if key in _render_cache:
+        return _render_cache[key]
+    parts_data, specs_data = load()
+  else:
+    parts_data, specs_data = load()
+    key = (kind, dpi, _fingerprint(parts_data, specs_data))
+    with _render_lock:
+      if key in _render_cache:
+        return _render_cache[key]
+
+  # matplotlib is only needed here, so keep it off the import path
+  from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+  if kind == 'specs':
+    fig = _draw_spec_graph(build_spec_graph(parts_data, specs_data))
+  elif kind == 'critical':
+    critical_graph = create_critical_parts_graph(parts_data, specs_data)
+    if not critical_graph:
+      return None
+    fig = _draw_critical_graph(critical_graph)
   else:
+    raise ValueError(f"Unknown graph kind '{kind}'")
+
+  buf = io.BytesIO()
+  FigureCanvasAgg(fig).print_png(buf, dpi=dpi, bbox_inches='tight')
+  png = buf.getvalue()
+
+  with _render_lock:
+    if len(_render_cache) >= RENDER_CACHE_SIZE:
+      _render_cache.pop(next(iter(_render_cache)))
+    _render_cache[key] = png
+  return png
+
+def create_graph(db):
+  """Full offline run: analytics plus both PNGs and parts_summary.csv on disk."""
+  parts_data, specs_data = load_graph_data(db)
+  summary_table = analyze(parts_data, specs_data)["summary_table"]
+  summary_table.to_csv('parts_summary.csv', index=False)
+
+  for kind, path in [('specs', 'specs_parts_graph.png'), ('critical', 'critical_parts_graph.png')]:
+    png = render_graph(kind, lambda: (parts_data, specs_data))
+    if png is None:
       print("No critical parts found for visualization")
-      
+      continue
+    with open(path, 'wb') as f:
+      f.write(png)
+
   return summary_table
 
 if __name__ == "__main__":
+  from upload_data import initialize_firebase
   db = initialize_firebase()
   summary_table = create_graph(db)
-  # print(summary_table)
\ No newline at end of file
+  # print(summary_table)
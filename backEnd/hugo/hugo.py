@@ -1,35 +1,32 @@
-import pandas as pd
-import openai
 import json
-import ast
-import re
-import email
-from email import policy
-from email.parser import BytesParser
 from typing import List
 from part import Part
 from supplier import Supplier
 from order import Order
 from sales import Sales
-from graph import create_graph
+from session import SessionStore
+from answer_cache import AnswerCache
+from store import LiveStore
+from retrieval import Retriever, load_embedder
+from alerts import compute_alerts
+from clients import get_openai_client, get_chat_llm
+from aio import iterate_in_loop
+from executor import ParallelAgentExecutor
+from llm_callbacks import MetricsCallback, ToolInputs
+from metrics import CHAT_STAGE_LATENCY, CHAT_ANSWERS, llm_call, record_usage
+from graph import analyze, render_graph
+from bom import BomMatrix, demand_from_sales, requirements_table
+from mrp import MrpProjection, lead_times, open_sales
+from sourcing import RELIABILITY_WEIGHT, supplier_table, plan_shortages, reorder_quantities, choose_suppliers
+from capacity import usable_stock, spec_capacity, production_mix
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from upload_data import initialize_firebase, upload_specs
-
-from langchain_openai import ChatOpenAI
-from langchain.chains import LLMChain, SequentialChain
-from langchain.prompts import PromptTemplate
-from langchain.tools import Tool
-from langchain.agents import tool
-from langchain.agents import AgentType, initialize_agent, load_tools
-from langchain.agents import AgentExecutor
-from langchain.memory import ConversationBufferMemory
-from langchain.agents.format_scratchpad.openai_tools import (
-    format_to_openai_tool_messages,
-)
-from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import AIMessage, HumanMessage
+from upload_data import initialize_firebase
+
+# Only what the class body needs at import time; the agent pieces are imported in _build_agent
+from langchain_core.tools import Tool, tool
 
 from datetime import datetime
 
@@ -38,162 +35,339 @@ SALES_JSON_PATH = 'data/sales_orders.json'
 ORDERS_JSON_PATH = 'data/orders.json'
 PARTS_JSON_PATH = 'data/parts.json'
 SUPPLY_JSON_PATH = 'data/supply.json'
+# Most urgent rows the capacity and planning tools hand to the LLM
+CAPACITY_TOOL_ROWS = 25
 
 global full
 class Hugo:
 
-    def __init__(self) -> None:
+    def __init__(self, db=None, llm=None) -> None:
+        """
+        `db` and `llm` default to Firestore and gpt-3.5-turbo; pass stand-ins to run offline
+        (see benchmarks/fakes.py). Startup stage durations end up in `self.timings`.
+        """
         load_dotenv()
+        self.timings = {}
+        started = time.perf_counter()
 
         # DATABASE
-        self.db = initialize_firebase()
+        self.db = db if db is not None else initialize_firebase()
 
         # KEY
         self._key = os.getenv("OPENAI_API_KEY")
 
-        # PARTS CLASS
-        self.parts = self._init_parts()
+        # LIVE DATA (loaded once, then kept fresh by snapshot listeners)
+        self.store = LiveStore(self.db)
+        self.store.watch('parts', self._make_part)
+        self.store.watch('supply', self._make_supplier)
+        self.store.watch('orders', self._make_order)
+        self.store.watch('sales', self._make_sales)
+        self.store.watch('specs', self._make_spec)
+
+        # INDEXES (kept current by the same deltas, so tools answer in O(result))
+        self.store.add_index('supply', 'part_id', lambda s: s.part_id)
+        self.store.add_index('orders', 'status', lambda o: o.status)
+        self.store.add_index('orders', 'part_id', lambda o: o.part_id)
+        self.store.add_index('parts', 'stock_bucket', lambda p: p.stock_bucket())
+        self.store.add_index('sales', 'model', lambda s: s.model)
+
+        # BOM MATRIX (built once, then patched row by row as specs change)
+        self.bom_matrix = None
+        self.retriever = None
+        self._retriever_changes = set()  # (collection, doc_id) not yet applied to the retriever
+        self._retriever_lock = threading.Lock()
+        specs_version = self.store.versions['specs']
+        self.bom_matrix = BomMatrix.from_specs(self.store.values('specs'))
+        self.store.add_listener(self._on_store_change)
+        # a spec change that landed while the matrix was built never reached the listener
+        while self.store.versions['specs'] != specs_version:
+            specs_version = self.store.versions['specs']
+            self.bom_matrix = BomMatrix.from_specs(self.store.values('specs'))
+
+        # MRP (time-phased plan, patched per order / sale change and re-projected lazily)
+        self.mrp = MrpProjection(self.bom_matrix, load=self._mrp_snapshot)
+        self._supply_table = None
+        self._lead_times = None
+        self._supply_version = None
+        self.timings['load'] = time.perf_counter() - started
+
+        # CLIENT (shared keep-alive pool, also used by the tools and the agent LLM)
+        self.client = get_openai_client()
+
+        # CONTEXT
+        self._context_version = None
+        self._context_lock = threading.RLock()
+        self._summary_version = None
+        self._retriever_version = None
+        started = time.perf_counter()
+        self.embedder = load_embedder()
+        self.create_data_context()
+        self.timings['context'] = time.perf_counter() - started
+
+        # AGENT (built once, shared by every chat session)
+        started = time.perf_counter()
+        self.llm = llm
+        self.sessions = SessionStore()
+        self.answers = AnswerCache(embedder=self.embedder)
+        self.metrics = MetricsCallback()
+        self.agent_executor = self._build_agent()
+        self.timings['agent'] = time.perf_counter() - started
+
+    # === LIVE DATA ===
+    @property
+    def parts(self) -> List[Part]:
+        return self.store.values('parts')
+
+    @property
+    def suppliers(self) -> List[Supplier]:
+        return self.store.values('supply')
+
+    @property
+    def orders(self) -> List[Order]:
+        return self.store.values('orders')
+
+    @property
+    def sales(self) -> List[Sales]:
+        return self.store.values('sales')
+
+    # === DOCUMENT FACTORIES ===
+    # Upload strips the id fields out of the documents, so fall back to the doc id
+    @staticmethod
+    def _make_part(doc_id, data) -> Part:
+        return Part(
+            part_id=data.get('part_id', doc_id),
+            min_stock=data.get('min_stock'),
+            reorder_quantity=data.get('reorder_quantity'),
+            reorder_interval_days=data.get('reorder_interval_days'),
+            part_name=data.get('part_name'),
+            part_type=data.get('part_type'),
+            used_in_models=data.get('used_in_models', ''),
+            weight=0,
+            location=data.get('location'),
+            quantity=data.get('quantity'),
+            blocked=data.get('blocked', False),
+            comments=data.get('comments', ""),
+            successor_part=data.get('successor_part', None)
+        )
 
-        # SUPPLIER CLASS
-        self.suppliers = self._init_suppliers()
+    @staticmethod
+    def _make_supplier(doc_id, data) -> Supplier:
+        # supply documents are keyed "<supplier_id>_<part_id>"
+        supplier_id, _, part_id = doc_id.partition('_')
+        return Supplier(
+            supplier_id=data.get('supplier_id', supplier_id),
+            part_id=data.get('part_id', part_id),
+            price_per_unit=data.get('price_per_unit'),
+            lead_time_days=data.get('lead_time_days'),
+            min_order_qty=data.get('min_order_qty'),
+            reliability_rating=data.get('reliability_rating')
+        )
 
-        # ORDERS CLASS
-        self.orders = self._init_orders()
+    @staticmethod
+    def _make_order(doc_id, data) -> Order:
+        return Order(
+            order_id=data.get('order_id', doc_id),
+            part_id=data.get('part_id'),
+            quantity_ordered=data.get('quantity_ordered'),
+            order_date=data.get('order_date'),
+            expected_delivery_date=data.get('expected_delivery_date'),
+            supplier_id=data.get('supplier_id'),
+            status=data.get('status'),
+            actual_delivered_at=data.get('actual_delivered_at')
+        )
 
-        # SALES CLASS
-        self.sales = self._init_sales()
+    @staticmethod
+    def _make_spec(doc_id, data) -> dict:
+        return {**data, 'spec_name': doc_id}
+
+    @staticmethod
+    def _make_sales(doc_id, data) -> Sales:
+        return Sales(
+            sales_order_id=data.get('sales_order_id', doc_id),
+            model=data.get('model'),
+            version=data.get('version'),
+            quantity=data.get('quantity'),
+            order_type=data.get('order_type'),
+            requested_date=data.get('requested_date'),
+            created_at=data.get('created_at'),
+            accepted_request_date=data.get('accepted_request_date')
+        )
+    
+    def _on_store_change(self, collection, doc_id, old, new) -> None:
+        if collection in ('specs', 'orders'):
+            with self._retriever_lock:
+                self._retriever_changes.add((collection, doc_id))
+        if self.bom_matrix is not None:
+            self.bom_matrix.on_change(collection, doc_id, old, new)
+        if getattr(self, 'mrp', None) is not None:
+            self.mrp.on_change(collection, doc_id, old, new, version=self.store.change_version)
+
+    # === ANALYTICS ===
+    def _graph_data(self):
+        return [part.to_dict() for part in self.parts], self.store.values('specs')
+
+    def _refresh_summary(self) -> None:
+        """Recompute the summary table and critical-parts graph (no plotting)."""
+        version = (self.store.versions['parts'], self.store.versions['specs'], self.bom_matrix.version)
+        if self._summary_version == version:
+            return
+
+        analysis = analyze(*self._graph_data())
+        self.table = analysis["summary_table"]
+        self.critical_graph = analysis["critical_graph"]
+
+        # The table stays columnar; the tools get one records view of it
+        self.summary_data = self.table.to_dict('records')
+
+        # Stock that can go into production, for the capacity and requirements calculations
+        self.stock = usable_stock(self.table)
+        self.capacity_table = spec_capacity(self.bom_matrix, self.stock)
+        self._summary_version = version
+
+    def _refresh_retriever(self) -> None:
+        """
+        Re-index the rows the LLM tools retrieve from when parts, specs or orders change:
+        only the specs and orders that changed, and the parts rows whose summary line did.
+        """
+        version = tuple(self.store.versions[name] for name in ('parts', 'specs', 'orders'))
+        with self._retriever_lock:
+            if self._retriever_version == version and not self._retriever_changes:
+                return
+            changes, self._retriever_changes = self._retriever_changes, set()
+        if self.retriever is None:
+            self.retriever = Retriever(self.summary_data, self.store.values('specs'), self.orders,
+                                       embedder=self.embedder)
+        else:
+            for collection, doc_id in changes:
+                self.retriever.put(collection, doc_id, self.store.get(collection, doc_id))
+            self.retriever.sync_parts(self.summary_data)
+        self._retriever_version = version
+
+    def render_graph(self, kind: str):
+        """PNG bytes for the 'specs' or 'critical' graph, rendered on demand and cached."""
+        version = (self.store.versions['parts'], self.store.versions['specs'])
+        return render_graph(kind, self._graph_data, version=version)
 
-        # SUMMARY TABLE
-        self.table = create_graph(self.db)
-        
-        data_dict = self.table.to_dict()
-        
-        # Now let's properly format the data
-        self.summary_data = []
-        for key in data_dict['part_id']:
-            summary_entry = {
-                'part_id': data_dict['part_id'][key],
-                'part_name': data_dict['part_name'][key],
-                'quantity': data_dict['quantity'][key],
-                'min_stock': data_dict['min_stock'][key],
-                'stock_status': data_dict['stock_status'][key],
-                'status_category': data_dict['status_category'][key],
-                'usage_count': data_dict['usage_count'][key],
-                'blocked': data_dict['blocked'][key],
-                'comments': data_dict['comments'][key],
+    def create_data_context(self):
+        """Rebuild the shared tool context, but only when the live data has changed."""
+        global full
+        with self._context_lock:
+            # Read the version first: a write landing during the refresh leaves the context
+            # marked older than the data, so the next call picks it up
+            version = self.store.version
+            if self._context_version == version:
+                return full
+
+            self._refresh_summary()
+            self._refresh_retriever()
+
+            # The context shares the store's slotted objects instead of copying them into dicts;
+            # call .to_dict() only where a row actually has to be serialised
+            full = {
+                "parts": self.parts,
+                "suppliers": self.suppliers,
+                "orders": self.orders, 
+                "sales": self.sales,
+                "relationships_table": self.summary_data,
+                "summary_table": self.table,
+                "store": self.store,
+                "retriever": self.retriever,
+                "capacity_table": self.capacity_table,
+                "hugo": self
             }
-            self.summary_data.append(summary_entry)
-
-        # CLIENT
-        self.client = openai.OpenAI(api_key=self._key)
-
-    # === INIT HELPERS ===
-    def _init_parts(self) -> List[Part]:
-        parts_ref = self.db.collection('parts') 
-        docs = parts_ref.stream()
-
-        parts = []
-        for doc in docs:
-            data = doc.to_dict()
-            part = Part(
-                part_id=data.get('part_id'),
-                min_stock=data.get('min_stock'),
-                reorder_quantity=data.get('reorder_quantity'),
-                reorder_interval_days=data.get('reorder_interval_days'),
-                part_name=data.get('part_name'),
-                part_type=data.get('part_type'),
-                used_in_models=data.get('used_in_models', ''),
-                weight=0,
-                location=data.get('location'),
-                quantity=data.get('quantity'),
-                blocked=data.get('blocked', False),
-                comments=data.get('comments', ""),
-                successor_part=data.get('successor_part', None)
-            )
-            parts.append(part)
-        return parts
-
-    def _init_suppliers(self) -> List[Supplier]:
-        supply_ref = self.db.collection('supply')
-        docs = supply_ref.stream()
-
-        suppliers_list = []
-        for doc in docs:
-            data = doc.to_dict()
-            supplier = Supplier(
-                supplier_id=data.get('supplier_id'),
-                part_id=data.get('part_id'),
-                price_per_unit=data.get('price_per_unit'),
-                lead_time_days=data.get('lead_time_days'),
-                min_order_qty=data.get('min_order_qty'),
-                reliability_rating=data.get('reliability_rating')
-            )
-            suppliers_list.append(supplier)
-        return suppliers_list
-
-    def _init_orders(self) -> List[Order]:
-        orders_ref = self.db.collection('orders')
-        docs = orders_ref.stream()
-
-        orders = []
-        for doc in docs:
-            data = doc.to_dict()
-            order = Order(
-                order_id=data.get('order_id'),
-                part_id=data.get('part_id'),
-                quantity_ordered=data.get('quantity_ordered'),
-                order_date=data.get('order_date'),
-                expected_delivery_date=data.get('expected_delivery_date'),
-                supplier_id=data.get('supplier_id'),
-                status=data.get('status'),
-                actual_delivered_at=data.get('actual_delivered_at')
-            )
-            orders.append(order)
-        return orders
-
-    def _init_sales(self) -> List[Sales]:
-        sales_ref = self.db.collection('sales')
-        docs = sales_ref.stream()
-
-        sales_list = []
-        for doc in docs:
-            data = doc.to_dict()
-            sales = Sales(
-                sales_order_id=data.get('sales_order_id'),
-                model=data.get('model'),
-                version=data.get('version'),
-                quantity=data.get('quantity'),
-                order_type=data.get('order_type'),
-                requested_date=data.get('requested_date'),
-                created_at=data.get('created_at'),
-                accepted_request_date=data.get('accepted_request_date')
+            self._context_version = version
+
+            return full
+
+    # === CAPACITY ===
+    def capacity(self, specs=None):
+        """Buildable units and bottleneck part per spec (each spec on its own), fewest units first."""
+        self.create_data_context()
+        if not specs:
+            return self.capacity_table
+        return self.capacity_table[self.capacity_table['spec_name'].isin(specs)]
+
+    def production_mix(self, weights=None, max_units=None) -> dict:
+        """How many of each spec to build when all specs draw on the same stock."""
+        self.create_data_context()
+        return production_mix(self.bom_matrix, self.stock, weights, max_units)
+
+    def requirements(self, demand=None):
+        """
+        Parts needed for `demand` ({spec_name: units}; by default every open sales order),
+        with usable stock and shortage per part.
+        """
+        self.create_data_context()
+        if demand is None:
+            demand = demand_from_sales(open_sales(self.sales))
+        return requirements_table(self.bom_matrix, demand, self.stock)
+
+    # === MRP ===
+    def _mrp_snapshot(self):
+        """(store version, parts, orders, sales) for an MRP rebuild, read in one go."""
+        return self.store.snapshot('parts', 'orders', 'sales')
+
+    def _refresh_supply(self) -> None:
+        """Rebuild the supplier frame and lead times when the supply collection changed."""
+        version = self.store.versions['supply']
+        if self._supply_version != version:
+            suppliers = self.suppliers
+            self._supply_table = supplier_table(suppliers)
+            self._lead_times = lead_times(suppliers)
+            self._supply_version = version
+
+    def lead_times(self):
+        """part_id -> shortest supplier lead time."""
+        self._refresh_supply()
+        return self._lead_times
+
+    def material_plan(self, part_ids=None, shortages_only=True, bucket="day", start=None):
+        """
+        Projected shortages per part with the date to order by (see MrpProjection.plan).
+        The daily plan from today is kept live; other buckets or start dates are built on demand.
+        """
+        if bucket == "day" and start is None:
+            projection = self.mrp
+        else:
+            projection = MrpProjection(self.bom_matrix, load=self._mrp_snapshot, bucket=bucket, start=start)
+        return projection.plan(self.lead_times(), part_ids, shortages_only)
+
+    def stock_projection(self, part_id: str) -> list:
+        """Day-by-day demand, receipts and projected on-hand stock for one part."""
+        return self.mrp.projection(part_id)
+
+    # === SOURCING ===
+    def sourcing_plan(self, shortages=None, reliability_weight=RELIABILITY_WEIGHT):
+        """
+        Supplier and quantity per short part (see sourcing.choose_suppliers). `shortages` are
+        rows of part_id, shortage and optional need_by; by default the MRP shortages, due on
+        their shortage date.
+        """
+        self._refresh_supply()
+        if shortages is None:
+            shortages = plan_shortages(self.material_plan())
+        return choose_suppliers(shortages, self._supply_table, reorder_quantities(self.parts), reliability_weight)
+
+    # === ALERTS ===
+    def alerts(self, thresholds=None) -> dict:
+        """Rule-based inventory alerts ({part_id: reason}) from the current summary table."""
+        self.create_data_context()
+        return compute_alerts(self.table, thresholds)
+
+    def phrase_alerts(self, alerts: dict) -> str:
+        """Ask the LLM to word already-computed alerts for people; it does no analysis itself."""
+        with llm_call("gpt-4o"):
+            response = self.client.chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": "You are a helpful assistant summarising inventory alerts for a procurement team. Be brief and concrete."},
+                    {"role": "user", "content": f"Summarise these alerts (part_id: reason):\n{json.dumps(alerts)}"}
+                ],
+                temperature=0.2,
+                max_tokens=400
             )
-            sales_list.append(sales)
-        return sales_list
-    
-    def create_data_context(self):
-        parts_data = [vars(part) for part in self.parts]
-        suppliers_data = [vars(supplier) for supplier in self.suppliers]
-        orders_data = [vars(order) for order in self.orders]
-        sales_data = [vars(sale) for sale in self.sales]
-        summary_data = [entry for entry in self.summary_data]
-        
-        global full 
-        full = {
-            "parts": parts_data,
-            "suppliers": suppliers_data,
-            "orders": orders_data, 
-            "sales": sales_data,
-            "relationships_table": summary_data
-        }
-
-        return {
-            "parts": parts_data,
-            "suppliers": suppliers_data,
-            "orders": orders_data, 
-            "sales": sales_data,
-            "relationships_table": summary_data
-        } 
+        record_usage("gpt-4o", response)
+        return response.choices[0].message.content.strip()
 
     # === TOOL HELPERS ===
     # @tool
@@ -209,24 +383,23 @@ class Hugo:
     #     }
 
     @tool
-    def check_low_stocks(self, stock="") -> dict:
+    def check_low_stocks(stock="") -> dict:
         """Find which parts are low in stock and return them"""
         print("check_low_stocks tool used")
-        low_stock_parts = [p for p in self.parts if p.quantity <= p.min_stock]
+        global full
+        low_stock_parts = [p.to_dict() for p in full["store"].lookup('parts', 'stock_bucket', 'low')]
         return {
             "tool_name": "InventoryTool",
             "response_type": "low_stock_alerts",
             "low_stock_parts": low_stock_parts
         }
-        return "Done"
 
     @tool
     def find_supplier_for_part(part_id: str) -> dict:
         """Find the supplier of a specific part."""
         print(f"find_supplier_for_part tool used with part_id: {part_id}")
         global full
-        print(full["suppliers"])
-        suppliers_for_part = [vars(s) for s in full["suppliers"] if s["part_id"] == part_id]
+        suppliers_for_part = [s.to_dict() for s in full["store"].lookup('supply', 'part_id', part_id.strip())]
         return {
             "tool_name": "InventoryTool",
             "response_type": "supplier_info",
@@ -239,7 +412,7 @@ class Hugo:
         """Find out which parts are ordered."""
         print("check_pending_orders tool used")
         global full
-        pending_orders = [o for o in full["orders"] if o["status"] == "ordered"]
+        pending_orders = [o.to_dict() for o in full["store"].lookup('orders', 'status', "ordered")]
         return {
             "tool_name": "InventoryTool",
             "response_type": "pending_orders",
@@ -252,26 +425,25 @@ class Hugo:
         print(f"relationship_evaluation tool used with question: {question}")
         global full
         prompt = (
-            f"Here is a relationship of parts and specs data:\n{full['relationships_table']}\n\n"
+            f"Here are the parts and specs relevant to the question (pipe-separated rows):\n"
+            f"{full['retriever'].context(question, kinds=('parts', 'specs'))}\n\n"
             f"Question: {question}\n"
             f"Answer:"
         )
 
-        load_dotenv()
-
-        _key = os.getenv("OPENAI_API_KEY")
-        
-        client = openai.OpenAI(api_key=_key)
+        client = get_openai_client()
 
         try:
-            response = client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant analyzing data relationships and providing recommendation on what the user should do next."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2,
-                max_tokens=700)
+            with llm_call("gpt-4"):
+                response = client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant analyzing data relationships and providing recommendation on what the user should do next."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.2,
+                    max_tokens=700)
+            record_usage("gpt-4", response)
 
             answer = response.choices[0].message.content.strip()
             return answer
@@ -284,78 +456,93 @@ class Hugo:
     def inventory_alerts(alert="") -> dict:
         """Find the inventory alerts in the data which can be from delays, blocks, and low stock"""
         print("inventory_alerts tool used")
-        # global full
-        prompt = (
-            f"Here is a table of parts and specs in JSON format:\n{full['relationships_table']}\n\n"
-            "Please analyze the data and list any parts that should be on alert. Look for issues like:\n"
-            "- Low stock levels\n"
-            "- Blocked parts\n"
-            "- High usage counts\n\n"
-            "Return the result in JSON format like {\"part_id\": \"reason\", ...}. "
-            "If there are no alerts, return {\"status\": \"No alerts found\"}."
-        )
-        
-        load_dotenv()
-
-        _key = os.getenv("OPENAI_API_KEY")
-        
-        client = openai.OpenAI(api_key=_key)
-
-        try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant analyzing inventory data for potential alerts."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2,
-                max_tokens=700,
-                response_format={"type": "json_object"}
-            )
-
-            answer = response.choices[0].message.content.strip()
-            print("Raw response:\n", answer)
+        global full
+        # Computed locally from the summary table; the agent LLM only phrases the result
+        return compute_alerts(full["summary_table"])
+    
+    @tool
+    def production_capacity(spec: str = "") -> dict:
+        """How many units of each spec (or the comma-separated specs given) can be built from current stock, and which part limits it."""
+        print(f"production_capacity tool used with spec: {spec}")
+        global full
+        table = full["capacity_table"]
+        names = [name.strip() for name in spec.split(',') if name.strip()]
+        if names:
+            table = table[table['spec_name'].isin(names)]
+        return {
+            "tool_name": "InventoryTool",
+            "response_type": "production_capacity",
+            "specs": table.head(CAPACITY_TOOL_ROWS).to_dict('records'),
+            "specs_total": len(table)
+        }
 
-            try:
-                alerts = json.loads(answer)
-            except json.JSONDecodeError:
-                print("Warning: Failed to parse JSON properly. Returning raw text instead.")
-                alerts = {"raw_response": answer}
+    @tool
+    def material_plan_tool(part_id: str = "") -> dict:
+        """Projected stock shortages from sales demand and open orders, with shortage dates and order-by dates; pass a part ID for its day-by-day projection."""
+        print(f"material_plan tool used with part_id: {part_id}")
+        global full
+        hugo = full["hugo"]
+        part_id = part_id.strip()
+        if part_id:
+            plan = hugo.material_plan([part_id], shortages_only=False)
+            return {
+                "tool_name": "PlanningTool",
+                "response_type": "stock_projection",
+                "part": plan.to_dict('records'),
+                "projection": [day for day in hugo.stock_projection(part_id) if day['demand'] or day['receipts']]
+            }
+        plan = hugo.material_plan()
+        return {
+            "tool_name": "PlanningTool",
+            "response_type": "shortages",
+            "shortages": plan.head(CAPACITY_TOOL_ROWS).to_dict('records'),
+            "parts_short": len(plan)
+        }
 
-            return alerts
+    @tool
+    def plan_purchases(part_ids: str = "") -> dict:
+        """Suggested purchase orders for projected shortages: supplier, quantity and cost per part, weighing price, lead time, MOQ and reliability; optionally pass comma-separated part IDs."""
+        print(f"plan_purchases tool used with part_ids: {part_ids}")
+        global full
+        plan = full["hugo"].sourcing_plan()
+        wanted = [p.strip() for p in part_ids.split(",") if p.strip()]
+        if wanted:
+            plan = plan[plan['part_id'].isin(wanted)]
+        return {
+            "tool_name": "PlanningTool",
+            "response_type": "purchase_plan",
+            "purchases": plan.head(CAPACITY_TOOL_ROWS).to_dict('records'),
+            "parts": len(plan),
+            "total_cost": float(sum(cost for cost in plan['total_cost'] if cost is not None))
+        }
 
-        except Exception as e:
-            print(f"Error during OpenAI API call: {e}")
-            return {"error": "Could not retrieve inventory alerts."}
-    
     @tool
     def general_questions(question: str) -> str:
         """Answer general questions about the inventory and its data."""
         print(f"general_questions tool used with question: {question}")
         global full
         prompt = (
-            f"Here is a table of parts and specs in JSON format:\n{full['relationships_table']}\n{full['orders']}\n\n"
+            f"Here are the parts, specs and orders relevant to the question (pipe-separated rows):\n"
+            f"{full['retriever'].context(question)}\n\n"
             f"Question: {question}\n"
             f"Answer:"
         )
 
-        load_dotenv()
-
-        _key = os.getenv("OPENAI_API_KEY")
-        
-        client = openai.OpenAI(api_key=_key)
+        client = get_openai_client()
 
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant answering questions about inventory data."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2,
-                max_tokens=700,
-                response_format={"type": "json_object"}
-            )
+            with llm_call("gpt-4o"):
+                response = client.chat.completions.create(
+                    model="gpt-4o",
+                    messages=[
+                        {"role": "system", "content": "You are a helpful assistant answering questions about inventory data."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.2,
+                    max_tokens=700,
+                    response_format={"type": "json_object"}
+                )
+            record_usage("gpt-4o", response)
 
             answer = response.choices[0].message.content.strip()
             # raise(answer)
@@ -366,16 +553,18 @@ class Hugo:
             return "Error: Could not answer the question due to API issue."
 
 
-    def chat(self, query: str | None = None):
-        # Initialize LangChain components
-        llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
-        memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-        
-        context_data = self.create_data_context()
+    # === AGENT ===
+    def _build_agent(self) -> ParallelAgentExecutor:
+        """Build the LLM, prompt, tools and executor once so chat() only has to invoke them."""
+        from langchain.agents.format_scratchpad.openai_tools import format_to_openai_tool_messages
+        from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 
-        # Define system message template
+        llm = self.llm if self.llm is not None else get_chat_llm("gpt-3.5-turbo", temperature=0)
+
+        # Counts and date are filled in per call so the prompt never goes stale
         system_template = ChatPromptTemplate.from_messages([
-            ("system", f"""
+            ("system", """
             You are Hugo, an inventory management assistant for a scooter manufacturing company.
             You have access to the following data:
             - Parts inventory: details about all parts, including quantities, locations, and which models they're used in
@@ -388,21 +577,19 @@ class Hugo:
             Be precise, data-driven, and helpful. If you don't know something, say so clearly.
             Do not include the tool names in your response.
             
-            Available parts data: {len(context_data['parts'])} parts
-            Available suppliers data: {len(context_data['suppliers'])} supplier relationships
-            Available orders data: {len(context_data['orders'])} orders
-            Available sales data: {len(context_data['sales'])} sales orders
-            Relationship between specs and parts: {len(context_data['relationships_table'])} relationships
+            Available parts data: {parts_count} parts
+            Available suppliers data: {suppliers_count} supplier relationships
+            Available orders data: {orders_count} orders
+            Available sales data: {sales_count} sales orders
+            Relationship between specs and parts: {relationships_count} relationships
 
-            Today's date: {datetime.now().strftime('%Y-%m-%d')}
+            Today's date: {today}
             """),
             MessagesPlaceholder(variable_name="chat_history"),
             ("user", "{input}"),
             MessagesPlaceholder(variable_name="agent_scratchpad")                                            
         ])
-        
-        
-        
+
         # Define all tools
         tools = [
             Tool.from_function(
@@ -434,6 +621,21 @@ class Hugo:
                 func=self.inventory_alerts,
                 name="inventory_alerts",
                 description="Check for inventory alerts including low stock, blocked parts, etc."
+            ),
+            Tool.from_function(
+                func=self.production_capacity,
+                name="production_capacity",
+                description="How many units of each spec can be built from current stock and the bottleneck part; optionally pass comma-separated spec names"
+            ),
+            Tool.from_function(
+                func=self.material_plan_tool,
+                name="material_plan",
+                description="Projected shortages over time from sales demand and open orders: shortage date and the date to order by given supplier lead times; optionally pass one part ID for its day-by-day projection"
+            ),
+            Tool.from_function(
+                func=self.plan_purchases,
+                name="plan_purchases",
+                description="Which supplier to order each short part from, how many and at what cost, meeting the shortage date where possible; optionally pass comma-separated part IDs"
             )
         ]
         
@@ -446,38 +648,131 @@ class Hugo:
                 ),
                 "input": lambda x: x["input"],
                 "chat_history": lambda x: x["chat_history"],
+                "parts_count": lambda x: len(full["parts"]),
+                "suppliers_count": lambda x: len(full["suppliers"]),
+                "orders_count": lambda x: len(full["orders"]),
+                "sales_count": lambda x: len(full["sales"]),
+                "relationships_count": lambda x: len(full["relationships_table"]),
+                "today": lambda x: datetime.now().strftime('%Y-%m-%d'),
             }
             | system_template
             | llm_with_tools
             | OpenAIToolsAgentOutputParser()
         )
 
-        agent_executor = AgentExecutor(
+        # No memory here: history is per session and passed in on every invoke.
+        # Tool calls the model batches into one turn run side by side.
+        return ParallelAgentExecutor(
             agent=agent,
             tools=tools,
-            memory=memory,
             verbose=True,
             handle_parsing_errors=True
         )
 
+    def _begin_turn(self, query, session_id):
+        """Refresh the context and load history; returns (memory, chat_history, cache key version, cached answer)."""
+        self.create_data_context()
+        memory = self.sessions.get(session_id) if session_id is not None else None
+        chat_history = memory.load_memory_variables({})["chat_history"] if memory is not None else []
+
+        # Follow-ups depend on the conversation, so only self-contained questions use the cache.
+        # The prompt carries today's date, so answers also expire at midnight.
+        version = (self.store.version, datetime.now().strftime('%Y-%m-%d'))
+        cached = self.answers.get(query, version) if not chat_history else None
+        return memory, chat_history, version, cached
+
+    def _end_turn(self, query, answer, memory, chat_history, version, cached) -> None:
+        if answer is None:
+            return
+        CHAT_ANSWERS.inc(source="cache" if cached is not None else "agent")
+        if cached is None and not chat_history:
+            self.answers.put(query, version, answer)
+        if memory is not None:
+            memory.save_context({"input": query}, {"output": answer})
+
+    def ask(self, query: str, session_id: str | None = None) -> str:
+        """
+        Run one query through the shared agent.
+        With a session_id the session's history is used and extended; without one the call is stateless.
+        Questions asked without prior history are answered from the answer cache when the data hasn't changed.
+        """
+        with CHAT_STAGE_LATENCY.time(stage="context"):
+            memory, chat_history, version, answer = self._begin_turn(query, session_id)
+        cached = answer
+        if answer is None:
+            with CHAT_STAGE_LATENCY.time(stage="agent"):
+                result = self.agent_executor.invoke({"input": query, "chat_history": chat_history},
+                                                    config={"callbacks": [self.metrics]})
+            answer = result["output"]
+        self._end_turn(query, answer, memory, chat_history, version, cached)
+        return answer
+
+    async def astream(self, query: str, session_id: str | None = None):
+        """
+        Async version of ask() that yields events as the agent works:
+        {"event": "tool_start" | "tool_end", "tool": ...}, {"event": "token", "text": ...}
+        and finally {"event": "done", "response": ...}.
+        """
+        with CHAT_STAGE_LATENCY.time(stage="context"):
+            memory, chat_history, version, answer = self._begin_turn(query, session_id)
+        cached = answer
+
+        if answer is not None:
+            yield {"event": "token", "text": answer}
+        else:
+            started = time.perf_counter()
+            tool_inputs = ToolInputs()
+            events = self.agent_executor.astream_events(
+                {"input": query, "chat_history": chat_history}, version="v2",
+                config={"callbacks": [self.metrics, tool_inputs]}
+            )
+            tool_runs = set()  # run_ids of tool runs seen so far in this turn
+            async for event in events:
+                kind = event["event"]
+                if kind == "on_chat_model_stream":
+                    text = event["data"]["chunk"].content
+                    if text:
+                        yield {"event": "token", "text": text}
+                elif kind in ("on_tool_start", "on_tool_end"):
+                    # Hugo's Tool wrappers call @tool functions, which start a nested run of the same tool
+                    nested = any(parent in tool_runs for parent in event.get("parent_ids", ()))
+                    tool_runs.add(event["run_id"])
+                    if nested:
+                        continue
+                    if kind == "on_tool_start":
+                        tool_input = tool_inputs.pop(event["run_id"], str(event["data"].get("input")))
+                        yield {"event": "tool_start", "tool": event["name"], "input": tool_input}
+                    else:
+                        yield {"event": "tool_end", "tool": event["name"]}
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    # end of the top-level AgentExecutor run
+                    answer = event["data"]["output"]["output"]
+            CHAT_STAGE_LATENCY.observe(time.perf_counter() - started, stage="agent")
+
+        self._end_turn(query, answer, memory, chat_history, version, cached)
+        yield {"event": "done", "response": answer}
+
+    def stream(self, query: str, session_id: str | None = None):
+        """Synchronous iterator over astream() events, driven on the shared background event loop."""
+        return iterate_in_loop(lambda: self.astream(query, session_id))
+
+    def chat(self, query: str | None = None, session_id: str | None = None):
         if query is not None:
-            result = agent_executor.invoke({"input": query})
-            return result["output"]
+            return self.ask(query, session_id)
 
         print("Welcome to Hugo, your inventory management assistant.")
         print("Ask me anything about parts, suppliers, orders, or production capacity.")
         print("Type 'exit' to quit.")
 
         while True:
-            user_input = query
+            user_input = input("\nYou: ").strip()
             if user_input.lower() in ["exit", "quit", "bye"]:
                 print("Goodbye!")
                 return
                 
             
             try:
-                result = agent_executor.invoke({"input": user_input})
-                print("\nHugo:", result["output"])
+                print("\nHugo:", self.ask(user_input, session_id or "cli"))
             except Exception as e:
                 print(f"\nI encountered an error while processing your request: {str(e)}")
 
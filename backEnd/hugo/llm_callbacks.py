@@ -0,0 +1,90 @@
+import threading
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from metrics import LLM_LATENCY, LLM_REQUESTS, LLM_TOKENS, TOOL_CALLS, TOOL_LATENCY
+
+
+class MetricsCallback(BaseCallbackHandler):
+    """LangChain callback that feeds LLM and tool calls of an agent run into the registry."""
+
+    def __init__(self) -> None:
+        self._runs = {}  # run_id -> (label, started)
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, label) -> None:
+        with self._lock:
+            self._runs[run_id] = (label, time.perf_counter())
+
+    def _stop(self, run_id):
+        with self._lock:
+            label, started = self._runs.pop(run_id, (None, None))
+        return label, (time.perf_counter() - started if started is not None else None)
+
+    # --- LLM ---
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, invocation_params=None, **kwargs):
+        params = invocation_params or {}
+        model = (metadata or {}).get("ls_model_name") or params.get("model_name") or params.get("model") or "unknown"
+        self._start(run_id, model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        model, seconds = self._stop(run_id)
+        if model is None:
+            return
+        LLM_LATENCY.observe(seconds, model=model)
+        LLM_REQUESTS.inc(model=model, status="ok")
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    LLM_TOKENS.inc(usage.get("input_tokens", 0), model=model, kind="prompt")
+                    LLM_TOKENS.inc(usage.get("output_tokens", 0), model=model, kind="completion")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        model, seconds = self._stop(run_id)
+        if model is not None:
+            LLM_LATENCY.observe(seconds, model=model)
+            LLM_REQUESTS.inc(model=model, status="error")
+
+    # --- TOOLS ---
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        # Hugo's Tool wrappers call @tool functions, which start a nested run of the same tool
+        with self._lock:
+            if parent_run_id in self._runs:
+                return
+        self._start(run_id, (serialized or {}).get("name") or kwargs.get("name") or "unknown")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        tool, seconds = self._stop(run_id)
+        if tool is not None:
+            TOOL_LATENCY.observe(seconds, tool=tool)
+            TOOL_CALLS.inc(tool=tool, status="ok")
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        tool, seconds = self._stop(run_id)
+        if tool is not None:
+            TOOL_LATENCY.observe(seconds, tool=tool)
+            TOOL_CALLS.inc(tool=tool, status="error")
+
+
+class ToolInputs(BaseCallbackHandler):
+    """
+    Raw input string of every tool run, by run_id. astream_events only carries dict
+    inputs, so a Tool called with a plain string shows up there as {}.
+    Runs inline, i.e. before the event stream sees the same tool start.
+    """
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._inputs = {}
+        self._lock = threading.Lock()
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        with self._lock:
+            self._inputs[str(run_id)] = input_str
+
+    def pop(self, run_id, default=None):
+        with self._lock:
+            return self._inputs.pop(str(run_id), default)
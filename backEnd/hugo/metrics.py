@@ -0,0 +1,251 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) for latency histograms; +Inf is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Per-request profiling is only honoured when this is set (see start_profiler)
+PROFILE_ENABLED = os.getenv("HUGO_PROFILE") == "1"
+PROFILE_DIR = os.getenv("HUGO_PROFILE_DIR", "profiles")
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name, help, labels=()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [per-bucket counts (+Inf last), sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][slot] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += count
+                    le = bound if bound == "+Inf" else _number(bound)
+                    lines.append(f"{self.name}_bucket{_labels(names, key + (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {total}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Counter or gauge read at scrape time from `read()` -> {label values tuple: value}."""
+
+    def __init__(self, name, help, kind, read, labels=()) -> None:
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.read = read
+        self.label_names = tuple(labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in sorted(self.read().items()):
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            # re-registering (e.g. a second Hugo in one process) keeps the first metric
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labels=()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# === METRICS ===
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "Time to build the HTTP response (streams: until the first byte).",
+    ("method", "route"))
+
+FIRESTORE_OPS = REGISTRY.counter(
+    "firestore_operations_total", "Firestore round trips by operation and collection.", ("op", "collection"))
+FIRESTORE_LATENCY = REGISTRY.histogram(
+    "firestore_operation_duration_seconds", "Firestore round-trip latency.", ("op",))
+FIRESTORE_DOCUMENTS = REGISTRY.counter(
+    "firestore_documents_total", "Documents read or written.", ("op", "collection"))
+FIRESTORE_BYTES = REGISTRY.counter(
+    "firestore_bytes_total", "Approximate JSON size of documents read or written.", ("direction",))
+SNAPSHOT_CHANGES = REGISTRY.counter(
+    "hugo_snapshot_changes_total", "Document changes applied from snapshot listeners.", ("collection",))
+
+CHAT_STAGE_LATENCY = REGISTRY.histogram(
+    "hugo_chat_stage_duration_seconds", "Time per chat stage (context refresh, agent run).", ("stage",))
+CHAT_ANSWERS = REGISTRY.counter(
+    "hugo_chat_answers_total", "Chat answers by source (agent or answer cache).", ("source",))
+
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "LLM calls by model and outcome.", ("model", "status"))
+LLM_LATENCY = REGISTRY.histogram(
+    "llm_request_duration_seconds", "LLM call latency.", ("model",))
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "LLM tokens by model and kind (prompt / completion).", ("model", "kind"))
+
+TOOL_CALLS = REGISTRY.counter(
+    "hugo_tool_calls_total", "Agent tool invocations by tool and outcome.", ("tool", "status"))
+TOOL_LATENCY = REGISTRY.histogram(
+    "hugo_tool_duration_seconds", "Agent tool latency.", ("tool",))
+
+REORDER_SWEEP_LATENCY = REGISTRY.histogram(
+    "hugo_reorder_sweep_duration_seconds", "Time per reorder scheduler sweep.")
+REORDER_DRAFTS = REGISTRY.counter(
+    "hugo_reorder_drafts_total", "Draft purchase orders written by the reorder scheduler.")
+
+
+@contextmanager
+def firestore_op(op, collection):
+    """Count and time one Firestore round trip."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        FIRESTORE_LATENCY.observe(time.perf_counter() - started, op=op)
+        FIRESTORE_OPS.inc(op=op, collection=collection)
+
+
+def record_documents(op, collection, count, nbytes=0) -> None:
+    FIRESTORE_DOCUMENTS.inc(count, op=op, collection=collection)
+    if nbytes:
+        FIRESTORE_BYTES.inc(nbytes, direction="read" if op in ("get", "list", "batch_get") else "write")
+
+
+@contextmanager
+def llm_call(model):
+    """Count and time one direct openai chat.completions call; a call that raises counts as an error."""
+    started = time.perf_counter()
+    status = "error"
+    try:
+        yield
+        status = "ok"
+    finally:
+        LLM_LATENCY.observe(time.perf_counter() - started, model=model)
+        LLM_REQUESTS.inc(model=model, status=status)
+
+
+def record_usage(model, response) -> None:
+    """Token counts of a chat.completions response."""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, model=model, kind="prompt")
+        LLM_TOKENS.inc(usage.completion_tokens or 0, model=model, kind="completion")
+
+
+# === PROFILING ===
+class _Profile:
+    def __init__(self) -> None:
+        try:
+            from pyinstrument import Profiler
+            self._sampler = Profiler(interval=0.001)
+            self._sampler.start()
+            self._cprofile = None
+        except ImportError:
+            import cProfile
+            self._sampler = None
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def stop(self, name) -> str:
+        """Stop profiling and write the report under PROFILE_DIR; returns its path."""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        if self._sampler is not None:
+            self._sampler.stop()
+            path = os.path.join(PROFILE_DIR, f"{stamp}-{name}.html")
+            with open(path, "w") as f:
+                f.write(self._sampler.output_html())
+        else:
+            self._cprofile.disable()
+            path = os.path.join(PROFILE_DIR, f"{stamp}-{name}.prof")
+            self._cprofile.dump_stats(path)
+        return path
+
+
+def start_profiler(requested: bool):
+    """
+    Start profiling the current request when HUGO_PROFILE=1 and the caller asked for it.
+    Uses pyinstrument's sampler when installed, otherwise cProfile. Returns None when off.
+    """
+    if not (PROFILE_ENABLED and requested):
+        return None
+    return _Profile()
@@ -0,0 +1,278 @@
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from bom import spec_for_sale
+
+# Orders in these states still have stock on the way
+OPEN_ORDER_STATUSES = ('ordered', 'delayed')
+BUCKET_DAYS = {'day': 1, 'week': 7}
+HORIZON_DAYS = 120
+# Sales orders carry no fulfilment status, so a past-dated sale is still owed: it lands in the
+# first bucket as overdue demand. Only sales requested more than this many days back count as closed
+DEMAND_LOOKBACK_DAYS = int(os.getenv("HUGO_DEMAND_LOOKBACK_DAYS", 730))
+
+PLAN_COLUMNS = ['part_id', 'on_hand', 'shortage_date', 'shortage_qty', 'projected_end',
+                'lead_time_days', 'order_by', 'late']
+
+
+def _parse_date(value):
+    """'2025-05-13' (or a date / datetime) -> date; anything else -> None."""
+    if isinstance(value, date):
+        return value if not hasattr(value, 'date') else value.date()
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+def open_sales(sales, as_of=None, lookback_days=DEMAND_LOOKBACK_DAYS) -> list:
+    """Sales still to be served: requested no more than `lookback_days` before `as_of` (default today)."""
+    since = (as_of or date.today()) - timedelta(days=lookback_days)
+    kept = []
+    for sale in sales:
+        requested = _parse_date(sale.requested_date)
+        if requested is not None and requested >= since:
+            kept.append(sale)
+    return kept
+
+
+def lead_times(suppliers) -> pd.Series:
+    """part_id -> shortest supplier lead time in days, from Supplier objects."""
+    rows = [(s.part_id, s.lead_time_days) for s in suppliers if s.lead_time_days is not None]
+    if not rows:
+        return pd.Series(dtype=float)
+    frame = pd.DataFrame(rows, columns=['part_id', 'lead_time_days'])
+    return pd.to_numeric(frame['lead_time_days'], errors='coerce').groupby(frame['part_id']).min()
+
+
+class MrpProjection:
+    """
+    Time-phased material plan: per part and per day (or week) bucket, the demand from
+    sales orders (exploded through the BOM matrix), the receipts from open purchase
+    orders and the projected on-hand stock = stock + cumsum(receipts - demand).
+
+    Demand and receipts are kept as parts x buckets matrices. `on_change` (a LiveStore
+    listener) applies one order or sale by subtracting its old contribution and adding
+    its new one, and only the touched parts are re-projected on the next read. Spec
+    edits and the date rolling over trigger a full rebuild through `load()`, which
+    returns (version, parts, orders, sales) from one consistent store snapshot; changes
+    whose version the rebuild already covers are not applied again (version None: always
+    applied). Past-dated sales and receipts fall into the first bucket (overdue); sales
+    requested more than `lookback_days` before it count as closed and dates past the
+    horizon are left out.
+    """
+
+    def __init__(self, bom, load, bucket="day", horizon_days=HORIZON_DAYS, start=None,
+                 lookback_days=DEMAND_LOOKBACK_DAYS) -> None:
+        self.bom = bom
+        self.load = load
+        self.bucket_days = BUCKET_DAYS[bucket]
+        self.buckets = -(-horizon_days // self.bucket_days)
+        self.fixed_start = start
+        self.lookback_days = lookback_days
+        self.start = None
+        self.version = 0
+        self._loaded_version = None
+        self._stale = True
+        self._lock = threading.RLock()
+
+    # === BUILD ===
+    def _part_row(self, part_id) -> int:
+        row = self.part_index.get(part_id)
+        if row is None:
+            row = self.part_index[part_id] = len(self.part_ids)
+            self.part_ids.append(part_id)
+            for name in ('demand', 'receipts', 'projected'):
+                setattr(self, name, np.vstack([getattr(self, name), np.zeros((1, self.buckets))]))
+            self.stock = np.append(self.stock, 0.0)
+            self._dirty.add(row)
+        return row
+
+    def _bucket(self, value):
+        day = _parse_date(value)
+        if day is None:
+            return None
+        bucket = max((day - self.start).days // self.bucket_days, 0)
+        return bucket if bucket < self.buckets else None
+
+    def _rebuild(self) -> None:
+        self._loaded_version, parts, orders, sales = self.load()
+        self.start = self.fixed_start or date.today()
+        self.part_ids = [p.part_id for p in parts]
+        self.part_index = {part_id: row for row, part_id in enumerate(self.part_ids)}
+        self.stock = np.array([self._usable(p) for p in parts], dtype=float)
+        self.demand = np.zeros((len(self.part_ids), self.buckets))
+        self.receipts = np.zeros((len(self.part_ids), self.buckets))
+        self.projected = np.zeros((len(self.part_ids), self.buckets))
+        self._bom_rows = np.zeros(0, dtype=np.int64)
+        self._dirty = set()
+
+        for order in orders:
+            self._apply_order(order, 1)
+        spec_rows, buckets, units = [], [], []
+        for sale in sales:
+            entry = self._sale_entry(sale)
+            if entry is not None:
+                spec_rows.append(entry[0])
+                buckets.append(entry[1])
+                units.append(entry[2])
+        self._apply_demand(np.array(spec_rows, dtype=np.int64), np.array(buckets, dtype=np.int64),
+                           np.array(units, dtype=float))
+
+        self.projected = self.stock[:, None] + np.cumsum(self.receipts - self.demand, axis=1)
+        self._dirty = set()
+        self._stale = False
+        self.version += 1
+
+    @staticmethod
+    def _usable(part) -> float:
+        if part.blocked or part.quantity is None:
+            return 0.0
+        return max(float(part.quantity), 0.0)
+
+    # === CONTRIBUTIONS ===
+    def _apply_order(self, order, sign) -> None:
+        if order is None or order.status not in OPEN_ORDER_STATUSES or not order.quantity_ordered:
+            return
+        bucket = self._bucket(order.expected_delivery_date)
+        if bucket is None:
+            return
+        row = self._part_row(order.part_id)
+        self.receipts[row, bucket] += sign * float(order.quantity_ordered)
+        self._dirty.add(row)
+
+    def _sale_entry(self, sale):
+        """(BOM row, bucket, units) for a sales order, or None if it adds no demand."""
+        if sale is None or not sale.quantity:
+            return None
+        spec_row = self.bom.spec_index.get(spec_for_sale(sale.model, sale.version))
+        if not open_sales([sale], self.start, self.lookback_days):
+            return None
+        bucket = self._bucket(sale.requested_date)
+        if spec_row is None or bucket is None:
+            return None
+        return spec_row, bucket, float(sale.quantity)
+
+    def _apply_demand(self, spec_rows, buckets, units, sign=1) -> None:
+        """Explode (spec row, bucket, units) triples through the BOM into the demand matrix at once."""
+        if not len(spec_rows):
+            return
+        bom = self.bom
+        with bom._lock:
+            # BOM columns -> our part rows, extended as the BOM learns new parts
+            if len(self._bom_rows) < len(bom.part_ids):
+                new = [self._part_row(part_id) for part_id in bom.part_ids[len(self._bom_rows):]]
+                self._bom_rows = np.concatenate([self._bom_rows, np.array(new, dtype=np.int64)])
+            starts = bom.indptr[spec_rows]
+            counts = bom.indptr[spec_rows + 1] - starts
+            # indices of every BOM entry of every triple, in one vector
+            entries = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            rows = self._bom_rows[bom.indices[entries]]
+            qty = bom.data[entries] * np.repeat(units, counts) * sign
+        np.add.at(self.demand, (rows, np.repeat(buckets, counts)), qty)
+        self._dirty.update(rows.tolist())
+
+    def on_change(self, collection, doc_id, old, new, version=None) -> None:
+        """
+        LiveStore listener: fold one part, order, sale or spec change into the plan.
+        `version` is the store version of the change; a rebuild that loaded it already counts it.
+        """
+        with self._lock:
+            if self._stale:
+                return
+            if version is not None and self._loaded_version is not None and version <= self._loaded_version:
+                return
+            if collection == 'orders':
+                self._apply_order(old, -1)
+                self._apply_order(new, 1)
+            elif collection == 'sales':
+                for sale, sign in ((old, -1), (new, 1)):
+                    entry = self._sale_entry(sale)
+                    if entry is not None:
+                        self._apply_demand(np.array([entry[0]]), np.array([entry[1]]), np.array([entry[2]]), sign)
+            elif collection == 'parts':
+                row = self._part_row(doc_id)
+                self.stock[row] = self._usable(new) if new is not None else 0.0
+                self._dirty.add(row)
+            elif collection == 'specs':
+                # a BOM edit changes the demand of every sale of that spec
+                self._stale = True
+                return
+            else:
+                return
+            self.version += 1
+
+    # === READS ===
+    def refresh(self) -> None:
+        """Rebuild if stale or the day rolled over, else re-project only the parts that changed."""
+        with self._lock:
+            if self._stale or (self.fixed_start is None and self.start != date.today()):
+                self._rebuild()
+                return
+            if self._dirty:
+                rows = np.fromiter(self._dirty, dtype=np.int64)
+                self.projected[rows] = self.stock[rows, None] + np.cumsum(
+                    self.receipts[rows] - self.demand[rows], axis=1)
+                self._dirty = set()
+
+    def bucket_dates(self) -> list:
+        return [self.start + timedelta(days=b * self.bucket_days) for b in range(self.buckets)]
+
+    def plan(self, lead_time_days: pd.Series, part_ids=None, shortages_only=True) -> pd.DataFrame:
+        """
+        Per part: on-hand stock, first bucket where projected stock goes negative, the
+        largest deficit in the horizon, projected stock at the end, the shortest supplier
+        lead time and the date an order has to be placed by (shortage date - lead time;
+        `late` when that is before the first bucket). Earliest order-by first.
+        """
+        self.refresh()
+        with self._lock:
+            ids = np.asarray(self.part_ids, dtype=object)
+            projected = self.projected
+            rows = (np.arange(len(ids)) if part_ids is None
+                    else np.array([self.part_index[p] for p in part_ids if p in self.part_index], dtype=np.int64))
+            projected, ids, on_hand = projected[rows], ids[rows], self.stock[rows]
+            start, bucket_days = self.start, self.bucket_days
+
+        below = projected < 0
+        short = below.any(axis=1)
+        if shortages_only:
+            projected, ids, on_hand, below, short = projected[short], ids[short], on_hand[short], below[short], short[short]
+
+        first = np.where(short, below.argmax(axis=1), -1)
+        shortage_date = pd.Series(pd.Timestamp(start) + pd.to_timedelta(first * bucket_days, unit='D')).where(short)
+        lead = lead_time_days.reindex(ids).to_numpy(dtype=float)
+        order_by = shortage_date - pd.to_timedelta(lead, unit='D')
+
+        table = pd.DataFrame({
+            'part_id': ids,
+            'on_hand': on_hand,
+            'shortage_date': shortage_date,
+            'shortage_qty': np.clip(-projected.min(axis=1, initial=0), 0, None),
+            'projected_end': projected[:, -1] if projected.shape[1] else on_hand,
+            'lead_time_days': lead,
+            'order_by': order_by,
+            'late': (order_by < pd.Timestamp(start)).to_numpy(),
+        })
+        table = table.sort_values(['order_by', 'part_id'], na_position='last', kind='stable')
+        for column in ('shortage_date', 'order_by'):
+            table[column] = table[column].dt.date
+        # NaN / NaT -> None so the rows serialise as JSON null
+        return table.astype(object).where(table.notna(), None).reset_index(drop=True)[PLAN_COLUMNS]
+
+    def projection(self, part_id) -> list:
+        """Bucket-by-bucket demand, receipts and projected on-hand for one part, or [] if unknown."""
+        self.refresh()
+        with self._lock:
+            row = self.part_index.get(part_id)
+            if row is None:
+                return []
+            return [
+                {'date': day.isoformat(), 'demand': float(d), 'receipts': float(r), 'on_hand': float(p)}
+                for day, d, r, p in zip(self.bucket_dates(), self.demand[row], self.receipts[row],
+                                        self.projected[row])
+            ]
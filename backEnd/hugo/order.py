@@ -1,4 +1,7 @@
 class Order:
+    __slots__ = ('order_id', 'part_id', 'quantity_ordered', 'order_date',
+                 'expected_delivery_date', 'supplier_id', 'status', 'actual_delivered_at')
+
     def __init__(self, order_id, part_id, quantity_ordered, order_date,
                 expected_delivery_date, supplier_id, status, actual_delivered_at):
         self.order_id = order_id
@@ -11,4 +14,7 @@ class Order:
         self.actual_delivered_at = actual_delivered_at
 
     def __repr__(self):
-        return f"Order({self.order_id}, {self.part_id}, {self.quantity_ordered})"
\ No newline at end of file
+        return f"Order({self.order_id}, {self.part_id}, {self.quantity_ordered})"
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
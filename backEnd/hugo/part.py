@@ -1,4 +1,8 @@
 class Part:
+    __slots__ = ('part_id', 'min_stock', 'reorder_quantity', 'reorder_interval_days',
+                 'part_name', 'part_type', 'used_in_models', 'weight', 'location',
+                 'quantity', 'blocked', 'comments', 'successor_part', 'stock_level')
+
     def __init__(self, part_id, min_stock, reorder_quantity, reorder_interval_days,
                 part_name, part_type, used_in_models, weight, location, quantity, blocked=False, comments="", successor_part=None
                 ):
@@ -8,7 +12,9 @@ class Part:
         self.reorder_interval_days = reorder_interval_days
         self.part_name = part_name
         self.part_type = part_type
-        self.used_in_models = used_in_models.split(';') if isinstance(used_in_models, str) else []
+        if isinstance(used_in_models, str):
+            used_in_models = used_in_models.split(';')
+        self.used_in_models = list(used_in_models) if used_in_models else []
         self.weight = float(weight)
         self.location = location
         self.quantity = quantity
@@ -18,8 +24,16 @@ class Part:
         self.stock_level = 0
 
     def needs_reorder(self):
-        """Check if stock level is below minimum stock level."""
-        return self.stock_level < self.min_stock and not self.blocked
+        """Check if the quantity on hand is below the minimum stock level."""
+        if self.quantity is None or self.min_stock is None:
+            return False
+        return self.quantity < self.min_stock and not self.blocked
+
+    def stock_bucket(self):
+        """'low' when quantity is at or below the minimum stock level, otherwise 'ok'."""
+        if self.quantity is None or self.min_stock is None:
+            return None
+        return 'low' if self.quantity <= self.min_stock else 'ok'
 
     def block_part(self, reason=""):
         """Block the part and optionally update comments."""
@@ -55,4 +69,8 @@ class Part:
             "Reorder Quantity": self.reorder_quantity,
             "Reorder Interval (Days)": self.reorder_interval_days,
             "Current Stock": self.stock_level
-        }
\ No newline at end of file
+        }
+
+    def to_dict(self):
+        """Plain dict of the raw fields (what vars() used to return)."""
+        return {name: getattr(self, name) for name in self.__slots__}
@@ -0,0 +1,208 @@
+import math
+import os
+import re
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+# Rough prompt budget for retrieved rows; ~4 characters per token for this kind of text
+TOKEN_BUDGET = 2500
+CHARS_PER_TOKEN = 4
+# Mentioning an exact id (P304, O5012, S6001, SupA) outweighs any amount of word overlap
+ID_BOOST = 10.0
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Specs and orders sort after every parts row when scores tie
+RANK_OFFSET = 1 << 40
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Columns serialised per kind, in order; one compact "a|b|c" line per row
+COLUMNS = {
+    'parts': ['part_id', 'part_name', 'quantity', 'min_stock', 'stock_status',
+              'status_category', 'usage_count', 'blocked', 'comments'],
+    'specs': ['spec_name', 'bom'],
+    'orders': ['order_id', 'part_id', 'quantity_ordered', 'order_date',
+               'expected_delivery_date', 'supplier_id', 'status'],
+}
+
+
+def tokenize(text) -> list:
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def _cell(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.0f}" if math.isfinite(value) else ""
+    if value is None:
+        return ""
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def load_embedder():
+    """Local sentence-transformers embedder when HUGO_EMBEDDINGS=1 and the package is installed."""
+    if os.getenv("HUGO_EMBEDDINGS") != "1":
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    model = SentenceTransformer(EMBEDDING_MODEL)
+    return lambda texts: model.encode(texts, normalize_embeddings=True)
+
+
+class Retriever:
+    """
+    Picks the rows of the parts summary, specs and orders that are relevant to a
+    question and serialises them compactly within a token budget, so prompt size
+    stays bounded however big the catalogue gets.
+
+    Rows are kept up to date in place: `put` re-indexes one spec or order and
+    `sync_parts` the parts summary, and only rows whose line changed are embedded
+    again (in one batch, on the next question).
+    """
+
+    def __init__(self, summary_rows, specs, orders, embedder=None) -> None:
+        self.rows = []        # (kind, row_id, line), None once removed
+        self.slots = {}       # (kind, row_id) -> row index
+        self.rank = []        # fallback order for ties: parts in table order, then the rest as added
+        self.ids = defaultdict(set)       # lowercased id -> row indexes
+        self.postings = defaultdict(set)  # token -> row indexes
+        self.live = 0
+        self.embedder = embedder
+        self.vectors = None
+        self._unembedded = set()
+        self._lock = threading.RLock()
+
+        self.sync_parts(summary_rows)
+        for spec in specs:
+            self.put('specs', spec['spec_name'], spec)
+        for order in orders:
+            self.put('orders', order.order_id, order)
+
+    @staticmethod
+    def _values(kind, row) -> list:
+        if kind == 'parts':
+            return [row.get(c) for c in COLUMNS['parts']]
+        if kind == 'specs':
+            bom = " ".join(f"{item['Part_ID']}x{item['Qty']}" for item in row.get('bill of materials', []))
+            return [row['spec_name'], bom]
+        return [getattr(row, c) for c in COLUMNS['orders']]
+
+    # === UPDATES ===
+    def put(self, kind, row_id, row, rank=None) -> None:
+        """Add, replace or (row None) remove one row; unchanged lines are left alone."""
+        with self._lock:
+            index = self.slots.get((kind, row_id))
+            line = None if row is None else "|".join(_cell(v) for v in self._values(kind, row))
+            if index is not None:
+                if rank is not None:
+                    self.rank[index] = rank
+                if self.rows[index][2] == line:
+                    return
+                self._unindex(index)
+            elif line is None:
+                return
+            else:
+                index = self.slots[(kind, row_id)] = len(self.rows)
+                self.rows.append(None)
+                self.rank.append(rank if rank is not None else RANK_OFFSET + index)
+
+            if line is None:
+                del self.slots[(kind, row_id)]
+                self._unembedded.discard(index)
+                return
+            self.rows[index] = (kind, row_id, line)
+            self.live += 1
+            for token in set(tokenize(line)):
+                self.postings[token].add(index)
+            if row_id is not None:
+                self.ids[str(row_id).lower()].add(index)
+            self._unembedded.add(index)
+
+    def _unindex(self, index) -> None:
+        _, row_id, line = self.rows[index]
+        for token in set(tokenize(line)):
+            self.postings[token].discard(index)
+        if row_id is not None:
+            self.ids[str(row_id).lower()].discard(index)
+        self.rows[index] = None
+        self.live -= 1
+        if self.vectors is not None and index < len(self.vectors):
+            self.vectors[index] = 0
+
+    def sync_parts(self, summary_rows) -> None:
+        """Bring the parts rows in line with a (re)computed summary table, in its order."""
+        with self._lock:
+            seen = set()
+            for position, row in enumerate(summary_rows):
+                self.put('parts', row['part_id'], row, rank=position)
+                seen.add(row['part_id'])
+            for kind, row_id in [key for key in self.slots if key[0] == 'parts' and key[1] not in seen]:
+                self.put(kind, row_id, None)
+
+    def _embed(self) -> None:
+        """Embed the rows added or changed since the last question, in one call."""
+        if self.embedder is None or not self._unembedded:
+            return
+        indexes = sorted(self._unembedded)
+        vectors = np.asarray(self.embedder([self.rows[i][2] for i in indexes]))
+        if self.vectors is None:
+            self.vectors = np.zeros((len(self.rows), vectors.shape[1]))
+        elif len(self.vectors) < len(self.rows):
+            grown = np.zeros((max(len(self.rows), 2 * len(self.vectors)), self.vectors.shape[1]))
+            grown[:len(self.vectors)] = self.vectors
+            self.vectors = grown
+        self.vectors[indexes] = vectors
+        self._unembedded = set()
+
+    # === QUERIES ===
+    def _scores(self, question) -> np.ndarray:
+        scores = np.zeros(len(self.rows))
+        n = max(self.live, 1)
+        for token in set(tokenize(question)):
+            for index in self.ids.get(token, ()):
+                scores[index] += ID_BOOST
+            rows = self.postings.get(token)
+            if rows:
+                # idf over the rows currently indexed
+                scores[list(rows)] += math.log(1 + n / len(rows))
+        self._embed()
+        if self.vectors is not None:
+            query = np.asarray(self.embedder([question]))[0]
+            scores += np.clip(self.vectors[:len(self.rows)] @ query, 0, None) * ID_BOOST / 2
+        return scores
+
+    def context(self, question, kinds=('parts', 'specs', 'orders'), budget=TOKEN_BUDGET) -> str:
+        """
+        Compact text block of the best-matching rows of `kinds`, at most ~`budget` tokens.
+        Rows with no match fall back to table order, which puts blocked/critical parts first.
+        """
+        with self._lock:
+            if not self.live:
+                return ""
+            scores = self._scores(question)
+            rows = list(self.rows)
+            # ties (including all-zero) keep table order
+            order = np.lexsort((np.asarray(self.rank), -scores))
+
+        char_budget = budget * CHARS_PER_TOKEN
+        picked = defaultdict(list)
+        used = 0
+        for index in order:
+            if rows[index] is None:
+                continue
+            kind, _, line = rows[index]
+            if kind not in kinds:
+                continue
+            if used + len(line) + 1 > char_budget:
+                break
+            picked[kind].append(line)
+            used += len(line) + 1
+
+        blocks = []
+        for kind in kinds:
+            if picked[kind]:
+                header = "|".join(COLUMNS[kind])
+                blocks.append(f"{kind} ({header}):\n" + "\n".join(picked[kind]))
+        return "\n\n".join(blocks)
@@ -1,4 +1,7 @@
 class Sales:
+    __slots__ = ('sales_order_id', 'model', 'version', 'quantity', 'order_type',
+                 'requested_date', 'created_at', 'accepted_request_date')
+
     def __init__(self, sales_order_id, model, version, quantity, order_type, requested_date, created_at, accepted_request_date):
         self.sales_order_id = sales_order_id
         self.model = model
@@ -10,4 +13,7 @@ class Sales:
         self.accepted_request_date = accepted_request_date
 
     def __repr__(self):
-        return f"SalesOrder({self.sales_order_id}, {self.model}, {self.version}, Qty: {self.quantity})"
\ No newline at end of file
+        return f"SalesOrder({self.sales_order_id}, {self.model}, {self.version}, Qty: {self.quantity})"
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
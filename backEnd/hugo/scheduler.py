@@ -0,0 +1,188 @@
+import threading
+from datetime import date, timedelta
+
+import pandas as pd
+
+from metrics import REORDER_DRAFTS, REORDER_SWEEP_LATENCY, firestore_op, record_documents
+
+# Orders that already cover a part; drafts count so a part is drafted once until someone acts on it
+COVERING_ORDER_STATUSES = ('ordered', 'delayed', 'draft')
+# Firestore caps a write batch at 500 operations
+WRITE_BATCH_LIMIT = 500
+# Seconds to let a burst of stock changes settle before sweeping
+REORDER_DEBOUNCE = 5.0
+DIGEST_LINES = 20
+
+
+def reorder_candidates(parts, orders, today=None) -> pd.DataFrame:
+    """
+    Parts that need a reorder, decided for all parts at once with the Part.needs_reorder
+    rule (quantity below min_stock, not blocked) and skipping parts an open or draft
+    order already covers. Each gets the draft id DRAFT-<part_id>-<window>, where the
+    window is today's day number // reorder_interval_days, so every sweep in the same
+    interval lands on the same document. Columns: order_id, part_id, shortage, need_by,
+    window_end (first day of the part's next window, when the id changes).
+    """
+    today = today or date.today()
+    frame = pd.DataFrame([(p.part_id, p.quantity, p.min_stock, p.reorder_interval_days, p.blocked) for p in parts],
+                         columns=['part_id', 'quantity', 'min_stock', 'interval', 'blocked'])
+    quantity = pd.to_numeric(frame['quantity'], errors='coerce')
+    min_stock = pd.to_numeric(frame['min_stock'], errors='coerce')
+    covered = {o.part_id for o in orders if o.status in COVERING_ORDER_STATUSES}
+    due = (quantity < min_stock) & ~frame['blocked'].fillna(False).astype(bool) & ~frame['part_id'].isin(covered)
+
+    interval = pd.to_numeric(frame['interval'], errors='coerce').fillna(1).clip(lower=1).astype(int)[due]
+    part_ids = frame['part_id'][due].astype(str)
+    window = today.toordinal() // interval
+    return pd.DataFrame({
+        'order_id': 'DRAFT-' + part_ids + '-' + window.astype(str),
+        'part_id': part_ids,
+        'shortage': (min_stock - quantity)[due],
+        # the stock should be back before the part's next review
+        'need_by': [today + timedelta(days=int(days)) for days in interval],
+        'window_end': [date.fromordinal(int(start)) for start in (window + 1) * interval],
+    }).reset_index(drop=True)
+
+
+def format_digest(drafts, unsourced) -> str:
+    """One Slack message for a whole sweep."""
+    lines = [f"Reorder scheduler: {len(drafts)} draft purchase order(s) created"]
+    for order_id, doc in drafts[:DIGEST_LINES]:
+        lines.append(f"• {doc['part_id']}: {doc['quantity_ordered']} from {doc['supplier_id']}, "
+                     f"expected {doc['expected_delivery_date']} ({order_id})")
+    if len(drafts) > DIGEST_LINES:
+        lines.append(f"…and {len(drafts) - DIGEST_LINES} more")
+    if unsourced:
+        lines.append(f"No supplier with a lead time on file for: {', '.join(unsourced[:DIGEST_LINES])}")
+    return "\n".join(lines)
+
+
+class ReorderScheduler:
+    """
+    Background reorder loop. Every `interval` seconds, and shortly after a part drops
+    below its minimum stock, it sweeps all parts, writes one draft purchase order per
+    part that needs it (supplier and quantity from Hugo.sourcing_plan) to `orders` in
+    batched writes and posts a single digest through `notify(text)`.
+
+    Sweeps are idempotent: draft ids are fixed per part and reorder interval, and parts
+    with an open or draft order are skipped, so rerunning a sweep writes nothing new.
+    A part without a usable supplier is reported in one digest per reorder interval.
+    """
+
+    def __init__(self, hugo, db, notify=None, interval=3600.0, debounce=REORDER_DEBOUNCE) -> None:
+        self.hugo = hugo
+        self.db = db
+        self.notify = notify
+        self.interval = interval
+        self.debounce = debounce
+        self.last_sweep = None
+        # draft id -> end of its reorder window, for drafts written / unsourced parts reported
+        self._written = {}
+        self._notified = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # === SWEEP ===
+    def draft_orders(self):
+        """
+        ([(order_id, document)], [part_ids without a supplier]) for the parts due now; writes nothing.
+        A supplier with no lead time gives no delivery date to draft, so its part counts as unsourced.
+        """
+        drafts, unsourced, _ = self._plan(date.today())
+        return drafts, [part_id for _, part_id in unsourced]
+
+    def _plan(self, today):
+        """Drafts, [(order_id, part_id)] unsourced and {order_id: window_end} for the parts due on `today`."""
+        candidates = reorder_candidates(self.hugo.parts, self.hugo.orders, today)
+        store = self.hugo.store
+        fresh = [order_id not in self._written and store.get('orders', order_id) is None
+                 for order_id in candidates['order_id']]
+        candidates = candidates[fresh]
+        if candidates.empty:
+            return [], [], {}
+
+        plan = self.hugo.sourcing_plan(candidates[['part_id', 'shortage', 'need_by']].to_dict('records'))
+        plan = plan.merge(candidates[['part_id', 'order_id']], on='part_id')
+        drafts, unsourced = [], []
+        for row in plan.to_dict('records'):
+            if row['supplier_id'] is None or row['arrives'] is None:
+                unsourced.append((row['order_id'], row['part_id']))
+                continue
+            drafts.append((row['order_id'], {
+                'part_id': row['part_id'],
+                'quantity_ordered': int(row['quantity']),
+                'order_date': today.isoformat(),
+                'expected_delivery_date': row['arrives'].isoformat(),
+                'supplier_id': row['supplier_id'],
+                'status': 'draft',
+                'actual_delivered_at': None,
+            }))
+        return drafts, unsourced, dict(zip(candidates['order_id'], candidates['window_end']))
+
+    @staticmethod
+    def _prune(seen, today) -> None:
+        """Forget ids whose reorder window is over; the next window drafts under a new id."""
+        for order_id in [order_id for order_id, window_end in seen.items() if window_end <= today]:
+            del seen[order_id]
+
+    def sweep(self) -> list:
+        """Write the draft orders that are due and send the digest; returns the drafts written."""
+        with self._lock, REORDER_SWEEP_LATENCY.time():
+            today = date.today()
+            self._prune(self._written, today)
+            self._prune(self._notified, today)
+            drafts, unsourced, windows = self._plan(today)
+            orders = self.db.collection('orders')
+            for start in range(0, len(drafts), WRITE_BATCH_LIMIT):
+                chunk = drafts[start:start + WRITE_BATCH_LIMIT]
+                batch = self.db.batch()
+                for order_id, doc in chunk:
+                    batch.set(orders.document(order_id), doc)
+                with firestore_op('batch_commit', 'orders'):
+                    batch.commit()
+                self._written.update((order_id, windows[order_id]) for order_id, _ in chunk)
+                record_documents('batch_write', 'orders', len(chunk))
+            REORDER_DRAFTS.inc(len(drafts))
+            # report an unsourced part once per window, not on every sweep
+            new_unsourced = [(order_id, part_id) for order_id, part_id in unsourced if order_id not in self._notified]
+            self._notified.update((order_id, windows[order_id]) for order_id, _ in new_unsourced)
+            unsourced = [part_id for _, part_id in new_unsourced]
+            self.last_sweep = today
+
+        if (drafts or unsourced) and self.notify is not None:
+            try:
+                self.notify(format_digest(drafts, unsourced))
+            except Exception as e:
+                print(f"Reorder digest failed: {e}")
+        return drafts
+
+    # === TRIGGERS ===
+    def on_change(self, collection, doc_id, old, new) -> None:
+        """LiveStore listener: wake the loop when a part crosses below its minimum stock."""
+        if collection == 'parts' and new is not None and new.needs_reorder():
+            if old is None or not old.needs_reorder():
+                self._wake.set()
+
+    def start(self) -> None:
+        self.hugo.store.add_listener(self.on_change)
+        self._thread = threading.Thread(target=self._run, name="reorder-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                drafts = self.sweep()
+                if drafts:
+                    print(f"Reorder scheduler wrote {len(drafts)} draft orders")
+            except Exception as e:
+                print(f"Reorder sweep failed: {e}")
+            if self._wake.wait(self.interval) and not self._stop.is_set():
+                # one sweep for a whole burst of stock changes
+                self._stop.wait(self.debounce)
+            self._wake.clear()
@@ -0,0 +1,44 @@
+import threading
+from collections import OrderedDict
+
+# How many conversations we keep around and how many turns each one remembers
+MAX_SESSIONS = 256
+HISTORY_TURNS = 20
+
+
+class SessionStore:
+    """Bounded LRU store of per-session chat memories."""
+
+    def __init__(self, max_sessions=MAX_SESSIONS, history_turns=HISTORY_TURNS) -> None:
+        self.max_sessions = max_sessions
+        self.history_turns = history_turns
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str):
+        """Return the memory for a session, creating it (and evicting the oldest) if needed."""
+        with self._lock:
+            memory = self._sessions.get(session_id)
+            if memory is not None:
+                self._sessions.move_to_end(session_id)
+                return memory
+
+            # imported on first use: langchain.memory is slow to import
+            from langchain.memory import ConversationBufferWindowMemory
+            memory = ConversationBufferWindowMemory(
+                k=self.history_turns,
+                memory_key="chat_history",
+                return_messages=True
+            )
+            self._sessions[session_id] = memory
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return memory
+
+    def drop(self, session_id: str) -> None:
+        """Forget a session's history."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
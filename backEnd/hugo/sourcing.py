@@ -0,0 +1,86 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Expected cost is price / reliability ** weight: 1 makes a 0.8-reliable supplier cost 25% more
+RELIABILITY_WEIGHT = 1.0
+
+SUPPLY_COLUMNS = ['supplier_id', 'part_id', 'price_per_unit', 'lead_time_days', 'min_order_qty',
+                  'reliability_rating']
+SOURCING_COLUMNS = ['part_id', 'shortage', 'need_by', 'supplier_id', 'quantity', 'price_per_unit',
+                    'total_cost', 'lead_time_days', 'arrives', 'reliability_rating', 'meets_deadline',
+                    'suppliers']
+
+
+def supplier_table(suppliers) -> pd.DataFrame:
+    """Supplier objects as one numeric frame (one row per supplier and part)."""
+    table = pd.DataFrame([[getattr(s, c) for c in SUPPLY_COLUMNS] for s in suppliers], columns=SUPPLY_COLUMNS)
+    for column in SUPPLY_COLUMNS[2:]:
+        table[column] = pd.to_numeric(table[column], errors='coerce')
+    table['min_order_qty'] = table['min_order_qty'].fillna(0)
+    # an unrated supplier is taken at face value
+    table['reliability_rating'] = table['reliability_rating'].fillna(1.0).clip(0.01, 1.0)
+    return table.dropna(subset=['part_id', 'price_per_unit'])
+
+
+def reorder_quantities(parts) -> pd.Series:
+    """part_id -> reorder_quantity from Part objects."""
+    return pd.to_numeric(pd.Series({p.part_id: p.reorder_quantity for p in parts}, dtype=object), errors='coerce')
+
+
+def plan_shortages(plan: pd.DataFrame) -> pd.DataFrame:
+    """Shortages to source from an MRP plan: the deficit, needed by the shortage date."""
+    return pd.DataFrame({'part_id': plan['part_id'], 'shortage': plan['shortage_qty'],
+                         'need_by': plan['shortage_date']})
+
+
+def choose_suppliers(shortages: pd.DataFrame, supply: pd.DataFrame, reorder_quantity: pd.Series = None,
+                     reliability_weight=RELIABILITY_WEIGHT, today=None) -> pd.DataFrame:
+    """
+    One purchase per short part, for every part at once.
+
+    `shortages` (a frame or a list of dicts) has part_id, shortage (units) and optionally
+    need_by (date; None for no deadline); `supply` is a `supplier_table`; `reorder_quantity` is part_id -> standard lot.
+    The quantity is max(shortage, reorder quantity, supplier MOQ). Among the suppliers
+    whose lead time gets the parts in by need_by, the one with the lowest expected cost
+    (price * quantity / reliability ** reliability_weight) wins; if none can make it,
+    the fastest one (cheapest on ties) and `meets_deadline` is False. Parts nobody
+    supplies keep a row with supplier_id None. Earliest need_by first.
+    """
+    today = today or date.today()
+    shortages = pd.DataFrame(shortages, columns=None if len(shortages) else ['part_id', 'shortage'])
+    need_by = shortages['need_by'] if 'need_by' in shortages else pd.Series(None, index=shortages.index)
+    wanted = pd.DataFrame({
+        'part_id': shortages['part_id'].to_numpy(dtype=object),
+        'shortage': pd.to_numeric(shortages['shortage'], errors='coerce').fillna(0).to_numpy(dtype=float),
+        'need_by': pd.to_datetime(need_by.to_numpy(dtype=object), errors='coerce'),
+    })
+    # a part listed twice is one purchase for the total, due by the earlier date
+    wanted = wanted.groupby('part_id', as_index=False, sort=False).agg(shortage=('shortage', 'sum'),
+                                                                      need_by=('need_by', 'min'))
+    wanted['lot'] = np.fmax(wanted['shortage'],
+                            (reorder_quantity if reorder_quantity is not None else pd.Series(dtype=float))
+                            .reindex(wanted['part_id']).to_numpy(dtype=float))
+
+    offers = wanted.merge(supply, on='part_id', how='left')
+    offers['quantity'] = np.ceil(np.fmax(offers['lot'], offers['min_order_qty'].fillna(0)))
+    offers['total_cost'] = offers['price_per_unit'] * offers['quantity']
+    expected = offers['total_cost'] / offers['reliability_rating'] ** reliability_weight
+    offers['arrives'] = pd.Timestamp(today) + pd.to_timedelta(offers['lead_time_days'], unit='D')
+    offers['meets_deadline'] = offers['need_by'].isna() | (offers['arrives'] <= offers['need_by'])
+    offers['suppliers'] = offers.groupby('part_id')['supplier_id'].transform('count')
+
+    # best offer per part: deadline met first, then cheapest expected cost; otherwise fastest
+    offers['late'] = ~offers['meets_deadline']
+    offers['rank'] = np.where(offers['late'], offers['lead_time_days'], expected)
+    offers['expected'] = expected
+    best = (offers.sort_values(['part_id', 'late', 'rank', 'expected'], na_position='last', kind='stable')
+                  .drop_duplicates('part_id'))
+    best.loc[best['supplier_id'].isna(), ['quantity', 'meets_deadline']] = [np.nan, False]
+
+    best = best.sort_values(['need_by', 'part_id'], na_position='last', kind='stable')
+    for column in ('need_by', 'arrives'):
+        best[column] = best[column].dt.date
+    # NaN / NaT -> None so the rows serialise as JSON null
+    return best[SOURCING_COLUMNS].astype(object).where(best[SOURCING_COLUMNS].notna(), None).reset_index(drop=True)
@@ -0,0 +1,160 @@
+import threading
+
+from metrics import SNAPSHOT_CHANGES
+
+# How long to wait for the first snapshot of a collection before giving up
+INITIAL_LOAD_TIMEOUT = 60
+
+
+class LiveStore:
+    """
+    In-memory mirror of Firestore collections.
+
+    Each collection is loaded once by its first snapshot and then kept fresh
+    by applying the `on_snapshot` deltas (added / modified / removed) in place.
+    Anything with `collection(name).on_snapshot(callback)` works as `db`, so the
+    Firestore emulator or a local fake can stand in for the real database.
+    """
+
+    def __init__(self, db, timeout=INITIAL_LOAD_TIMEOUT) -> None:
+        self.db = db
+        self.timeout = timeout
+        self.version = 0
+        self.versions = {}
+        self._factories = {}
+        self._items = {}
+        self._ready = {}
+        self._watches = {}
+        self._listeners = []
+        self._indexes = {}
+        self._dispatch = threading.local()
+        self._lock = threading.RLock()
+
+    # === SETUP ===
+    def watch(self, name: str, factory=None) -> None:
+        """
+        Start mirroring a collection and block until its initial snapshot is in.
+        `factory(doc_id, data)` turns a document into the object we keep in memory.
+        """
+        if name in self._watches:
+            return
+        with self._lock:
+            self._factories[name] = factory or (lambda doc_id, data: data)
+            self._items[name] = {}
+            self.versions[name] = 0
+            self._ready[name] = threading.Event()
+
+        callback = lambda docs, changes, read_time: self._on_snapshot(name, changes)
+        self._watches[name] = self.db.collection(name).on_snapshot(callback)
+
+        if not self._ready[name].wait(self.timeout):
+            raise TimeoutError(f"Timed out loading collection '{name}'")
+
+    def add_index(self, name: str, index: str, key) -> None:
+        """
+        Maintain a secondary index `index` over a collection, grouping objects by `key(obj)`.
+        Objects whose key is None are left out. Kept up to date by every delta.
+        """
+        with self._lock:
+            buckets = {}
+            for doc_id, obj in self._items[name].items():
+                value = key(obj)
+                if value is not None:
+                    buckets.setdefault(value, {})[doc_id] = obj
+            self._indexes.setdefault(name, {})[index] = (key, buckets)
+
+    def add_listener(self, listener) -> None:
+        """
+        Call `listener(collection, doc_id, old, new)` for every applied change.
+        Listeners run after the change is visible, outside the store lock; inside one,
+        `change_version` is the store version that first included the change.
+        """
+        self._listeners.append(listener)
+
+    @property
+    def change_version(self):
+        """Store version of the change being delivered to listeners on this thread, else None."""
+        return getattr(self._dispatch, 'version', None)
+
+    def close(self) -> None:
+        """Stop all snapshot listeners."""
+        for watch in self._watches.values():
+            watch.unsubscribe()
+        self._watches.clear()
+
+    # === DELTAS ===
+    def _on_snapshot(self, name, changes) -> None:
+        events = []
+        with self._lock:
+            items = self._items[name]
+            factory = self._factories[name]
+            for change in changes:
+                doc = change.document
+                old = items.get(doc.id)
+                if change.type.name == 'REMOVED':
+                    items.pop(doc.id, None)
+                    new = None
+                else:
+                    new = factory(doc.id, doc.to_dict())
+                    items[doc.id] = new
+                self._reindex(name, doc.id, old, new)
+                events.append((doc.id, old, new))
+
+            if events:
+                SNAPSHOT_CHANGES.inc(len(events), collection=name)
+                self.versions[name] += 1
+                self.version += 1
+            version = self.version
+
+        self._ready[name].set()
+
+        self._dispatch.version = version
+        try:
+            for doc_id, old, new in events:
+                for listener in self._listeners:
+                    listener(name, doc_id, old, new)
+        finally:
+            self._dispatch.version = None
+
+    def _reindex(self, name, doc_id, old, new) -> None:
+        for key, buckets in self._indexes.get(name, {}).values():
+            if old is not None:
+                value = key(old)
+                bucket = buckets.get(value)
+                if bucket is not None:
+                    bucket.pop(doc_id, None)
+                    if not bucket:
+                        del buckets[value]
+            if new is not None:
+                value = key(new)
+                if value is not None:
+                    buckets.setdefault(value, {})[doc_id] = new
+
+    # === READS ===
+    def get(self, name: str, doc_id: str):
+        """Return one object by document id, or None."""
+        return self._items[name].get(doc_id)
+
+    def values(self, name: str) -> list:
+        """Return a snapshot list of every object in a collection."""
+        with self._lock:
+            return list(self._items[name].values())
+
+    def snapshot(self, *names) -> tuple:
+        """(version, values of each named collection), all taken at the same moment."""
+        with self._lock:
+            return (self.version, *(list(self._items[name].values()) for name in names))
+
+    def count(self, name: str) -> int:
+        return len(self._items[name])
+
+    def lookup(self, name: str, index: str, value) -> list:
+        """Objects in a collection whose indexed key equals `value`, in O(result)."""
+        with self._lock:
+            _, buckets = self._indexes[name][index]
+            return list(buckets.get(value, {}).values())
+
+    def keys(self, name: str, index: str) -> list:
+        """Distinct keys currently present in an index."""
+        with self._lock:
+            return list(self._indexes[name][index][1])
@@ -1,4 +1,7 @@
 class Supplier:
+    __slots__ = ('supplier_id', 'part_id', 'price_per_unit', 'lead_time_days',
+                 'min_order_qty', 'reliability_rating')
+
     def __init__(self, supplier_id, part_id, price_per_unit, lead_time_days, min_order_qty, reliability_rating) -> None:
         self.supplier_id = supplier_id
         self.part_id = part_id
@@ -10,4 +13,7 @@ class Supplier:
     def __repr__(self) -> str:
         return (f"Supplier(supplier_id={self.supplier_id}, part_id={self.part_id}, "
                 f"price_per_unit={self.price_per_unit}, lead_time_days={self.lead_time_days}, "
-                f"min_order_qty={self.min_order_qty}, reliability_rating={self.reliability_rating})")
\ No newline at end of file
+                f"min_order_qty={self.min_order_qty}, reliability_rating={self.reliability_rating})")
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
@@ -1,4 +1,7 @@
 import json
+import math
+import argparse
+import time
 import firebase_admin
 from firebase_admin import credentials, firestore, _apps
 from dotenv import load_dotenv
@@ -7,8 +10,10 @@ import os
 
 # ——— Load .env and grab your service account file path —————————————
 load_dotenv(override=True)
+# With FIRESTORE_EMULATOR_HOST set we talk to the local emulator and need no credentials
+FIRESTORE_EMULATOR_HOST = os.getenv("FIRESTORE_EMULATOR_HOST")
 SERVICE_ACCOUNT_PATH = os.getenv("SERVICE_ACCOUNT_PATH")
-if not SERVICE_ACCOUNT_PATH:
+if not SERVICE_ACCOUNT_PATH and not FIRESTORE_EMULATOR_HOST:
     SERVICE_ACCOUNT_PATH = getpass.getpass(
         "Enter SERVICE_ACCOUNT_PATH for Firebase service account: "
     )
@@ -20,20 +25,39 @@ PARTS_JSON_PATH  = 'data/parts.json'
 SUPPLY_JSON_PATH = 'data/supply.json'
 SPEC_JSON_PATH   = 'data/specs.json'
 
+# ——— Bulk ingest settings ————————————————————————————————————————
+CHECKPOINT_PATH      = 'data/.upload_checkpoint.json'
+CHECKPOINT_EVERY     = 2000   # records between flush + checkpoint
+BULK_OPS_PER_SECOND  = 500    # BulkWriter ramps up from here ...
+BULK_MAX_OPS_PER_SEC = 2000   # ... but never past this
+BULK_MAX_ATTEMPTS    = 5      # retries per document before it is recorded as failed
+READ_CHUNK_SIZE      = 1 << 16
+
+# collection -> (source file, doc id for a record, fields stripped from the stored doc)
+BULK_SOURCES = {
+    'sales':  (SALES_JSON_PATH,  lambda r: r.get('sales_order_id'), ['sales_order_id']),
+    'orders': (ORDERS_JSON_PATH, lambda r: r.get('order_id'),       ['order_id']),
+    'parts':  (PARTS_JSON_PATH,  lambda r: r.get('part_id'),        ['part_id']),
+    'supply': (SUPPLY_JSON_PATH,
+               lambda r: f"{r['supplier_id']}_{r['part_id']}" if r.get('supplier_id') and r.get('part_id') else None,
+               ['supplier_id', 'part_id']),
+    'specs':  (SPEC_JSON_PATH,   lambda r: r.get('spec_name'),      ['spec_name']),
+}
+
 def initialize_firebase():
     """
     Initialize the default Firebase app only once, then return Firestore client.
     """
+    if FIRESTORE_EMULATOR_HOST:
+        from google.cloud import firestore as gcloud_firestore
+        return gcloud_firestore.Client(project=os.getenv("FIREBASE_PROJECT_ID", "demo-hugo"))
     if not _apps:  # no apps have been initialized yet
         cred = credentials.Certificate(SERVICE_ACCOUNT_PATH)
         firebase_admin.initialize_app(cred)
     return firestore.client()
 
 def upload_sales_orders(db):
-    with open(SALES_JSON_PATH, 'r') as f:
-        orders = json.load(f)
-
-    for order in orders:
+    for order in iter_json_array(SALES_JSON_PATH):
         sales_id = order.get('sales_order_id')
         if not sales_id:
             print("Skipping entry without 'sales_order_id'", order)
@@ -45,11 +69,7 @@ def upload_sales_orders(db):
         print(f"Uploaded sales/{sales_id}")
 
 def upload_orders(db):
-    with open(ORDERS_JSON_PATH, 'r') as f:
-        text = f.read().replace('NaN', 'null')
-        orders = json.loads(text)
-
-    for order in orders:
+    for order in iter_json_array(ORDERS_JSON_PATH):
         order_id = order.get('order_id')
         if not order_id:
             print("Skipping entry without 'order_id'", order)
@@ -61,11 +81,7 @@ def upload_orders(db):
         print(f"Uploaded orders/{order_id}")
 
 def upload_parts(db):
-    with open(PARTS_JSON_PATH, 'r') as f:
-        text = f.read().replace('NaN', 'null')
-        parts = json.loads(text)
-
-    for part in parts:
+    for part in iter_json_array(PARTS_JSON_PATH):
         part_id = part.get('part_id')
         if not part_id:
             print("Skipping entry without 'part_id'", part)
@@ -77,10 +93,7 @@ def upload_parts(db):
         print(f"Uploaded parts/{part_id}")
 
 def upload_supply(db):
-    with open(SUPPLY_JSON_PATH, 'r') as f:
-        supply = json.load(f)
-
-    for entry in supply:
+    for entry in iter_json_array(SUPPLY_JSON_PATH):
         supplier_id = entry.get('supplier_id')
         part_id     = entry.get('part_id')
         if not supplier_id or not part_id:
@@ -95,10 +108,7 @@ def upload_supply(db):
         print(f"Uploaded supply/{doc_id}")
 
 def upload_specs(db):
-    with open(SPEC_JSON_PATH, 'r') as f:
-        specs = json.load(f)
-
-    for entry in specs:
+    for entry in iter_json_array(SPEC_JSON_PATH):
         spec_name = entry.get('spec_name')
         if not spec_name:
             print("Skipping entry without 'spec_name'", entry)
@@ -109,8 +119,182 @@ def upload_specs(db):
         })
         print(f"Uploaded specs/{spec_name}")
 
+# ——— Streaming JSON ————————————————————————————————————————————————
+def _finite_or_none(text):
+    # 1e999 parses to inf; Firestore should get null for it just like for NaN
+    value = float(text)
+    return value if math.isfinite(value) else None
+
+# Our exports write missing numbers as bare NaN; map NaN / Infinity / -Infinity to null
+# at the token level instead of string-replacing the file (which also hit "NaN" inside strings)
+RECORD_DECODER = json.JSONDecoder(parse_constant=lambda name: None, parse_float=_finite_or_none)
+
+def iter_json_array(path, chunk_size=READ_CHUNK_SIZE, decoder=RECORD_DECODER):
+    """
+    Yield the elements of a top-level JSON array one at a time,
+    reading the file in chunks so memory stays flat regardless of file size.
+    Non-finite numbers come back as None.
+    """
+    with open(path, 'r') as f:
+        buf = ''
+        while not buf:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            buf = chunk.lstrip()
+        if not buf.startswith('['):
+            raise ValueError(f"{path} does not contain a JSON array")
+        pos = 1
+        eof = False
+
+        while True:
+            # skip separators between elements
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) and buf[pos] == ']':
+                return
+
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                end = None
+            # A value that runs to the very end of the buffer may be cut off mid-token
+            if end is None or (end == len(buf) and not eof):
+                if eof:
+                    raise ValueError(f"Truncated or invalid JSON in {path}")
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                pos = 0
+                continue
+
+            yield item
+            pos = end
+
+# ——— Bulk ingest ————————————————————————————————————————————————
+def load_checkpoint(path=CHECKPOINT_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_checkpoint(checkpoint, path=CHECKPOINT_PATH):
+    # write-then-rename so an interrupted save never leaves a corrupt checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+def bulk_upload(db, name, checkpoint=None, checkpoint_path=CHECKPOINT_PATH,
+                ops_per_second=BULK_OPS_PER_SECOND, max_ops_per_second=BULK_MAX_OPS_PER_SEC):
+    """
+    Upload one collection through a BulkWriter.
+
+    Records are streamed from disk, written in parallel with rate limiting and
+    retries, and every CHECKPOINT_EVERY records the writer is flushed and the
+    position saved, so a rerun with the same checkpoint resumes where it stopped.
+    Documents that still failed after BULK_MAX_ATTEMPTS are kept in the checkpoint
+    and written again on the next run; an id is cleared once it goes through.
+    Returns the progress metrics for the collection.
+    """
+    from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions, SendMode
+
+    path, doc_id_for, id_keys = BULK_SOURCES[name]
+    checkpoint = checkpoint if checkpoint is not None else {}
+    state = checkpoint.setdefault(name, {'done': 0, 'failed': []})
+    resume_from = state['done']
+    # ids that failed on an earlier run, written again on the way to resume_from
+    retry = set(state['failed'])
+
+    writer = db.bulk_writer(options=BulkWriterOptions(
+        initial_ops_per_second=ops_per_second,
+        max_ops_per_second=max_ops_per_second,
+        mode=SendMode.parallel,
+    ))
+    failed = []
+    retried = set()
+
+    def on_write_error(failure, _writer):
+        # returning True asks the BulkWriter to retry with backoff
+        if failure.attempts < BULK_MAX_ATTEMPTS:
+            return True
+        failed.append(failure.operation.reference.id)
+        return False
+
+    writer.on_write_error(on_write_error)
+
+    metrics = {'collection': name, 'written': 0, 'skipped': 0, 'retried': 0, 'resumed_at': resume_from}
+    started = time.perf_counter()
+    collection = db.collection(name)
+    position = resume_from
+
+    def commit_progress():
+        writer.flush()
+        state['done'] = position
+        # a retried id that did not fail again is done
+        state['failed'] = sorted((set(state['failed']) - retried) | set(failed))
+        failed.clear()
+        retried.clear()
+        save_checkpoint(checkpoint, checkpoint_path)
+        elapsed = time.perf_counter() - started
+        print(f"[{name}] {position} records, {metrics['written']} written "
+              f"({metrics['written'] / elapsed if elapsed else 0:.0f}/s), "
+              f"{len(state['failed'])} failed")
+
+    for index, record in enumerate(iter_json_array(path)):
+        if index < resume_from:
+            doc_id = doc_id_for(record) if retry else None
+            if doc_id in retry:
+                writer.set(collection.document(doc_id), {
+                    k: v for k, v in record.items() if k not in id_keys
+                })
+                retry.discard(doc_id)
+                retried.add(doc_id)
+                metrics['retried'] += 1
+            continue
+        position = index + 1
+
+        doc_id = doc_id_for(record)
+        if not doc_id:
+            metrics['skipped'] += 1
+            continue
+
+        writer.set(collection.document(doc_id), {
+            k: v for k, v in record.items() if k not in id_keys
+        })
+        metrics['written'] += 1
+
+        if position % CHECKPOINT_EVERY == 0:
+            commit_progress()
+
+    commit_progress()
+    writer.close()
+
+    metrics['failed'] = len(state['failed'])
+    metrics['seconds'] = round(time.perf_counter() - started, 3)
+    return metrics
+
+def bulk_upload_all(db, names=None, resume=False, checkpoint_path=CHECKPOINT_PATH):
+    """Bulk-load every collection (or just `names`), optionally resuming from the checkpoint."""
+    checkpoint = load_checkpoint(checkpoint_path) if resume else {}
+    results = []
+    for name in names or BULK_SOURCES:
+        results.append(bulk_upload(db, name, checkpoint, checkpoint_path))
+    return results
+
 def main():
+    parser = argparse.ArgumentParser(description="Upload the local JSON data to Firestore.")
+    parser.add_argument('--bulk', action='store_true', help="use BulkWriter with streaming and checkpoints")
+    parser.add_argument('--resume', action='store_true', help="continue a bulk load from its checkpoint")
+    parser.add_argument('--only', nargs='+', choices=sorted(BULK_SOURCES), help="collections to load")
+    args = parser.parse_args()
+
     db = initialize_firebase()
+    if args.bulk or args.resume:
+        for metrics in bulk_upload_all(db, args.only, resume=args.resume):
+            print(metrics)
+        return
+
     upload_sales_orders(db)
     upload_orders(db)
     upload_parts(db)
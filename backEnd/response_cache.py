@@ -0,0 +1,97 @@
+# response_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """
+    Bounded in-process cache of serialized GET responses.
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted once the cached bodies exceed `max_bytes`. Writers call
+    `invalidate()`; a read that raced with a write is simply not stored,
+    see `generation()`.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=30.0):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (body, etag, expires_at)
+        self._bytes = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+    def generation(self) -> int:
+        """Take this before reading the source; pass it to put() afterwards."""
+        return self._generation
+
+    def get(self, key):
+        """Return (body, etag) for a fresh entry, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            body, etag, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body, etag
+
+    def put(self, key, body: bytes, generation: int) -> str:
+        """Cache a body unless a write happened since `generation`; returns its ETag."""
+        etag = self.make_etag(body)
+        if len(body) > self.max_bytes:
+            return etag
+        with self._lock:
+            if generation != self._generation:
+                return etag
+            self._remove(key)
+            self._entries[key] = (body, etag, time.monotonic() + self.ttl)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return etag
+
+    def invalidate(self, *keys) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+            }
@@ -0,0 +1,37 @@
+import contextlib
+import io
+import os
+import pathlib
+import sys
+
+import pytest
+
+backend_root = pathlib.Path(__file__).resolve().parent.parent
+# hugo/ first, so `import hugo` is the module and not the backEnd/hugo package
+sys.path.insert(0, str(backend_root / "benchmarks"))
+sys.path.insert(0, str(backend_root / "hugo"))
+sys.path.append(str(backend_root))
+
+# Never prompt or reach out for credentials; the tests run on benchmarks/fakes.py
+os.environ.setdefault("SERVICE_ACCOUNT_PATH", "offline-tests")
+os.environ.setdefault("OPENAI_API_KEY", "sk-offline-tests")
+
+from fakes import DEFAULT_SCRIPTS, FakeFirestore, FakeToolChatModel, synthetic_dataset
+
+
+@pytest.fixture
+def dataset():
+    return synthetic_dataset(200, 20)
+
+
+@pytest.fixture
+def db(dataset):
+    return FakeFirestore(dataset)
+
+
+@pytest.fixture
+def hugo(db):
+    """Hugo on the fake Firestore and the scripted chat model."""
+    from hugo import Hugo
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Hugo(db=db, llm=FakeToolChatModel(scripts=DEFAULT_SCRIPTS))
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from alerts import NO_ALERTS, compute_alerts, parse_thresholds
+
+
+def table(*rows):
+    return pd.DataFrame(rows, columns=['part_id', 'quantity', 'min_stock', 'stock_status', 'blocked',
+                                       'usage_count', 'comments'])
+
+
+def test_each_rule_and_their_combination():
+    alerts = compute_alerts(table(
+        ('P1', 5, 20, 25.0, True, 1, 'supplier recall'),
+        ('P2', 8, 20, 40.0, False, 4, None),
+        ('P3', 15, 20, 75.0, False, 0, None),
+        ('P4', 25, 20, 125.0, False, 3, None),
+        ('P5', 40, 20, 200.0, False, 5, None),
+    ))
+
+    assert alerts == {
+        'P1': 'Blocked: supplier recall',
+        'P2': 'Critical stock: 8 of min 20 (40%); High usage: in 4 specs',
+        'P3': 'Low stock: 15 of min 20 (75%)',
+        'P4': 'High usage: in 3 specs',
+    }
+
+
+def test_thresholds_override_the_defaults():
+    rows = table(('P1', 15, 20, 75.0, False, 0, None))
+
+    assert compute_alerts(rows, {'low_stock_pct': 60}) == NO_ALERTS
+    assert compute_alerts(rows, parse_thresholds({'critical_stock_pct': '80', 'low_stock_pct': ''})) == {
+        'P1': 'Critical stock: 15 of min 20 (75%)'}
+
+
+def test_empty_table_has_no_alerts():
+    assert compute_alerts(table()) == NO_ALERTS
+    assert compute_alerts(None) == NO_ALERTS
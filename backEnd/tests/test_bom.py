@@ -0,0 +1,47 @@
+from bom import BomMatrix
+from fakes import synthetic_dataset
+
+
+def specs_of(dataset):
+    return {name: {**doc, 'spec_name': name} for name, doc in dataset['specs'].items()}
+
+
+def dense(bom):
+    """{spec: {part: qty}}, independent of row and column order."""
+    rows = {}
+    for row, spec in enumerate(bom.spec_ids):
+        start, end = bom.indptr[row], bom.indptr[row + 1]
+        entries = {bom.part_ids[col]: qty for col, qty in zip(bom.indices[start:end], bom.data[start:end])}
+        if entries:
+            rows[spec] = entries
+    return rows
+
+
+def test_set_spec_matches_a_full_rebuild():
+    specs = specs_of(synthetic_dataset(50, 10, seed=3))
+    names = list(specs)
+    bom = BomMatrix.from_specs(list(specs.values()))
+
+    edited = {**specs[names[0]], 'bill of materials': [{'Part_ID': 'P1', 'Qty': 2}, {'Part_ID': 'NEW', 'Qty': 1},
+                                                        {'Part_ID': 'P1', 'Qty': 3}]}
+    added = {'spec_name': 'scanned_S9_V9_specs', 'bill of materials': [{'Part_ID': 'P4', 'Qty': 6}]}
+    for name, spec in ((names[0], edited), (names[1], None), (added['spec_name'], added)):
+        bom.set_spec(name, spec)
+        if spec is None:
+            del specs[name]
+        else:
+            specs[name] = spec
+
+    assert dense(bom) == dense(BomMatrix.from_specs(list(specs.values())))
+    assert dense(bom)[names[0]] == {'P1': 5.0, 'NEW': 1.0}
+    # removed specs keep their row (emptied), so other row numbers stay valid
+    assert bom.spec_index[names[1]] == 1 and names[1] not in dense(bom)
+
+
+def test_requirements_explode_demand_through_the_matrix():
+    bom = BomMatrix.from_specs([
+        {'spec_name': 'A', 'bill of materials': [{'Part_ID': 'P1', 'Qty': 2}, {'Part_ID': 'P2', 'Qty': 1}]},
+        {'spec_name': 'B', 'bill of materials': [{'Part_ID': 'P1', 'Qty': 1}]},
+    ])
+
+    assert bom.requirements({'A': 3, 'B': 4, 'unknown': 9}).to_dict() == {'P1': 10.0, 'P2': 3.0}
@@ -0,0 +1,52 @@
+import pandas as pd
+
+from bom import BomMatrix
+from capacity import production_mix, spec_capacity
+
+
+def spec(name, *lines):
+    return {'spec_name': name, 'bill of materials': [{'Part_ID': part_id, 'Qty': qty} for part_id, qty in lines]}
+
+
+BOM = BomMatrix.from_specs([
+    spec('A', ('P1', 2), ('P2', 1)),
+    spec('B', ('P1', 1), ('P3', 3)),
+    spec('C'),
+])
+STOCK = pd.Series({'P1': 10, 'P2': 4, 'P3': 9})
+
+
+def usage(bom, mix):
+    needed = bom.requirements(mix)
+    return needed.reindex(STOCK.index).fillna(0)
+
+
+def test_spec_capacity_names_the_bottleneck():
+    table = spec_capacity(BOM, STOCK)
+
+    assert table.to_dict('records') == [
+        {'spec_name': 'B', 'units': 3, 'bottleneck_part': 'P3', 'bottleneck_qty': 3.0, 'bottleneck_stock': 9.0},
+        {'spec_name': 'A', 'units': 4, 'bottleneck_part': 'P2', 'bottleneck_qty': 1.0, 'bottleneck_stock': 4.0},
+    ]
+
+
+def test_production_mix_shares_stock_between_specs():
+    result = production_mix(BOM, STOCK)
+
+    assert result['total_units'] == 6
+    assert 'C' not in result['mix']
+    assert (usage(BOM, result['mix']) <= STOCK).all()
+
+
+def test_production_mix_follows_weights_and_caps():
+    heavy = production_mix(BOM, STOCK, weights={'B': 10})
+    assert heavy['mix']['B'] == 3
+
+    capped = production_mix(BOM, STOCK, weights={'B': 10}, max_units={'B': 1})
+    assert capped['mix'] == {'A': 4, 'B': 1}
+    assert (usage(BOM, capped['mix']) <= STOCK).all()
+
+
+def test_production_mix_without_stock_or_bom_lines():
+    assert production_mix(BOM, pd.Series(dtype=float))['mix'] == {}
+    assert production_mix(BomMatrix.from_specs([spec('C')]), STOCK) == {'method': 'none', 'total_units': 0, 'mix': {}}
@@ -0,0 +1,8 @@
+def test_stream_reports_each_tool_call_once_with_its_input(hugo):
+    events = list(hugo.stream("Who supplies P1 and P2?"))
+
+    starts = [event for event in events if event["event"] == "tool_start"]
+    assert sorted(event["input"] for event in starts) == ["P1", "P2"]
+    assert {event["tool"] for event in starts} == {"find_supplier_for_part"}
+    assert sum(event["event"] == "tool_end" for event in events) == 2
+    assert events[-1]["event"] == "done"
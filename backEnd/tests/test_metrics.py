@@ -0,0 +1,17 @@
+import pytest
+
+from metrics import LLM_LATENCY, LLM_REQUESTS, llm_call
+
+
+def test_failed_llm_call_is_counted_as_an_error():
+    errors = LLM_REQUESTS._values.get(("test-model", "error"), 0)
+
+    with pytest.raises(TimeoutError):
+        with llm_call("test-model"):
+            raise TimeoutError("no answer")
+    with llm_call("test-model"):
+        pass
+
+    assert LLM_REQUESTS._values[("test-model", "error")] == errors + 1
+    assert LLM_REQUESTS._values[("test-model", "ok")] >= 1
+    assert sum(LLM_LATENCY._values[("test-model",)][0]) >= 2
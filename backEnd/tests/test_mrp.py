@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+import pandas as pd
+
+from bom import BomMatrix
+from fakes import DATASET_START
+from hugo import Hugo
+from mrp import MrpProjection
+
+START = date(2025, 6, 1)
+SPEC = {'spec_name': 'scanned_S1_V1_specs', 'bill of materials': [{'Part_ID': 'P1', 'Qty': 2}]}
+LEAD_TIMES = pd.Series({'P1': 7.0})
+
+
+def part(quantity):
+    return Hugo._make_part('P1', {'min_stock': 0, 'quantity': quantity})
+
+
+def sale(sale_id, requested_date, quantity):
+    return Hugo._make_sales(sale_id, {'model': 'S1', 'version': 'V1', 'quantity': quantity,
+                                      'requested_date': requested_date.isoformat()})
+
+
+def projection(sales, **kwargs):
+    return MrpProjection(BomMatrix.from_specs([SPEC]), load=lambda: (None, [part(5)], [], sales),
+                         start=START, **kwargs)
+
+
+def test_past_dated_sale_is_an_overdue_first_bucket_shortage():
+    plan = projection([sale('S1', START - timedelta(days=30), 10)]).plan(LEAD_TIMES)
+
+    assert plan.to_dict('records') == [{
+        'part_id': 'P1', 'on_hand': 5.0, 'shortage_date': START, 'shortage_qty': 15.0,
+        'projected_end': -15.0, 'lead_time_days': 7.0, 'order_by': START - timedelta(days=7), 'late': True,
+    }]
+
+
+def test_sales_older_than_the_lookback_count_as_closed():
+    mrp = projection([sale('S1', START - timedelta(days=31), 10), sale('S2', START + timedelta(days=3), 1)],
+                     lookback_days=30)
+
+    demand = [bucket['demand'] for bucket in mrp.projection('P1')]
+    assert demand[3] == 2.0
+    assert sum(demand) == 2.0
+
+
+def state(mrp):
+    """{part_id: (stock, demand, receipts, projected)} after re-projecting, independent of row order."""
+    mrp.refresh()
+    return {part_id: (mrp.stock[row], mrp.demand[row].tolist(), mrp.receipts[row].tolist(),
+                      mrp.projected[row].tolist())
+            for part_id, row in mrp.part_index.items()}
+
+
+def test_incremental_changes_match_a_full_rebuild(hugo, db):
+    mrp = MrpProjection(hugo.bom_matrix, load=hugo._mrp_snapshot, start=DATASET_START)
+    mrp.refresh()
+    hugo.store.add_listener(lambda *change: mrp.on_change(*change, version=hugo.store.change_version))
+    orders, sales, parts = (db.collection(name) for name in ('orders', 'sales', 'parts'))
+    version = mrp.version
+
+    orders.document('O0').update({'quantity_ordered': 500, 'expected_delivery_date': '2025-06-20'})
+    orders.document('O1').update({'status': 'delivered'})
+    orders.document('O-new').set({'part_id': 'P-new', 'quantity_ordered': 10, 'status': 'ordered',
+                                  'expected_delivery_date': '2025-07-01'})
+    sales.document('S0').update({'quantity': 40, 'requested_date': '2025-06-10'})
+    sales.document('S1').delete()
+    sales.document('S-new').set({'model': 'S1', 'version': 'V1', 'quantity': 3, 'requested_date': '2025-06-03'})
+    parts.document('P3').update({'quantity': 0})
+    parts.document('P4').update({'blocked': True})
+
+    assert mrp.version == version + 8
+    rebuilt = MrpProjection(hugo.bom_matrix, load=hugo._mrp_snapshot, start=DATASET_START)
+    assert state(mrp) == state(rebuilt)
@@ -0,0 +1,50 @@
+import response_cache
+from response_cache import ResponseCache
+
+
+def test_least_recently_used_entries_go_once_over_the_byte_bound():
+    cache = ResponseCache(max_bytes=10, ttl=60)
+    generation = cache.generation()
+    cache.put('a', b'aaaa', generation)
+    cache.put('b', b'bbbb', generation)
+    assert cache.get('a') is not None  # 'b' is now the least recently used
+
+    cache.put('c', b'cccc', generation)
+
+    assert cache.get('b') is None
+    assert cache.get('a')[0] == b'aaaa' and cache.get('c')[0] == b'cccc'
+    assert cache.stats()['bytes'] == 8 and cache.evictions == 1
+
+
+def test_a_body_larger_than_the_bound_is_not_stored():
+    cache = ResponseCache(max_bytes=4, ttl=60)
+
+    etag = cache.put('a', b'too long', cache.generation())
+
+    assert etag == ResponseCache.make_etag(b'too long')
+    assert cache.get('a') is None and cache.stats()['bytes'] == 0
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(response_cache.time, 'monotonic', lambda: now[0])
+    cache = ResponseCache(ttl=30)
+    cache.put('a', b'body', cache.generation())
+
+    now[0] = 129.9
+    assert cache.get('a') is not None
+    now[0] = 130.0
+    assert cache.get('a') is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_a_read_that_raced_a_write_is_not_stored():
+    cache = ResponseCache()
+    generation = cache.generation()
+
+    cache.invalidate('parts/P1')
+    cache.put('parts/P1', b'stale', generation)
+
+    assert cache.get('parts/P1') is None
+    cache.put('parts/P1', b'fresh', cache.generation())
+    assert cache.get('parts/P1')[0] == b'fresh'
@@ -0,0 +1,39 @@
+import numpy as np
+
+from retrieval import Retriever
+
+
+class CountingEmbedder:
+    """Bag-of-characters vectors; remembers how many lines it was asked to embed."""
+
+    def __init__(self) -> None:
+        self.embedded = 0
+
+    def __call__(self, texts):
+        self.embedded += len(texts)
+        vectors = np.zeros((len(texts), 64))
+        for row, text in enumerate(texts):
+            for char in text.lower():
+                vectors[row, ord(char) % 64] += 1
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1)
+
+
+def test_one_order_change_reembeds_one_row(hugo, db):
+    embedder = hugo.embedder = CountingEmbedder()
+    hugo.retriever = hugo._context_version = hugo._retriever_version = None
+    hugo.create_data_context()
+    hugo.retriever.context("P1")
+    embedded = embedder.embedded
+
+    db.collection('orders').document('O1').update({'status': 'delayed', 'quantity_ordered': 999})
+    db.collection('orders').document('O2').delete()
+    hugo.create_data_context()
+    question = "which orders of P5 are delayed"
+    context = hugo.retriever.context(question)
+
+    # the edited order and the question itself
+    assert embedder.embedded - embedded == 2
+    fresh = Retriever(hugo.summary_data, hugo.store.values('specs'), hugo.orders, embedder=embedder)
+    assert context == fresh.context(question)
+    assert "|999|" in hugo.retriever.context("O1")
+    assert "O2|" not in hugo.retriever.context("O2", kinds=('orders',))
@@ -0,0 +1,63 @@
+from datetime import date, timedelta
+
+from hugo import Hugo
+from scheduler import ReorderScheduler, reorder_candidates
+
+
+def without_lead_time(hugo, db, part_id):
+    db.collection('parts').document(part_id).update({'quantity': 0, 'min_stock': 50, 'blocked': False})
+    for order in hugo.store.lookup('orders', 'part_id', part_id):
+        db.collection('orders').document(order.order_id).delete()
+    for supplier in hugo.store.lookup('supply', 'part_id', part_id):
+        db.collection('supply').document(f"{supplier.supplier_id}_{part_id}").update({'lead_time_days': None})
+
+
+def test_unsourced_part_is_reported_once_per_window(hugo, db):
+    without_lead_time(hugo, db, 'P1')
+    digests = []
+    scheduler = ReorderScheduler(hugo, db, notify=digests.append)
+
+    scheduler.sweep()
+    scheduler.sweep()
+
+    assert len(digests) == 1
+    assert 'P1' in digests[0].splitlines()[-1]
+    assert 'P1' in scheduler.draft_orders()[1]
+
+
+def test_ids_of_past_windows_are_forgotten():
+    seen = {'DRAFT-P1-1': date(2025, 6, 1), 'DRAFT-P2-9': date(2025, 6, 8)}
+
+    ReorderScheduler._prune(seen, date(2025, 6, 1))
+
+    assert seen == {'DRAFT-P2-9': date(2025, 6, 8)}
+
+
+def test_draft_ids_are_stable_within_a_reorder_window():
+    parts = [Hugo._make_part('P1', {'quantity': 1, 'min_stock': 10, 'reorder_interval_days': 7}),
+             Hugo._make_part('P2', {'quantity': 1, 'min_stock': 10, 'blocked': True}),
+             Hugo._make_part('P3', {'quantity': 1, 'min_stock': 10}),
+             Hugo._make_part('P4', {'quantity': 50, 'min_stock': 10})]
+    orders = [Hugo._make_order('O1', {'part_id': 'P3', 'status': 'draft'})]
+    window_start = date.fromordinal(date(2025, 6, 1).toordinal() // 7 * 7)
+
+    ids = [reorder_candidates(parts, orders, window_start + timedelta(days=d))['order_id'].tolist()
+           for d in range(8)]
+
+    assert ids[0] == [f'DRAFT-P1-{window_start.toordinal() // 7}']
+    assert all(day == ids[0] for day in ids[:7])
+    assert ids[7] != ids[0]
+    row = reorder_candidates(parts, orders, window_start).iloc[0]
+    assert row['shortage'] == 9 and row['window_end'] == window_start + timedelta(days=7)
+
+
+def test_a_second_sweep_writes_nothing(hugo, db):
+    scheduler = ReorderScheduler(hugo, db)
+
+    first = scheduler.sweep()
+    written = dict(db.collection('orders')._docs)
+
+    assert first
+    assert scheduler.sweep() == []
+    assert ReorderScheduler(hugo, db).sweep() == []
+    assert db.collection('orders')._docs == written
@@ -0,0 +1,56 @@
+from datetime import date
+
+import pandas as pd
+
+from sourcing import SUPPLY_COLUMNS, choose_suppliers
+
+TODAY = date(2025, 6, 1)
+
+
+def supply(*rows):
+    return pd.DataFrame(rows, columns=SUPPLY_COLUMNS)
+
+
+SUPPLY = supply(
+    # supplier, part, price, lead time, MOQ, reliability
+    ('Cheap', 'P1', 1.0, 30, 0, 1.0),
+    ('Fast', 'P1', 2.0, 5, 0, 1.0),
+    ('Flaky', 'P1', 1.5, 5, 0, 0.5),
+    ('Bulk', 'P2', 3.0, 10, 100, 1.0),
+)
+
+
+def chosen(result):
+    return {row['part_id']: row for row in result.to_dict('records')}
+
+
+def test_cheapest_supplier_that_meets_the_deadline_wins():
+    result = chosen(choose_suppliers([{'part_id': 'P1', 'shortage': 10, 'need_by': date(2025, 6, 10)}],
+                                     SUPPLY, today=TODAY))
+
+    # Flaky is cheaper per unit but costs 3.0 expected per unit at 0.5 reliability
+    assert result['P1']['supplier_id'] == 'Fast'
+    assert result['P1']['meets_deadline'] is True
+    assert result['P1']['arrives'] == date(2025, 6, 6)
+    assert result['P1']['suppliers'] == 3
+
+
+def test_no_deadline_takes_the_cheapest_and_a_missed_one_the_fastest():
+    relaxed = chosen(choose_suppliers([{'part_id': 'P1', 'shortage': 10, 'need_by': None}], SUPPLY, today=TODAY))
+    assert relaxed['P1']['supplier_id'] == 'Cheap'
+
+    rushed = chosen(choose_suppliers([{'part_id': 'P1', 'shortage': 10, 'need_by': date(2025, 6, 2)}],
+                                     SUPPLY, today=TODAY))
+    assert rushed['P1']['supplier_id'] == 'Fast'
+    assert rushed['P1']['lead_time_days'] == 5 and rushed['P1']['meets_deadline'] is False
+
+
+def test_quantity_covers_shortage_reorder_lot_and_moq():
+    result = chosen(choose_suppliers(
+        [{'part_id': 'P1', 'shortage': 10}, {'part_id': 'P1', 'shortage': 15}, {'part_id': 'P2', 'shortage': 5},
+         {'part_id': 'P9', 'shortage': 1}],
+        SUPPLY, reorder_quantity=pd.Series({'P1': 20}), today=TODAY))
+
+    assert result['P1']['shortage'] == 25 and result['P1']['quantity'] == 25
+    assert result['P2']['quantity'] == 100 and result['P2']['total_cost'] == 300
+    assert result['P9']['supplier_id'] is None and result['P9']['quantity'] is None
@@ -0,0 +1,54 @@
+import contextlib
+import io
+
+import hugo as hugo_module
+from bom import BomMatrix
+from fakes import FakeFirestore, FakeToolChatModel
+from store import LiveStore
+
+
+def test_snapshot_deltas_update_items_indexes_and_listeners():
+    db = FakeFirestore({'parts': {'P1': {'location': 'WH1'}, 'P2': {'location': 'WH1'}}})
+    store = LiveStore(db)
+    store.watch('parts')
+    store.add_index('parts', 'location', lambda p: p.get('location'))
+    seen = []
+    store.add_listener(lambda name, doc_id, old, new: seen.append((doc_id, old, new, store.change_version)))
+    parts = db.collection('parts')
+
+    parts.document('P1').update({'location': 'WH2'})
+    parts.document('P2').delete()
+    parts.document('P3').set({'location': 'WH2'})
+
+    assert [doc_id for doc_id, *_ in seen] == ['P1', 'P2', 'P3']
+    assert seen[0][1:3] == ({'location': 'WH1'}, {'location': 'WH2'})
+    assert seen[1][2] is None and seen[2][1] is None
+    assert [version for *_, version in seen] == [2, 3, 4]
+    assert store.change_version is None
+    assert store.versions['parts'] == store.version == 4
+    assert sorted(store.keys('parts', 'location')) == ['WH2']
+    assert sorted(p['location'] for p in store.lookup('parts', 'location', 'WH2')) == ['WH2', 'WH2']
+    assert store.get('parts', 'P2') is None
+
+
+def test_spec_change_during_the_bom_build_is_caught_up(db, monkeypatch):
+    spec_name = next(iter(db.collection('specs')._docs))
+    edited = {'bill of materials': [{'Part_ID': 'P0', 'Qty': 7}]}
+
+    class EditedMidBuild(BomMatrix):
+        builds = 0
+
+        @classmethod
+        def from_specs(cls, specs_data):
+            bom = super().from_specs(specs_data)
+            cls.builds += 1
+            if cls.builds == 1:
+                db.collection('specs').document(spec_name).set(edited)
+            return bom
+
+    monkeypatch.setattr(hugo_module, 'BomMatrix', EditedMidBuild)
+    with contextlib.redirect_stdout(io.StringIO()):
+        hugo = hugo_module.Hugo(db=db, llm=FakeToolChatModel())
+
+    assert EditedMidBuild.builds == 2
+    assert hugo.bom_matrix.requirements({spec_name: 1}).to_dict() == {'P0': 7.0}
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import upload_data
+from fakes import FakeFirestore
+from upload_data import bulk_upload, iter_json_array, load_checkpoint
+
+
+def test_resume_retries_failed_ids(tmp_path, monkeypatch, capsys):
+    source = tmp_path / "parts.json"
+    source.write_text(json.dumps([{'part_id': f'P{i}', 'quantity': i} for i in range(1, 6)]))
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    monkeypatch.setitem(upload_data.BULK_SOURCES, 'parts',
+                        (str(source), lambda r: r.get('part_id'), ['part_id']))
+    db = FakeFirestore()
+    db.failing_writes = {'P2'}
+
+    first = bulk_upload(db, 'parts', {}, checkpoint_path)
+    assert first['failed'] == 1
+    assert load_checkpoint(checkpoint_path)['parts'] == {'done': 5, 'failed': ['P2']}
+
+    db.failing_writes = set()
+    resumed = bulk_upload(db, 'parts', load_checkpoint(checkpoint_path), checkpoint_path)
+
+    assert resumed['retried'] == 1 and resumed['written'] == 0
+    assert db.collection('parts').document('P2').get().to_dict() == {'quantity': 2}
+    assert load_checkpoint(checkpoint_path)['parts'] == {'done': 5, 'failed': []}
+
+
+def test_iter_json_array_across_chunk_boundaries(tmp_path):
+    records = [{'part_id': f'P{i}', 'comments': 'x' * i, 'tags': [i, {'n': i}]} for i in range(40)]
+    source = tmp_path / "parts.json"
+    source.write_text("\n  " + json.dumps(records, indent=1))
+
+    for chunk_size in (1, 7, 64, 1 << 16):
+        assert list(iter_json_array(str(source), chunk_size=chunk_size)) == records
+
+
+def test_iter_json_array_maps_non_finite_numbers_to_none(tmp_path):
+    source = tmp_path / "parts.json"
+    source.write_text('[{"quantity": NaN, "min_stock": Infinity, "cost": -Infinity, "weight": 1e999, '
+                      '"ratio": 0.5, "comments": "NaN"}, 12]')
+
+    assert list(iter_json_array(str(source), chunk_size=5)) == [
+        {'quantity': None, 'min_stock': None, 'cost': None, 'weight': None, 'ratio': 0.5, 'comments': 'NaN'},
+        12,
+    ]
+
+
+def test_iter_json_array_rejects_truncated_files(tmp_path):
+    source = tmp_path / "parts.json"
+    source.write_text('[{"part_id": "P1"}, {"part_id": "P2"')
+
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(source), chunk_size=4))